@@ -0,0 +1,431 @@
+"""Throughput and latency benchmarks for the SSH terminal.
+
+Replays synthetic recordings of typical sessions through the terminal
+without a real server and prints one table per run:
+
+    python -m benchmarks.terminal_bench               # everything
+    python -m benchmarks.terminal_bench --quick       # smaller recordings
+    python -m benchmarks.terminal_bench --json out.json
+    python -m benchmarks.terminal_bench --baseline out.json
+
+parse     TerminalScreen.feed alone, in reader-sized batches (MB/s)
+render    ServerTerminalView._append_text plus painting, per batch (MB/s, frame ms)
+reader    an in-process SSH server streams the recording through ShellReader
+          into the view (MB/s end to end)
+latency   keystroke to echo on screen, against an in-process echoing shell (ms)
+memory    peak Python allocations while parsing each recording (MB)
+
+With ``--baseline`` each number is compared with a previous ``--json``
+run and changes beyond ``--tolerance`` are flagged; the exit status is 1
+if anything regressed.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import paramiko
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+from bioflow.core.ssh_client import SSHClient, SSHConnectionPool
+from bioflow.core.terminal_screen import TerminalScreen
+from bioflow.ui.server_terminal_view import MAX_BATCH, ServerTerminalView
+
+COLS, ROWS = 120, 40
+# pause between keystrokes in the latency benchmark, seconds
+TYPING_INTERVAL = 0.05
+
+
+# ---- recordings ----
+def build_log(lines: int, seed: int = 1) -> str:
+    """A CMake/GCC build: progress lines, compiler commands, coloured warnings."""
+    rng = random.Random(seed)
+    modules = ["align", "index", "io", "quant", "stats", "util", "vcf", "bam"]
+    out = []
+    for i in range(lines):
+        percent = i * 100 // lines
+        module = rng.choice(modules)
+        source = f"src/{module}/{module}_{rng.randrange(400)}.cpp"
+        kind = rng.random()
+        if kind < 0.55:
+            out.append(f"[{percent:3d}%] \x1b[32mBuilding CXX object {module}/CMakeFiles/{module}.dir/{source}.o\x1b[0m")
+        elif kind < 0.85:
+            out.append(
+                f"/usr/bin/c++ -DNDEBUG -O3 -std=c++17 -I/opt/include -Isrc/{module} "
+                f"-o CMakeFiles/{module}.dir/{source}.o -c /build/{source}"
+            )
+        elif kind < 0.97:
+            line = rng.randrange(1, 2000)
+            out.append(
+                f"\x1b[01m\x1b[K{source}:{line}:12:\x1b[m\x1b[K \x1b[01;35m\x1b[Kwarning: \x1b[m\x1b[K"
+                f"comparison of integer expressions of different signedness [\x1b[01;35m\x1b[K-Wsign-compare\x1b[m\x1b[K]"
+            )
+        else:
+            out.append(f"[{percent:3d}%] \x1b[32m\x1b[1mLinking CXX static library lib{module}.a\x1b[0m")
+    return "\r\n".join(out) + "\r\n"
+
+
+def htop_session(frames: int, seed: int = 2) -> str:
+    """A full-screen monitor on the alternate screen: meters and a process table redrawn in place."""
+    rng = random.Random(seed)
+    users = ["alice", "bob", "root", "slurm", "carol"]
+    commands = ["STAR --runThreadN 16", "samtools sort", "python train.py", "bwa mem -t 8", "sshd: alice", "bash"]
+    out = ["\x1b[?1049h\x1b[?25l\x1b[H\x1b[2J"]
+    for _ in range(frames):
+        frame = ["\x1b[H"]
+        for cpu in range(8):
+            used = rng.randrange(0, 45)
+            frame.append(
+                f"\x1b[{cpu + 1};3H\x1b[36m{cpu + 1:>2}\x1b[39m\x1b[1m[\x1b[22m\x1b[32m{'|' * used}"
+                f"\x1b[31m{'|' * (used // 4)}\x1b[39m{' ' * (45 - used - used // 4)}\x1b[1m{used * 2.2:5.1f}%]\x1b[22m"
+            )
+        frame.append(f"\x1b[10;3H\x1b[36mMem\x1b[39m\x1b[1m[\x1b[22m\x1b[32m{'|' * rng.randrange(20, 40)}\x1b[K")
+        frame.append("\x1b[12;1H\x1b[30;42m    PID USER      PRI  NI  VIRT   RES   SHR S CPU% MEM%   TIME+  Command\x1b[K\x1b[m")
+        for row in range(13, ROWS):
+            highlight = "\x1b[30;46m" if row == 13 else ""
+            frame.append(
+                f"\x1b[{row};1H{highlight}{rng.randrange(1, 99999):>7} {rng.choice(users):<9} 20   0 "
+                f"{rng.randrange(1, 900):>4}M {rng.randrange(1, 500):>4}M {rng.randrange(1, 90):>4}M "
+                f"\x1b[32mR\x1b[39m {rng.random() * 100:4.1f} {rng.random() * 10:4.1f} "
+                f"{rng.randrange(60)}:{rng.randrange(60):02d}.{rng.randrange(100):02d} "
+                f"\x1b[1m{rng.choice(commands)}\x1b[22m\x1b[K\x1b[m"
+            )
+        out.append("".join(frame))
+    out.append("\x1b[?25h\x1b[?1049l")
+    return "".join(out)
+
+
+def ls_colored(files: int, seed: int = 3) -> str:
+    """``ls --color`` of a directory with ``files`` entries, in columns as on a tty."""
+    rng = random.Random(seed)
+    styles = [
+        ("", ".txt"),
+        ("01;34", ""),          # directories
+        ("01;32", ".sh"),       # executables
+        ("01;31", ".tar.gz"),   # archives
+        ("01;36", ".lnk"),      # symlinks
+        ("", ".fastq.gz"),
+        ("", ".bam"),
+    ]
+    names = []
+    for i in range(files):
+        colour, suffix = rng.choice(styles)
+        name = f"sample_{i:06d}{suffix}"
+        names.append((colour, name))
+    width = max(len(name) for _, name in names) + 2
+    per_row = max(COLS // width, 1)
+    out = []
+    for start in range(0, len(names), per_row):
+        cells = []
+        for colour, name in names[start:start + per_row]:
+            padding = " " * (width - len(name))
+            cells.append(f"\x1b[{colour}m{name}\x1b[0m{padding}" if colour else name + padding)
+        out.append("".join(cells).rstrip())
+    return "\x1b[0m" + "\r\n".join(out) + "\r\n"
+
+
+def recordings(quick: bool) -> dict[str, str]:
+    scale = 10 if quick else 1
+    return {
+        "build log": build_log(200_000 // scale),
+        "htop": htop_session(2_000 // scale),
+        "ls --color 100k": ls_colored(100_000 // scale),
+    }
+
+
+def batches(text: str, size: int = MAX_BATCH) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def megabytes(text: str) -> float:
+    return len(text.encode("utf-8")) / 1e6
+
+
+# ---- in-process server ----
+class _StandInServer(paramiko.ServerInterface):
+    """Accepts any password and runs ``handler(channel)`` for each shell."""
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED_OPEN_REQUEST
+
+    def check_channel_pty_request(self, *args):
+        return True
+
+    def check_channel_window_change_request(self, *args):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        # the client must see the shell request succeed before the first
+        # output, let alone the channel closing
+        threading.Timer(0.05, self.handler, args=(channel,)).start()
+        return True
+
+
+def serve(handler) -> int:
+    """Listen on a free local port; every connection gets a shell run by ``handler``."""
+    host_key = paramiko.RSAKey.generate(2048)
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(4)
+
+    def accept():
+        while True:
+            sock, _ = listener.accept()
+            transport = paramiko.Transport(sock)
+            transport.add_server_key(host_key)
+            transport.start_server(server=_StandInServer(handler))
+
+    threading.Thread(target=accept, daemon=True).start()
+    return listener.getsockname()[1]
+
+
+def connect(port: int) -> SSHClient:
+    client = SSHClient(pool=SSHConnectionPool())
+    client.connect("127.0.0.1", port, "bench", password="bench")
+    return client
+
+
+def pump_until(done, timeout: float) -> bool:
+    """Run the event loop until ``done()`` holds or ``timeout`` seconds pass."""
+    if done():
+        return True
+    loop = QEventLoop()
+    poll = QTimer()
+    poll.setInterval(1)
+    poll.timeout.connect(lambda: done() and loop.quit())
+    deadline = QTimer()
+    deadline.setSingleShot(True)
+    deadline.timeout.connect(loop.quit)
+    poll.start()
+    deadline.start(int(timeout * 1000))
+    loop.exec()
+    poll.stop()
+    deadline.stop()
+    return done()
+
+
+def flush_events():
+    """Run the event loop once over everything already queued (paints included)."""
+    loop = QEventLoop()
+    QTimer.singleShot(0, loop.quit)
+    loop.exec()
+
+
+# ---- benchmarks ----
+def bench_parse(data: str) -> dict:
+    screen = TerminalScreen(COLS, ROWS)
+    chunks = batches(data)
+    started = time.perf_counter()
+    for chunk in chunks:
+        screen.feed(chunk)
+        screen.take_dirty()
+    elapsed = time.perf_counter() - started
+    return {"MB/s": megabytes(data) / elapsed}
+
+
+def _new_view() -> ServerTerminalView:
+    view = ServerTerminalView(None)
+    view.resize(COLS * 9, ROWS * 18)
+    view.show()
+    flush_events()
+    return view
+
+
+def bench_render(data: str) -> dict:
+    view = _new_view()
+    frames = []
+    started = time.perf_counter()
+    for chunk in batches(data):
+        t0 = time.perf_counter()
+        view._append_text(chunk)
+        flush_events()
+        frames.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    view.close()
+    view.deleteLater()
+    frames.sort()
+    return {
+        "MB/s": megabytes(data) / elapsed,
+        "frame p50 ms": statistics.median(frames),
+        "frame p95 ms": frames[int(len(frames) * 0.95)],
+        "frame max ms": frames[-1],
+    }
+
+
+def bench_reader(data: str) -> dict:
+    payload = data.encode("utf-8")
+
+    def stream(channel):
+        channel.sendall(payload)
+        channel.send_exit_status(0)
+        channel.close()
+
+    client = connect(serve(stream))
+    view = _new_view()
+    view.ssh_client = client
+    started = time.perf_counter()
+    view.start_shell()
+    # the view drops its reader once it has shown everything up to the remote close
+    finished = pump_until(lambda: view.reader is None, timeout=600)
+    elapsed = time.perf_counter() - started
+    view.set_connected(False, "")
+    view.close()
+    client.close()
+    if not finished:
+        return {"MB/s": 0.0}
+    return {"MB/s": len(payload) / 1e6 / elapsed}
+
+
+def bench_latency(keystrokes: int) -> dict:
+    def echo(channel):
+        while True:
+            data = channel.recv(1024)
+            if not data:
+                break
+            channel.sendall(data)
+
+    client = connect(serve(echo))
+    view = _new_view()
+    view.ssh_client = client
+    view.start_shell()
+    samples = []
+    for i in range(keystrokes):
+        key = "abcdefghijklmnopqrstuvwxyz"[i % 26]
+        if view.screen.x >= COLS - 2:
+            view._send("\r\n")
+            pump_until(lambda: view.screen.x == 0, timeout=5)
+        # keys arrive tens of milliseconds apart when typing
+        pump_until(lambda: False, timeout=TYPING_INTERVAL)
+        x, y = view.screen.x, view.screen.y
+        t0 = time.perf_counter()
+        view._send(key)
+        if pump_until(lambda: view.screen.lines[y].chars[x] == key, timeout=5):
+            samples.append((time.perf_counter() - t0) * 1000)
+    view.set_connected(False, "")
+    view.close()
+    client.close()
+    samples.sort()
+    if not samples:
+        return {"p50 ms": 0.0}
+    return {
+        "p50 ms": statistics.median(samples),
+        "p95 ms": samples[int(len(samples) * 0.95)],
+        "max ms": samples[-1],
+    }
+
+
+def bench_memory(data: str) -> dict:
+    tracemalloc.start()
+    screen = TerminalScreen(COLS, ROWS)
+    for chunk in batches(data):
+        screen.feed(chunk)
+        screen.take_dirty()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"peak MB": peak / 1e6}
+
+
+def best_of(runs: int, bench, *args) -> dict:
+    return max((bench(*args) for _ in range(max(runs, 1))), key=lambda r: r["MB/s"])
+
+
+# ---- reporting ----
+# which direction is better for each metric
+HIGHER_IS_BETTER = {"MB/s"}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            if not old:
+                continue
+            change = (value - old) / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if worse > tolerance:
+                regressions.append(f"{name} / {metric}: {old:.2f} -> {value:.2f} ({change:+.0%})")
+    return regressions
+
+
+def print_table(results: dict, baseline: dict | None):
+    width = max(len(name) for name in results) + 2
+    for name, metrics in results.items():
+        parts = []
+        for metric, value in metrics.items():
+            text = f"{metric} {value:8.2f}"
+            old = (baseline or {}).get(name, {}).get(metric)
+            if old:
+                text += f" ({(value - old) / old:+.0%})"
+            parts.append(text)
+        print(f"{name:<{width}}" + "   ".join(parts))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--quick", action="store_true", help="use recordings a tenth of the size")
+    parser.add_argument("--only", default="parse,render,reader,latency,memory",
+                        help="comma-separated benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs of the parse and render benchmarks; the fastest is kept (default 3)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare with results saved by --json")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="relative change counted as a regression (default 0.15)")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])  # noqa: F841 (needed for the views)
+    selected = set(args.only.split(","))
+    data = recordings(args.quick)
+    results: dict[str, dict] = {}
+    for label, text in data.items():
+        print(f"{label}: {megabytes(text):.1f} MB", file=sys.stderr)
+        if "parse" in selected:
+            results[f"parse · {label}"] = best_of(args.repeat, bench_parse, text)
+        if "render" in selected:
+            results[f"render · {label}"] = best_of(args.repeat, bench_render, text)
+        if "reader" in selected:
+            results[f"reader · {label}"] = bench_reader(text)
+        if "memory" in selected:
+            results[f"memory · {label}"] = bench_memory(text)
+    if "latency" in selected:
+        results["latency · keystroke echo"] = bench_latency(100 if args.quick else 500)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+from collections import OrderedDict
+import posixpath
+import time
+
+
+def _norm(path: str) -> str:
+    return posixpath.normpath(path) if path else path
+
+
+class DirListingCache:
+    """LRU cache of remote directory listings with a maximum age.
+
+    Keyed by absolute remote path, one instance per connection. Bounded by
+    the number of directories and by the total number of entries held,
+    because a single scratch directory can list hundreds of thousands of
+    names. Listings older than ``ttl`` seconds are treated as missing.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_dirs: int = 64, max_items: int = 500_000):
+        self.ttl = ttl
+        self.max_dirs = max_dirs
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._items = 0
+        # path -> (fetched_at, entries)
+        self._data: OrderedDict[str, tuple[float, list]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, path: str) -> list | None:
+        path = _norm(path)
+        hit = self._data.get(path)
+        if hit is None or time.monotonic() - hit[0] > self.ttl:
+            if hit is not None:
+                self._drop(path)
+            self.misses += 1
+            return None
+        self._data.move_to_end(path)
+        self.hits += 1
+        return hit[1]
+
+    def put(self, path: str, entries: list):
+        path = _norm(path)
+        self._drop(path)
+        if len(entries) > self.max_items:
+            return
+        self._data[path] = (time.monotonic(), entries)
+        self._items += len(entries)
+        while len(self._data) > self.max_dirs or self._items > self.max_items:
+            oldest = next(iter(self._data))
+            self._drop(oldest)
+
+    def invalidate(self, path: str):
+        self._drop(_norm(path))
+
+    def invalidate_tree(self, path: str):
+        """Drop ``path`` and every cached directory below it."""
+        path = _norm(path)
+        prefix = path.rstrip("/") + "/"
+        for key in [k for k in self._data if k == path or k.startswith(prefix)]:
+            self._drop(key)
+
+    def clear(self):
+        self._data.clear()
+        self._items = 0
+
+    def _drop(self, path: str):
+        old = self._data.pop(path, None)
+        if old is not None:
+            self._items -= len(old[1])
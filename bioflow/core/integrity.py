@@ -0,0 +1,388 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import hashlib
+import mmap
+import os
+import posixpath
+import re
+import shlex
+import sqlite3
+import threading
+from bioflow.core.ssh_client import STDOUT, ExecCancelled, ExecStream
+
+CHECKSUM_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".bioflow", "checksums.sqlite")
+
+# remote tool per supported algorithm
+ALGORITHMS = {"md5": "md5sum", "sha256": "sha256sum"}
+
+# files hashed at the same time on the server (xargs -P)
+REMOTE_PARALLEL = 4
+
+# bytes handed to the hash per update; large enough to release the GIL for long
+LOCAL_CHUNK = 8 * 1024 * 1024
+
+# names a sequencing facility typically gives its checksum manifests
+MANIFEST_NAMES = re.compile(r"(^|[._-])(md5|sha256)(sums?)?([._-].*)?$|\.(md5|sha256)$", re.IGNORECASE)
+
+OK, MISMATCH, MISSING, ERROR = "ok", "mismatch", "missing", "error"
+
+_BSD_LINE = re.compile(r"^(MD5|SHA256)\s*\((.+)\)\s*=\s*([0-9a-fA-F]+)$")
+
+
+@dataclass
+class ManifestEntry:
+    name: str      # as written in the manifest, relative to its folder
+    algo: str
+    digest: str
+
+
+@dataclass
+class VerifyResult:
+    name: str
+    path: str
+    algo: str
+    expected: str
+    actual: str | None
+    status: str
+    error: str = ""
+
+
+def algo_for_digest(digest: str) -> str | None:
+    return {32: "md5", 64: "sha256"}.get(len(digest))
+
+
+def is_manifest_name(name: str) -> bool:
+    return bool(MANIFEST_NAMES.search(name))
+
+
+def parse_manifest(text: str) -> list[ManifestEntry]:
+    """Entries of an ``md5sum``/``sha256sum`` (or BSD ``MD5 (x) = ...``) manifest.
+
+    The algorithm is taken from the digest length; comment lines and lines
+    that are not a checksum are skipped.
+    """
+    entries = []
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        bsd = _BSD_LINE.match(line)
+        if bsd:
+            digest, name = bsd.group(3), bsd.group(2)
+        else:
+            parts = line.split(None, 1)
+            if len(parts) != 2:
+                continue
+            digest, name = parts
+            # "*name" marks binary mode in GNU output
+            name = name[1:] if name.startswith("*") else name
+        algo = algo_for_digest(digest)
+        if algo is None or not all(c in "0123456789abcdefABCDEF" for c in digest):
+            continue
+        entries.append(ManifestEntry(name.strip(), algo, digest.lower()))
+    return entries
+
+
+class ChecksumCache:
+    """Digests already computed, keyed by (location, path, algorithm).
+
+    ``location`` is the host key for remote files and ``""`` for local
+    ones. An entry only counts while the file still has the size and
+    mtime it had when it was hashed.
+    """
+
+    def __init__(self, path: str = CHECKSUM_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS hashes (location TEXT NOT NULL, path TEXT NOT NULL, "
+                "algo TEXT NOT NULL, size INTEGER NOT NULL, mtime INTEGER NOT NULL, digest TEXT NOT NULL, "
+                "PRIMARY KEY (location, path, algo)) WITHOUT ROWID"
+            )
+            self._local.db = db
+        return db
+
+    def get(self, location: str, path: str, algo: str, size: int, mtime: float) -> str | None:
+        row = self._db().execute(
+            "SELECT digest FROM hashes WHERE location = ? AND path = ? AND algo = ? AND size = ? AND mtime = ?",
+            (location, path, algo, size, int(mtime)),
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row[0] if row else None
+
+    def put_many(self, location: str, algo: str, rows: list[tuple[str, int, float, str]]):
+        """Store ``(path, size, mtime, digest)`` rows."""
+        if not rows:
+            return
+        db = self._db()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO hashes (location, path, algo, size, mtime, digest) VALUES (?, ?, ?, ?, ?, ?)",
+                [(location, path, algo, size, int(mtime), digest) for path, size, mtime, digest in rows],
+            )
+
+
+def hash_local_file(path: str, algo: str, chunk: int = LOCAL_CHUNK,
+                    cancel_event: threading.Event | None = None) -> str | None:
+    """Digest of a local file read through ``mmap``, so no copy goes through Python.
+
+    None if ``cancel_event`` is set before the whole file is read.
+    """
+    digest = hashlib.new(algo)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, size, chunk):
+                    if cancel_event is not None and cancel_event.is_set():
+                        return None
+                    digest.update(view[offset:offset + chunk])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+def _feed_names(chan, paths: list[str]) -> threading.Thread:
+    """Write NUL-separated ``paths`` to the channel's stdin from a thread.
+
+    The output is read meanwhile, so a long list cannot stall on a full
+    channel window in either direction.
+    """
+    def send():
+        try:
+            chan.sendall(b"\0".join(p.encode("utf-8") for p in paths) + b"\0")
+            chan.shutdown_write()
+        except Exception:
+            pass
+
+    sender = threading.Thread(target=send, name="checksum-names", daemon=True)
+    sender.start()
+    return sender
+
+
+def _stat_remote(ssh_client, paths: list[str]) -> dict[str, tuple[int, float]]:
+    """``path -> (size, mtime)`` for the regular files among ``paths``, one exec."""
+    chan = ssh_client.open_exec_channel("xargs -0 stat -L --printf '%F\\t%s\\t%Y\\t%n\\0' -- 2>/dev/null")
+    try:
+        sender = _feed_names(chan, paths)
+        with chan.makefile("rb") as stream:
+            out = stream.read().decode("utf-8", errors="replace")
+        sender.join(timeout=5)
+    finally:
+        chan.close()
+    states = {}
+    for record in out.split("\0"):
+        parts = record.split("\t", 3)
+        if len(parts) != 4 or not parts[0].startswith("regular"):
+            continue
+        try:
+            states[parts[3]] = (int(parts[1]), float(parts[2]))
+        except ValueError:
+            continue
+    return states
+
+
+class IntegrityService:
+    """md5/sha256 of remote and local files, with a persistent cache.
+
+    Remote files are hashed on the server: the names go to one
+    ``xargs -P`` pipeline over a single exec channel, so at most
+    ``remote_parallel`` files are read at a time and only the digests
+    cross the network. Local files are hashed by a thread pool over
+    memory-mapped reads (``hashlib`` releases the GIL on large updates).
+    Both sides consult the cache first, so verifying an unchanged 30 GB
+    FASTQ a second time is free.
+    """
+
+    def __init__(self, ssh_client, host: str, cache: ChecksumCache | None = None,
+                 remote_parallel: int = REMOTE_PARALLEL, local_workers: int | None = None):
+        self.ssh_client = ssh_client
+        self.host = host
+        self.cache = cache or ChecksumCache()
+        self.remote_parallel = remote_parallel
+        self.local_workers = local_workers or min(8, os.cpu_count() or 2)
+
+    # ---- remote ----
+    def remote(self, paths: list[str], algo: str = "md5", on_result=None,
+               cancel_event: threading.Event | None = None) -> dict[str, str]:
+        """``path -> digest`` for remote files; missing or unreadable files are left out.
+
+        ``on_result(path, digest)`` is called as each digest arrives.
+        """
+        tool = ALGORITHMS[algo]
+        if not paths or (cancel_event is not None and cancel_event.is_set()):
+            return {}
+        states = _stat_remote(self.ssh_client, paths)
+        result: dict[str, str] = {}
+        todo = []
+        for path in paths:
+            state = states.get(path)
+            if state is None:
+                continue
+            cached = self.cache.get(self.host, path, algo, *state)
+            if cached is not None:
+                result[path] = cached
+                if on_result is not None:
+                    on_result(path, cached)
+            else:
+                todo.append(path)
+        if not todo:
+            return result
+
+        fresh = []
+        command = f"xargs -0 -P {int(self.remote_parallel)} -n 1 {tool} -- 2>/dev/null"
+        chan = self.ssh_client.open_exec_channel(command)
+        try:
+            sender = _feed_names(chan, todo)
+            # ExecStream polls, so a cancel is noticed even while a 30 GB file hashes
+            for kind, line in ExecStream(chan, command, cancel_event=cancel_event):
+                # names with a backslash or newline are escaped by md5sum; skip those
+                if kind != STDOUT or line.startswith("\\") or "  " not in line:
+                    continue
+                digest, path = line.split("  ", 1)
+                if path not in states:
+                    continue
+                digest = digest.lower()
+                result[path] = digest
+                fresh.append((path, *states[path], digest))
+                if on_result is not None:
+                    on_result(path, digest)
+            sender.join(timeout=5)
+        except ExecCancelled:
+            pass
+        finally:
+            chan.close()
+            self.cache.put_many(self.host, algo, fresh)
+        return result
+
+    def list_remote_files(self, remote_dir: str, cancel_event: threading.Event | None = None) -> list[str]:
+        """Regular files below ``remote_dir``, absolute, in one ``find``.
+
+        Raises ``ExecCancelled`` when ``cancel_event`` is set meanwhile.
+        """
+        out: list[str] = []
+        err: list[str] = []
+        stream = self.ssh_client.exec_stream(
+            f"find {shlex.quote(remote_dir)} -type f -print0", cancel_event=cancel_event, lines=False
+        )
+        for kind, text in stream:
+            (out if kind == STDOUT else err).append(text)
+        if stream.exit_code != 0 and not out:
+            raise OSError("".join(err).strip() or f"cannot list {remote_dir}")
+        return [p for p in "".join(out).split("\0") if p]
+
+    # ---- local ----
+    def local(self, paths: list[str], algo: str = "md5", on_result=None,
+              cancel_event: threading.Event | None = None) -> dict[str, str]:
+        """``path -> digest`` for local files, hashed in parallel; missing files are left out."""
+        result: dict[str, str] = {}
+        todo = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            cached = self.cache.get("", os.path.abspath(path), algo, st.st_size, st.st_mtime)
+            if cached is not None:
+                result[path] = cached
+                if on_result is not None:
+                    on_result(path, cached)
+            else:
+                todo.append((path, st.st_size, st.st_mtime))
+
+        def work(item):
+            path, size, mtime = item
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            try:
+                digest = hash_local_file(path, algo, cancel_event=cancel_event)
+            except OSError:
+                return None
+            return None if digest is None else (item, digest)
+
+        fresh = []
+        with ThreadPoolExecutor(max_workers=self.local_workers, thread_name_prefix="hash") as pool:
+            for done in pool.map(work, todo):
+                if done is None:
+                    continue
+                (path, size, mtime), digest = done
+                result[path] = digest
+                fresh.append((os.path.abspath(path), size, mtime, digest))
+                if on_result is not None:
+                    on_result(path, digest)
+        self.cache.put_many("", algo, fresh)
+        return result
+
+    # ---- manifests ----
+    def read_remote_manifest(self, remote_path: str) -> list[ManifestEntry]:
+        out, err, code = self.ssh_client.exec(f"cat -- {shlex.quote(remote_path)}")
+        if code != 0:
+            raise OSError(err.strip() or f"cannot read {remote_path}")
+        return parse_manifest(out)
+
+    def verify_remote(self, entries: list[ManifestEntry], base_dir: str, on_result=None,
+                      cancel_event: threading.Event | None = None) -> list[VerifyResult]:
+        """Check the server's copies of the manifest entries (relative to ``base_dir``)."""
+        paths = {e.name: posixpath.normpath(posixpath.join(base_dir, e.name)) for e in entries}
+        return self._verify(entries, paths, self.remote, on_result, cancel_event)
+
+    def verify_local(self, entries: list[ManifestEntry], base_dir: str, on_result=None,
+                     cancel_event: threading.Event | None = None) -> list[VerifyResult]:
+        """Check local copies, e.g. a downloaded delivery folder."""
+        paths = {e.name: os.path.normpath(os.path.join(base_dir, *e.name.split("/"))) for e in entries}
+        return self._verify(entries, paths, self.local, on_result, cancel_event)
+
+    def _verify(self, entries, paths, compute, on_result, cancel_event) -> list[VerifyResult]:
+        results: list[VerifyResult] = []
+
+        def settle(entry: ManifestEntry, path: str, actual: str | None, error: str = ""):
+            if actual is None:
+                status = ERROR if error else MISSING
+            else:
+                status = OK if actual == entry.digest else MISMATCH
+            result = VerifyResult(entry.name, path, entry.algo, entry.digest, actual, status, error)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+        for algo in sorted({e.algo for e in entries}):
+            pending: dict[str, list[ManifestEntry]] = {}
+            for entry in entries:
+                if entry.algo == algo:
+                    pending.setdefault(paths[entry.name], []).append(entry)
+
+            def report(path: str, digest: str):
+                for entry in pending.pop(path, []):
+                    settle(entry, path, digest)
+
+            error = ""
+            try:
+                compute(list(pending), algo, on_result=report, cancel_event=cancel_event)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            if cancel_event is not None and cancel_event.is_set():
+                error = error or "cancelled"
+            for path, left in pending.items():
+                for entry in left:
+                    settle(entry, path, None, error)
+        order = {entry.name: i for i, entry in enumerate(entries)}
+        results.sort(key=lambda r: order[r.name])
+        return results
@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable
+from bioflow.core.slurm import SlurmJob
+
+JOB_STORE_PATH = os.path.join(os.path.expanduser("~"), ".bioflow", "jobs.sqlite")
+
+# job ids looked up per query while recording state transitions
+LOOKUP_BATCH = 500
+
+QUERY_LIMIT = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    account TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    state TEXT NOT NULL,
+    partition TEXT NOT NULL,
+    nodes TEXT NOT NULL,
+    started REAL,
+    elapsed REAL,
+    exit_code TEXT NOT NULL,
+    ended REAL,
+    submitted REAL,
+    cpu_time REAL,
+    max_rss INTEGER,
+    alloc_cpus INTEGER,
+    plugin_id TEXT NOT NULL,
+    project TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (account, job_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS jobs_project ON jobs (project, submitted);
+CREATE INDEX IF NOT EXISTS jobs_plugin ON jobs (plugin_id, state, submitted);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, submitted);
+CREATE INDEX IF NOT EXISTS jobs_submitted ON jobs (submitted);
+CREATE INDEX IF NOT EXISTS jobs_ended ON jobs (account, ended);
+CREATE TABLE IF NOT EXISTS transitions (
+    account TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    at REAL NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (account, job_id, at, state)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync (
+    account TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+"""
+
+# same order as the SlurmJob fields
+_COLUMNS = (
+    "job_id, name, state, partition, nodes, started, elapsed, exit_code, ended, "
+    "submitted, cpu_time, max_rss, alloc_cpus, plugin_id, project"
+)
+
+# what BioFlow knows and Slurm does not (plugin, project) is never overwritten with nothing
+_UPSERT = f"""
+INSERT INTO jobs (account, {_COLUMNS}, updated)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (account, job_id) DO UPDATE SET
+    name = excluded.name, state = excluded.state, partition = excluded.partition,
+    nodes = excluded.nodes, started = coalesce(excluded.started, jobs.started),
+    elapsed = excluded.elapsed, exit_code = excluded.exit_code, ended = excluded.ended,
+    submitted = coalesce(excluded.submitted, jobs.submitted),
+    cpu_time = coalesce(excluded.cpu_time, jobs.cpu_time),
+    max_rss = coalesce(excluded.max_rss, jobs.max_rss),
+    alloc_cpus = coalesce(excluded.alloc_cpus, jobs.alloc_cpus),
+    plugin_id = CASE WHEN excluded.plugin_id != '' THEN excluded.plugin_id ELSE jobs.plugin_id END,
+    project = CASE WHEN excluded.project != '' THEN excluded.project ELSE jobs.project END,
+    updated = excluded.updated
+"""
+
+
+def _row(account: str, job: SlurmJob, now: float) -> tuple:
+    return (
+        account, job.job_id, job.name, job.state, job.partition, job.where, job.started, job.elapsed,
+        job.exit_code, job.ended, job.submitted, job.cpu_time, job.max_rss, job.alloc_cpus,
+        job.plugin_id, job.project, now,
+    )
+
+
+class JobStore:
+    """Local history of every Slurm job BioFlow submitted or saw, per account.
+
+    ``account`` is ``user@host``. Each poll's changes are written in one
+    transaction, with a row in ``transitions`` whenever a job's state
+    changed. Jobs are indexed by project, plugin, state and submit time,
+    so history queries never touch the cluster. One connection per thread,
+    WAL mode, so the job view reads while the poller writes.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._local.db = db
+        return db
+
+    def close(self):
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    # ---- writing ----
+    def record(self, account: str, jobs: Iterable[SlurmJob], now: float | None = None):
+        """Store what was seen of ``jobs`` and mark ``account`` as synced at ``now``."""
+        now = time.time() if now is None else now
+        jobs = list(jobs)
+        db = self._db()
+        with self._write_lock, db:
+            previous: dict[str, str] = {}
+            for i in range(0, len(jobs), LOOKUP_BATCH):
+                ids = [job.job_id for job in jobs[i:i + LOOKUP_BATCH]]
+                previous.update(db.execute(
+                    f"SELECT job_id, state FROM jobs WHERE account = ? AND job_id IN ({','.join('?' * len(ids))})",
+                    [account, *ids],
+                ))
+            db.executemany(_UPSERT, [_row(account, job, now) for job in jobs])
+            db.executemany(
+                "INSERT OR IGNORE INTO transitions (account, job_id, at, state) VALUES (?, ?, ?, ?)",
+                [(account, job.job_id, now, job.state) for job in jobs if previous.get(job.job_id) != job.state],
+            )
+            db.execute(
+                "INSERT INTO sync (account, synced_at) VALUES (?, ?) "
+                "ON CONFLICT (account) DO UPDATE SET synced_at = excluded.synced_at",
+                (account, now),
+            )
+
+    def record_submission(self, account: str, job_id: str, plugin_id: str = "", project: str = "",
+                          name: str = "", submitted: float | None = None):
+        """Remember which plugin run and project a job BioFlow submitted belongs to."""
+        submitted = time.time() if submitted is None else submitted
+        db = self._db()
+        with self._write_lock, db:
+            db.execute(
+                f"INSERT INTO jobs (account, {_COLUMNS}, updated) "
+                "VALUES (?, ?, ?, 'PENDING', '', '', NULL, NULL, '', NULL, ?, NULL, NULL, NULL, ?, ?, ?) "
+                "ON CONFLICT (account, job_id) DO UPDATE SET plugin_id = excluded.plugin_id, project = excluded.project",
+                (account, job_id, name, submitted, plugin_id, project, submitted),
+            )
+            db.execute(
+                "INSERT OR IGNORE INTO transitions (account, job_id, at, state) VALUES (?, ?, ?, 'SUBMITTED')",
+                (account, job_id, submitted),
+            )
+
+    # ---- reading ----
+    def synced_at(self, account: str) -> float | None:
+        row = self._db().execute("SELECT synced_at FROM sync WHERE account = ?", (account,)).fetchone()
+        return row[0] if row else None
+
+    def recent(self, account: str, since: float) -> list[SlurmJob]:
+        """Jobs of ``account`` still queued or running, or finished after ``since``."""
+        rows = self._db().execute(
+            f"SELECT {_COLUMNS} FROM jobs WHERE account = ? AND (ended IS NULL OR ended >= ?)",
+            (account, since),
+        ).fetchall()
+        return [SlurmJob(*row) for row in rows]
+
+    def jobs(self, account: str | None = None, project: str | None = None, plugin_id: str | None = None,
+             state: str | None = None, since: float | None = None, until: float | None = None,
+             limit: int = QUERY_LIMIT) -> list[SlurmJob]:
+        """Stored jobs by submit time, newest first, e.g. every failed run of a plugin this month."""
+        sql = f"SELECT {_COLUMNS} FROM jobs WHERE 1"
+        args: list = []
+        for column, value in (("account", account), ("project", project), ("plugin_id", plugin_id), ("state", state)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                args.append(value)
+        if since is not None:
+            sql += " AND submitted >= ?"
+            args.append(since)
+        if until is not None:
+            sql += " AND submitted < ?"
+            args.append(until)
+        sql += " ORDER BY submitted DESC LIMIT ?"
+        args.append(limit)
+        return [SlurmJob(*row) for row in self._db().execute(sql, args)]
+
+    def transitions(self, account: str, job_id: str) -> list[tuple[float, str]]:
+        """``(time, state)`` for every state change recorded for one job."""
+        return self._db().execute(
+            "SELECT at, state FROM transitions WHERE account = ? AND job_id = ? ORDER BY at",
+            (account, job_id),
+        ).fetchall()
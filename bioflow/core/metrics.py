@@ -0,0 +1,322 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+import re
+import threading
+import time
+from bioflow.core.ssh_client import SSHClient
+
+# One round-trip gathers every /proc source; "@name" lines delimit sections.
+SAMPLE_SCRIPT = (
+    "echo @uptime; cat /proc/uptime; "
+    "echo @loadavg; cat /proc/loadavg; "
+    "echo @stat; head -n 1 /proc/stat; "
+    "echo @meminfo; grep -E '^(MemTotal|MemAvailable):' /proc/meminfo; "
+    "echo @netdev; tail -n +3 /proc/net/dev; "
+    "echo @disk; df -P -k / 2>/dev/null | tail -n +2; "
+    "echo @end"
+)
+
+SAMPLE_COMMAND = f"LC_ALL=C sh -c \"{SAMPLE_SCRIPT}\""
+
+
+def sampler_command(interval: float) -> str:
+    """Remote loop that prints one sample every ``interval`` seconds until the channel closes."""
+    return f"LC_ALL=C sh -c \"while :; do {SAMPLE_SCRIPT}; sleep {interval:g}; done\""
+
+
+@dataclass
+class RawSample:
+    uptime: float | None = None
+    load1: float | None = None
+    cpu_total: int | None = None
+    cpu_idle: int | None = None
+    mem_total_kb: float | None = None
+    mem_avail_kb: float | None = None
+    net_rx: int | None = None
+    net_tx: int | None = None
+    disk_total_kb: float | None = None
+    disk_used_kb: float | None = None
+
+
+@dataclass
+class MetricsSnapshot:
+    timestamp: float
+    load1: float | None = None
+    cpu_percent: float | None = None
+    mem_percent: float | None = None
+    net_rx_rate: float | None = None
+    net_tx_rate: float | None = None
+    disk_percent: float | None = None
+
+
+def parse_sample(lines: Iterable[str]) -> RawSample:
+    sample = RawSample()
+    section = None
+    net_rx = net_tx = 0
+    has_net = False
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("@"):
+            section = line[1:]
+            continue
+        fields = line.split()
+        try:
+            if section == "uptime":
+                sample.uptime = float(fields[0])
+            elif section == "loadavg":
+                sample.load1 = float(fields[0])
+            elif section == "stat" and fields[0] == "cpu":
+                # user nice system idle iowait irq softirq steal; guest time
+                # is already included in user/nice.
+                ticks = [int(v) for v in fields[1:9]]
+                sample.cpu_total = sum(ticks)
+                sample.cpu_idle = ticks[3] + (ticks[4] if len(ticks) > 4 else 0)
+            elif section == "meminfo":
+                if fields[0] == "MemTotal:":
+                    sample.mem_total_kb = float(fields[1])
+                elif fields[0] == "MemAvailable:":
+                    sample.mem_avail_kb = float(fields[1])
+            elif section == "netdev" and ":" in line:
+                iface, data = line.split(":", 1)
+                if iface.strip() == "lo":
+                    continue
+                values = data.split()
+                if len(values) >= 9:
+                    net_rx += int(values[0])
+                    net_tx += int(values[8])
+                    has_net = True
+            elif section == "disk" and len(fields) >= 4:
+                sample.disk_total_kb = float(fields[1])
+                sample.disk_used_kb = float(fields[2])
+        except (ValueError, IndexError):
+            continue
+    if has_net:
+        sample.net_rx = net_rx
+        sample.net_tx = net_tx
+    return sample
+
+
+class MetricsCollector:
+    """Turn consecutive raw samples into snapshots with rates.
+
+    Rates use the remote ``/proc/uptime`` delta rather than local wall time,
+    so network jitter between samples does not skew them.
+    """
+
+    def __init__(self):
+        self._previous: RawSample | None = None
+
+    def reset(self):
+        self._previous = None
+
+    def update(self, sample: RawSample) -> MetricsSnapshot:
+        snap = MetricsSnapshot(timestamp=time.time(), load1=sample.load1)
+        if sample.mem_total_kb and sample.mem_avail_kb is not None:
+            used_kb = sample.mem_total_kb - sample.mem_avail_kb
+            snap.mem_percent = used_kb / sample.mem_total_kb * 100.0
+        if sample.disk_total_kb and sample.disk_used_kb is not None:
+            snap.disk_percent = sample.disk_used_kb / sample.disk_total_kb * 100.0
+        prev = self._previous
+        if prev is not None:
+            if None not in (sample.cpu_total, sample.cpu_idle, prev.cpu_total, prev.cpu_idle):
+                d_total = sample.cpu_total - prev.cpu_total
+                d_idle = sample.cpu_idle - prev.cpu_idle
+                if d_total > 0:
+                    snap.cpu_percent = max(0.0, min(100.0, (d_total - d_idle) / d_total * 100.0))
+            if sample.uptime is not None and prev.uptime is not None:
+                elapsed = sample.uptime - prev.uptime
+                if elapsed > 0:
+                    if sample.net_rx is not None and prev.net_rx is not None:
+                        snap.net_rx_rate = max(sample.net_rx - prev.net_rx, 0) / elapsed
+                    if sample.net_tx is not None and prev.net_tx is not None:
+                        snap.net_tx_rate = max(sample.net_tx - prev.net_tx, 0) / elapsed
+        self._previous = sample
+        return snap
+
+
+class RemoteSampler:
+    """Collect metrics from one host over an ``SSHClient``.
+
+    ``collect_once`` costs one exec round-trip per call. ``stream`` keeps a
+    single long-lived channel open on which a remote loop prints a sample
+    every ``interval`` seconds, so polling costs no channel setup at all.
+    """
+
+    def __init__(self, ssh_client, interval: float = 1.0):
+        self.ssh_client = ssh_client
+        self.interval = interval
+        self.collector = MetricsCollector()
+
+    def collect_once(self, timeout: float | None = None) -> MetricsSnapshot:
+        out, _, _ = self.ssh_client.exec(SAMPLE_COMMAND, timeout=timeout)
+        return self.collector.update(parse_sample(out.splitlines()))
+
+    def stream(self, cancel_event: threading.Event | None = None) -> Iterator[MetricsSnapshot]:
+        self.collector.reset()
+        lines: list[str] = []
+        with self.ssh_client.exec_stream(sampler_command(self.interval), cancel_event=cancel_event) as stream:
+            for name, line in stream:
+                if name != "stdout":
+                    continue
+                if line == "@end":
+                    yield self.collector.update(parse_sample(lines))
+                    lines = []
+                else:
+                    lines.append(line)
+
+
+HOSTLIST_RANGE = re.compile(r"^(.*)\[([^\]]+)\](.*)$")
+
+
+def expand_hostlist(text: str) -> list[str]:
+    """Expand a node list such as ``"login1, node[01-04,07]"`` into host names.
+
+    Entries are separated by commas or whitespace outside brackets; one
+    Slurm-style bracket range per entry is supported.
+    """
+    entries = []
+    depth = 0
+    current = ""
+    for ch in text:
+        if ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth = max(depth - 1, 0)
+        if depth == 0 and (ch == "," or ch.isspace()):
+            if current:
+                entries.append(current)
+            current = ""
+        else:
+            current += ch
+    if current:
+        entries.append(current)
+
+    hosts: list[str] = []
+    for entry in entries:
+        m = HOSTLIST_RANGE.match(entry)
+        if not m:
+            hosts.append(entry)
+            continue
+        prefix, ranges, suffix = m.groups()
+        for part in ranges.split(","):
+            if "-" in part:
+                lo, hi = part.split("-", 1)
+                width = len(lo)
+                try:
+                    for i in range(int(lo), int(hi) + 1):
+                        hosts.append(f"{prefix}{i:0{width}d}{suffix}")
+                except ValueError:
+                    hosts.append(entry)
+            elif part:
+                hosts.append(f"{prefix}{part}{suffix}")
+    # keep order, drop duplicates
+    return list(dict.fromkeys(hosts))
+
+
+@dataclass
+class NodeStatus:
+    node: str
+    snapshot: MetricsSnapshot | None = None
+    error: str | None = None
+    last_ok: float | None = None
+
+    def is_stale(self, stale_after: float, now: float | None = None) -> bool:
+        if self.last_ok is None:
+            return True
+        return (now if now is not None else time.time()) - self.last_ok > stale_after
+
+
+class ClusterCollector:
+    """Poll metrics from many nodes in parallel over pooled connections.
+
+    Each node is reached through a tunnel over the gateway (login node)
+    transport and keeps its own pooled connection between polls, so a poll
+    costs one channel per node rather than one handshake. At most
+    ``max_workers`` nodes are sampled at once and every node is bounded by
+    ``timeout``; a node whose last good sample is older than
+    ``stale_after`` is reported as stale but keeps its last snapshot.
+    """
+
+    def __init__(
+        self,
+        gateway: SSHClient,
+        nodes: Iterable[str] = (),
+        max_workers: int = 8,
+        timeout: float = 5.0,
+        stale_after: float = 15.0,
+    ):
+        self.gateway = gateway
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cluster-poll")
+        self._lock = threading.Lock()
+        self._clients: dict[str, SSHClient] = {}
+        self._collectors: dict[str, MetricsCollector] = {}
+        self._status: dict[str, NodeStatus] = {}
+        self.nodes: list[str] = []
+        self.set_nodes(nodes)
+
+    def set_nodes(self, nodes: Iterable[str]):
+        nodes = list(dict.fromkeys(nodes))
+        with self._lock:
+            dropped = [n for n in self._clients if n not in nodes]
+            self.nodes = nodes
+            for node in nodes:
+                self._status.setdefault(node, NodeStatus(node))
+                self._collectors.setdefault(node, MetricsCollector())
+            for node in list(self._status):
+                if node not in nodes:
+                    del self._status[node]
+                    self._collectors.pop(node, None)
+            clients = [self._clients.pop(n) for n in dropped]
+        for client in clients:
+            client.close()
+
+    def poll(self) -> list[NodeStatus]:
+        nodes = list(self.nodes)
+        futures = [self._executor.submit(self._poll_node, node) for node in nodes]
+        for future in futures:
+            future.result()
+        with self._lock:
+            return [self._status[n] for n in nodes if n in self._status]
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+    def _client_for(self, node: str) -> SSHClient:
+        with self._lock:
+            client = self._clients.get(node)
+            if client is None:
+                client = self._clients[node] = SSHClient(self.gateway.pool)
+        if not client.client:
+            client.connect_via(self.gateway, node, connect_timeout=self.timeout)
+        return client
+
+    def _poll_node(self, node: str):
+        try:
+            client = self._client_for(node)
+            out, _, _ = client.exec(SAMPLE_COMMAND, timeout=self.timeout)
+            with self._lock:
+                collector = self._collectors.get(node)
+            if collector is None:
+                return
+            snap = collector.update(parse_sample(out.splitlines()))
+            with self._lock:
+                status = self._status.get(node)
+                if status is not None:
+                    status.snapshot = snap
+                    status.error = None
+                    status.last_ok = snap.timestamp
+        except Exception as e:
+            with self._lock:
+                status = self._status.get(node)
+                if status is not None:
+                    status.error = str(e) or type(e).__name__
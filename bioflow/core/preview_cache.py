@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+PREVIEW_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".bioflow_cache", "previews")
+PREVIEW_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+
+
+class PreviewCache:
+    """Local copies of opened remote files, keyed by (host, path, size, mtime).
+
+    Each copy lives in its own directory under its original basename, so
+    same-named files from different remote folders never collide and the
+    system opener still sees the real extension. The index is a small JSON
+    file next to the copies; least recently used copies are evicted once
+    the byte budget is exceeded.
+    """
+
+    def __init__(self, root: str = PREVIEW_CACHE_DIR, max_bytes: int = PREVIEW_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(root, "index.json")
+        # slot -> {"host", "path", "size", "mtime", "file", "last_used"}
+        self._entries: dict[str, dict] = self._load()
+
+    @staticmethod
+    def _slot(host: str, remote_path: str) -> str:
+        return hashlib.sha1(f"{host}\0{remote_path}".encode("utf-8")).hexdigest()[:20]
+
+    def local_path(self, host: str, remote_path: str) -> str:
+        """Where the copy of ``remote_path`` is (or will be) stored."""
+        name = remote_path.rstrip("/").rsplit("/", 1)[-1] or "file"
+        return os.path.join(self.root, self._slot(host, remote_path), name)
+
+    def lookup(self, host: str, remote_path: str, size: int, mtime: float) -> str | None:
+        """Path of a valid cached copy, or None (counted as a miss)."""
+        slot = self._slot(host, remote_path)
+        with self._lock:
+            entry = self._entries.get(slot)
+            valid = (
+                entry is not None
+                and entry["size"] == size
+                and int(entry["mtime"]) == int(mtime)
+                and os.path.exists(entry["file"])
+                and os.path.getsize(entry["file"]) == size
+            )
+            if not valid:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry["last_used"] = time.time()
+            self._save_locked()
+            return entry["file"]
+
+    def commit(self, host: str, remote_path: str, size: int, mtime: float, local_file: str):
+        """Record a finished download and evict old copies beyond the budget."""
+        slot = self._slot(host, remote_path)
+        with self._lock:
+            self._entries[slot] = {
+                "host": host,
+                "path": remote_path,
+                "size": size,
+                "mtime": mtime,
+                "file": local_file,
+                "last_used": time.time(),
+            }
+            self._evict_locked(keep=slot)
+            self._save_locked()
+
+    def clear(self):
+        with self._lock:
+            for slot in list(self._entries):
+                self._remove_locked(slot)
+            self._save_locked()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "files": len(self._entries),
+                "bytes": sum(e["size"] for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+    def _evict_locked(self, keep: str):
+        total = sum(e["size"] for e in self._entries.values())
+        for slot, entry in sorted(self._entries.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if slot == keep:
+                continue
+            total -= entry["size"]
+            self._remove_locked(slot)
+            self.evictions += 1
+
+    def _remove_locked(self, slot: str):
+        self._entries.pop(slot, None)
+        shutil.rmtree(os.path.join(self.root, slot), ignore_errors=True)
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {slot: e for slot, e in data.items() if isinstance(e, dict) and os.path.exists(e.get("file", ""))}
+
+    def _save_locked(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self._index_path)
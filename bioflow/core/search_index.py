@@ -0,0 +1,296 @@
+from dataclasses import dataclass
+import os
+import posixpath
+import shlex
+import sqlite3
+import threading
+import time
+from bioflow.core.ssh_client import STDOUT
+
+SEARCH_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".bioflow", "search_index.sqlite")
+
+# rows written per transaction while a find stream is consumed
+INDEX_BATCH = 5000
+
+SEARCH_LIMIT = 1000
+
+# %P is relative to the root; NUL-terminated so odd file names survive
+FIND_FORMAT = "%y\\t%s\\t%T@\\t%P\\0"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    root TEXT NOT NULL,
+    indexed_at REAL,
+    scan INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (host, root)
+);
+CREATE TABLE IF NOT EXISTS files (
+    root_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    lname TEXT NOT NULL,
+    rname TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    is_dir INTEGER NOT NULL,
+    scan INTEGER NOT NULL,
+    PRIMARY KEY (root_id, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_lname ON files (root_id, lname);
+CREATE INDEX IF NOT EXISTS files_rname ON files (root_id, rname);
+"""
+
+_UPSERT = """
+INSERT INTO files (root_id, path, lname, rname, size, mtime, is_dir, scan)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (root_id, path) DO UPDATE SET
+    size = excluded.size, mtime = excluded.mtime, is_dir = excluded.is_dir, scan = excluded.scan
+"""
+
+
+@dataclass(slots=True)
+class SearchHit:
+    path: str  # absolute remote path
+    size: int
+    mtime: float
+    is_dir: bool
+
+
+@dataclass
+class RootInfo:
+    host: str
+    root: str
+    files: int
+    indexed_at: float | None
+
+
+def _prefix_range(prefix: str) -> tuple[str, str]:
+    """``(low, high)`` bounds of every string starting with ``prefix``."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _wildcards(text: str) -> bool:
+    return any(ch in text for ch in "*?[")
+
+
+def _norm_root(root: str) -> str:
+    return posixpath.normpath(root) if root else root
+
+
+class RemoteSearchIndex:
+    """Local SQLite index of remote project trees, for instant name search.
+
+    Each (host, root) is filled from one streamed ``find -printf`` and
+    refreshed the same way: rows are upserted with the number of the scan
+    that saw them, and rows an earlier scan left behind are dropped at the
+    end, so a refresh only rewrites what changed on disk plus a scan
+    counter. A refresh can be limited to a subtree.
+
+    Names are stored lower-cased and also reversed, both indexed, so the
+    common ``*.bam`` (suffix) and ``sample_12*`` (prefix) globs are index
+    range scans; other globs and substrings scan one root's rows and stop
+    at the result limit. Searches are case-insensitive, like the browser
+    filter. Every thread gets its own connection; the database runs in WAL
+    mode so searches keep working while a refresh writes.
+    """
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._local.db = db
+        return db
+
+    def close(self):
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    # ---- roots ----
+    def _root_id(self, host: str, root: str, create: bool = False) -> int | None:
+        db = self._db()
+        row = db.execute("SELECT id FROM roots WHERE host = ? AND root = ?", (host, root)).fetchone()
+        if row is None and create:
+            with db:
+                cur = db.execute("INSERT INTO roots (host, root) VALUES (?, ?)", (host, root))
+            return cur.lastrowid
+        return row[0] if row else None
+
+    def roots(self, host: str) -> list[RootInfo]:
+        db = self._db()
+        rows = db.execute(
+            "SELECT r.root, r.indexed_at, (SELECT count(*) FROM files f WHERE f.root_id = r.id) "
+            "FROM roots r WHERE r.host = ? ORDER BY r.root",
+            (host,),
+        ).fetchall()
+        return [RootInfo(host, root, count, indexed_at) for root, indexed_at, count in rows]
+
+    def find_root(self, host: str, path: str) -> str | None:
+        """The indexed root that contains ``path`` (deepest first), if any."""
+        path = _norm_root(path)
+        best = None
+        for info in self.roots(host):
+            if path == info.root or path.startswith(info.root.rstrip("/") + "/"):
+                if best is None or len(info.root) > len(best):
+                    best = info.root
+        return best
+
+    def root_info(self, host: str, root: str) -> RootInfo | None:
+        root = _norm_root(root)
+        return next((info for info in self.roots(host) if info.root == root), None)
+
+    def drop_root(self, host: str, root: str):
+        root_id = self._root_id(host, _norm_root(root))
+        if root_id is None:
+            return
+        db = self._db()
+        with self._write_lock, db:
+            db.execute("DELETE FROM files WHERE root_id = ?", (root_id,))
+            db.execute("DELETE FROM roots WHERE id = ?", (root_id,))
+
+    # ---- refresh ----
+    def refresh(self, ssh_client, host: str, root: str, subtree: str | None = None,
+                cancel_event: threading.Event | None = None, on_progress=None) -> int:
+        """Re-read ``root`` (or only ``subtree``, relative to it) with one ``find``.
+
+        Returns the number of entries seen. ``on_progress(count)`` is called
+        after every committed batch. A cancelled refresh keeps what it
+        wrote but removes nothing.
+        """
+        root = _norm_root(root)
+        subtree = posixpath.normpath(subtree).strip("/") if subtree else ""
+        if subtree in (".", ""):
+            subtree = ""
+        start = posixpath.join(root, subtree) if subtree else root
+        root_id = self._root_id(host, root, create=True)
+        db = self._db()
+        with self._write_lock:
+            scan = db.execute("SELECT scan FROM roots WHERE id = ?", (root_id,)).fetchone()[0] + 1
+            with db:
+                db.execute("UPDATE roots SET scan = ? WHERE id = ?", (scan, root_id))
+            # an unreadable folder deep in the tree makes find exit non-zero;
+            # everything it could read is still worth keeping
+            command = f"find {shlex.quote(start)} -mindepth 1 -printf '{FIND_FORMAT}' 2>/dev/null"
+            stream = ssh_client.exec_stream(command, cancel_event=cancel_event, lines=False)
+            prefix = subtree + "/" if subtree else ""
+            count = 0
+            batch: list[tuple] = []
+            pending = ""
+            with stream:
+                for kind, text in stream:
+                    if kind != STDOUT:
+                        continue
+                    records = (pending + text).split("\0")
+                    pending = records.pop()
+                    for record in records:
+                        row = self._parse(root_id, scan, prefix, record)
+                        if row is not None:
+                            batch.append(row)
+                    if len(batch) >= INDEX_BATCH:
+                        count += self._write(batch)
+                        batch = []
+                        if on_progress is not None:
+                            on_progress(count)
+            if pending:
+                row = self._parse(root_id, scan, prefix, pending)
+                if row is not None:
+                    batch.append(row)
+            count += self._write(batch)
+            if stream.exit_code not in (0, 1) and count == 0:
+                raise OSError(f"cannot index {start} (find exited with {stream.exit_code})")
+            with db:
+                if subtree:
+                    low, high = _prefix_range(prefix)
+                    db.execute(
+                        "DELETE FROM files WHERE root_id = ? AND scan < ? AND path >= ? AND path < ?",
+                        (root_id, scan, low, high),
+                    )
+                else:
+                    db.execute("DELETE FROM files WHERE root_id = ? AND scan < ?", (root_id, scan))
+                    db.execute("UPDATE roots SET indexed_at = ? WHERE id = ?", (time.time(), root_id))
+        if on_progress is not None:
+            on_progress(count)
+        return count
+
+    @staticmethod
+    def _parse(root_id: int, scan: int, prefix: str, record: str) -> tuple | None:
+        parts = record.split("\t", 3)
+        if len(parts) != 4 or not parts[3]:
+            return None
+        kind, size, mtime, rel = parts
+        try:
+            size, mtime = int(size), float(mtime)
+        except ValueError:
+            return None
+        name = rel.rsplit("/", 1)[-1].lower()
+        return (root_id, prefix + rel, name, name[::-1], size, mtime, int(kind == "d"), scan)
+
+    def _write(self, batch: list[tuple]) -> int:
+        if batch:
+            db = self._db()
+            with db:
+                db.executemany(_UPSERT, batch)
+        return len(batch)
+
+    # ---- search ----
+    def search(self, host: str, root: str, query: str, limit: int = SEARCH_LIMIT,
+               within: str | None = None) -> list[SearchHit]:
+        """Entries of an indexed ``root`` whose name matches ``query``.
+
+        ``query`` is a glob when it contains ``* ? [`` and a substring
+        otherwise; a query with a ``/`` is matched against the path relative
+        to the root instead of the name. ``within`` limits the search to one
+        folder below the root (an absolute remote path).
+        """
+        root = _norm_root(root)
+        query = query.strip().lower()
+        root_id = self._root_id(host, root)
+        if root_id is None or not query:
+            return []
+        where, params = ["root_id = ?"], [root_id]
+        if within:
+            rel = posixpath.relpath(_norm_root(within), root)
+            if rel.startswith(".."):
+                return []
+            if rel != ".":
+                where.append("path >= ? AND path < ?")
+                params += _prefix_range(rel + "/")
+
+        if "/" in query:
+            where.append("lower(path) GLOB ?" if _wildcards(query) else "instr(lower(path), ?) > 0")
+            params.append(query)
+        elif not _wildcards(query):
+            where.append("instr(lname, ?) > 0")
+            params.append(query)
+        elif len(query) > 1 and query[0] == "*" and not _wildcards(query[1:]):
+            # *.bam: a range over the reversed names
+            where.append("rname >= ? AND rname < ?")
+            params += _prefix_range(query[1:][::-1])
+        else:
+            head = query
+            for i, ch in enumerate(query):
+                if ch in "*?[":
+                    head = query[:i]
+                    break
+            if head:
+                # sample_1*.bam: narrow to the literal prefix first
+                where.append("lname >= ? AND lname < ?")
+                params += _prefix_range(head)
+            where.append("lname GLOB ?")
+            params.append(query)
+
+        sql = f"SELECT path, size, mtime, is_dir FROM files WHERE {' AND '.join(where)} LIMIT ?"
+        rows = self._db().execute(sql, (*params, int(limit))).fetchall()
+        return [SearchHit(posixpath.join(root, path), size, mtime, bool(is_dir)) for path, size, mtime, is_dir in rows]
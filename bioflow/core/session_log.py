@@ -0,0 +1,502 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+import codecs
+import datetime
+import os
+import queue
+import re
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+SESSION_DIR = os.path.join(os.path.expanduser("~"), ".bioflow", "sessions")
+
+# raw bytes collected before a chunk is compressed and appended...
+CHUNK_BYTES = 256 * 1024
+# ...or seconds after its first record, so an audit trail survives a crash
+FLUSH_INTERVAL = 5.0
+# output replayed before the seek target, so the screen is rebuilt from recent history only
+REPLAY_CONTEXT = 256 * 1024
+# bits of trigram filter per distinct trigram in a chunk (false positives ~22% per trigram)
+FILTER_BITS_PER_TRIGRAM = 4
+
+SEARCH_LIMIT = 500
+
+# record kinds
+OUTPUT = b"o"
+RESIZE = b"r"
+
+_CLOSE = object()
+
+# chunk header: magic, compressed length, raw length, first and last record time
+_CHUNK = struct.Struct("<4sIIdd")
+_CHUNK_MAGIC = b"BFS1"
+# record header inside a chunk: ms since the chunk started, kind, payload length
+_RECORD = struct.Struct("<IcI")
+
+# escape sequences and carriage returns, dropped before indexing and searching
+_CONTROL = re.compile(
+    rb"\x1b\[[0-?]*[ -/]*[@-~]|\x1b[\]P_^][^\x07\x1b]*(?:\x07|\x1b\\)?|\x1b[()][0-9A-Za-z]|\x1b[@-Z\\-~]|[\r\x00-\x08\x0b-\x1f\x7f]"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    user TEXT NOT NULL,
+    started REAL NOT NULL,
+    ended REAL,
+    path TEXT NOT NULL,
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions (started);
+CREATE TABLE IF NOT EXISTS chunks (
+    session_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    raw_length INTEGER NOT NULL,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    cols INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    filter BLOB NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS chunks_start ON chunks (start);
+"""
+
+
+@dataclass
+class SessionInfo:
+    id: int
+    host: str
+    user: str
+    started: float
+    ended: float | None
+    path: str
+    bytes: int
+
+
+@dataclass(slots=True)
+class ChunkInfo:
+    seq: int
+    offset: int
+    length: int
+    raw_length: int
+    start: float
+    end: float
+    cols: int
+    rows: int
+
+
+@dataclass(slots=True)
+class SessionMatch:
+    session: SessionInfo
+    time: float
+    line: str
+
+
+def strip_controls(data: bytes) -> bytes:
+    """Terminal output as plain text: escape sequences and control characters removed."""
+    return _CONTROL.sub(b"", data)
+
+
+def fold_case(text: bytes) -> bytes:
+    """UTF-8 text case-folded the way ``str.casefold`` does, so "Ä" and "ä" index alike."""
+    return text.decode("utf-8", errors="replace").casefold().encode("utf-8")
+
+
+def _trigram_hashes(text: bytes, bits: int) -> np.ndarray:
+    """Distinct trigram positions in a filter of ``2 ** bits`` bits."""
+    a = np.frombuffer(text, dtype=np.uint8).astype(np.uint32)
+    grams = (a[:-2] << 16) | (a[1:-1] << 8) | a[2:]
+    # multiplicative hashing; the top bits are the best mixed
+    return np.unique((grams * np.uint32(2654435761)) >> np.uint32(32 - bits))
+
+
+def build_filter(text: bytes) -> bytes:
+    """Trigram filter of case-folded plain text: one bit per hashed trigram."""
+    if len(text) < 3:
+        return b""
+    distinct = len(_trigram_hashes(text, 24))
+    bits = max(9, min(24, (distinct * FILTER_BITS_PER_TRIGRAM - 1).bit_length()))
+    field = np.zeros(1 << bits, dtype=bool)
+    field[_trigram_hashes(text, bits)] = True
+    return np.packbits(field, bitorder="little").tobytes()
+
+
+def filter_may_contain(filter_bytes: bytes, needle: bytes) -> bool:
+    """False only if ``needle`` (case-folded, 3 bytes or more) is certainly absent."""
+    if len(needle) < 3:
+        return True
+    if not filter_bytes:
+        return False
+    bits = (len(filter_bytes) * 8).bit_length() - 1
+    for h in _trigram_hashes(needle, bits).tolist():
+        if not filter_bytes[h >> 3] & (1 << (h & 7)):
+            return False
+    return True
+
+
+def _pack_records(records: list[tuple[float, bytes, bytes]], start: float) -> bytes:
+    parts = []
+    for t, kind, payload in records:
+        parts.append(_RECORD.pack(int((t - start) * 1000), kind, len(payload)))
+        parts.append(payload)
+    return b"".join(parts)
+
+
+def _unpack_records(raw: bytes, start: float) -> list[tuple[float, bytes, bytes]]:
+    out = []
+    pos, n = 0, len(raw)
+    size = _RECORD.size
+    while pos + size <= n:
+        ms, kind, length = _RECORD.unpack_from(raw, pos)
+        pos += size
+        out.append((start + ms / 1000, kind, raw[pos:pos + length]))
+        pos += length
+    return out
+
+
+class SessionCatalog:
+    """Index of recorded terminal sessions, their chunks and trigram filters.
+
+    The session data itself lives in append-only files next to the
+    catalog: zlib-compressed chunks of timestamped records, each behind a
+    small uncompressed header so a file can be walked without the
+    catalog. The catalog keeps every chunk's offset, time range, terminal
+    size and a trigram filter of its plain text, so a seek only
+    decompresses the chunks around the target and a search only those
+    whose filter admits the query. One connection per thread, WAL mode.
+    """
+
+    def __init__(self, directory: str = SESSION_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, "catalog.sqlite")
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            os.makedirs(self.directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._local.db = db
+        return db
+
+    def close(self):
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    # ---- writing ----
+    def add_session(self, host: str, user: str, started: float) -> SessionInfo:
+        day = datetime.datetime.fromtimestamp(started)
+        folder = os.path.join(self.directory, day.strftime("%Y-%m-%d"))
+        os.makedirs(folder, exist_ok=True)
+        safe_host = re.sub(r"[^A-Za-z0-9._-]", "_", host) or "host"
+        db = self._db()
+        with self._write_lock, db:
+            cur = db.execute(
+                "INSERT INTO sessions (host, user, started, path) VALUES (?, ?, ?, '')",
+                (host, user, started),
+            )
+            session_id = cur.lastrowid
+            path = os.path.join(folder, f"{day.strftime('%H%M%S')}-{safe_host}-{session_id}.bfsession")
+            db.execute("UPDATE sessions SET path = ? WHERE id = ?", (path, session_id))
+        return SessionInfo(session_id, host, user, started, None, path, 0)
+
+    def add_chunk(self, session_id: int, chunk: ChunkInfo, filter_bytes: bytes):
+        db = self._db()
+        with self._write_lock, db:
+            db.execute(
+                "INSERT INTO chunks (session_id, seq, offset, length, raw_length, start, end, cols, rows, filter) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, chunk.seq, chunk.offset, chunk.length, chunk.raw_length,
+                 chunk.start, chunk.end, chunk.cols, chunk.rows, filter_bytes),
+            )
+            db.execute(
+                "UPDATE sessions SET ended = ?, bytes = bytes + ? WHERE id = ?",
+                (chunk.end, chunk.raw_length, session_id),
+            )
+
+    def end_session(self, session_id: int, ended: float):
+        db = self._db()
+        with self._write_lock, db:
+            db.execute("UPDATE sessions SET ended = max(coalesce(ended, 0), ?) WHERE id = ?", (ended, session_id))
+
+    def drop_session(self, session_id: int):
+        info = self.session(session_id)
+        db = self._db()
+        with self._write_lock, db:
+            db.execute("DELETE FROM chunks WHERE session_id = ?", (session_id,))
+            db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        if info is not None:
+            try:
+                os.remove(info.path)
+            except OSError as e:
+                print("session log error:", e)
+
+    # ---- reading ----
+    def sessions(self, host: str | None = None, since: float | None = None,
+                 until: float | None = None) -> list[SessionInfo]:
+        """Sessions overlapping ``[since, until]``, newest first."""
+        sql = "SELECT id, host, user, started, ended, path, bytes FROM sessions WHERE 1"
+        args: list = []
+        if host:
+            sql += " AND host = ?"
+            args.append(host)
+        if since is not None:
+            sql += " AND coalesce(ended, started) >= ?"
+            args.append(since)
+        if until is not None:
+            sql += " AND started <= ?"
+            args.append(until)
+        rows = self._db().execute(sql + " ORDER BY started DESC", args).fetchall()
+        return [SessionInfo(*row) for row in rows]
+
+    def session(self, session_id: int) -> SessionInfo | None:
+        row = self._db().execute(
+            "SELECT id, host, user, started, ended, path, bytes FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        return SessionInfo(*row) if row else None
+
+    def hosts(self) -> list[str]:
+        return [row[0] for row in self._db().execute("SELECT DISTINCT host FROM sessions ORDER BY host")]
+
+    def chunks(self, session_id: int) -> list[ChunkInfo]:
+        rows = self._db().execute(
+            "SELECT seq, offset, length, raw_length, start, end, cols, rows FROM chunks "
+            "WHERE session_id = ? ORDER BY seq",
+            (session_id,),
+        ).fetchall()
+        return [ChunkInfo(*row) for row in rows]
+
+    def search(self, query: str, host: str | None = None, since: float | None = None,
+               until: float | None = None, limit: int = SEARCH_LIMIT,
+               cancel_event: threading.Event | None = None, on_match=None) -> list[SessionMatch]:
+        """Lines of recorded output containing ``query``, case-insensitively, newest session first.
+
+        Chunks whose trigram filter rules the query out are never read.
+        ``on_match(match)`` is called as matches are found.
+        """
+        needle = query.casefold()
+        if not needle:
+            return []
+        needle_bytes = needle.encode("utf-8")
+        matches: list[SessionMatch] = []
+        db = self._db()
+        for session in self.sessions(host, since, until):
+            rows = db.execute(
+                "SELECT seq, offset, length, raw_length, start, end, cols, rows, filter FROM chunks "
+                "WHERE session_id = ? ORDER BY seq",
+                (session.id,),
+            ).fetchall()
+            candidates = [ChunkInfo(*row[:8]) for row in rows if filter_may_contain(row[8], needle_bytes)]
+            if not candidates:
+                continue
+            try:
+                with open(session.path, "rb") as f:
+                    for chunk in candidates:
+                        if cancel_event is not None and cancel_event.is_set():
+                            return matches
+                        for match in _search_chunk(session, read_chunk(f, chunk), needle):
+                            matches.append(match)
+                            if on_match is not None:
+                                on_match(match)
+                            if len(matches) >= limit:
+                                return matches
+            except OSError as e:
+                print("session log error:", e)
+        return matches
+
+
+def read_chunk(f, chunk: ChunkInfo) -> list[tuple[float, bytes, bytes]]:
+    """Records of one chunk: ``(time, kind, payload)``."""
+    f.seek(chunk.offset)
+    header = f.read(_CHUNK.size)
+    magic, length, raw_length, start, _end = _CHUNK.unpack(header)
+    if magic != _CHUNK_MAGIC:
+        raise ValueError(f"bad chunk header at offset {chunk.offset}")
+    return _unpack_records(zlib.decompress(f.read(length)), start)
+
+
+def _search_chunk(session: SessionInfo, records, needle: str):
+    # plain text of the chunk, with where each record starts in it; the
+    # incremental decoder keeps characters split between records whole
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    texts, starts, times = [], [], []
+    pos = 0
+    for t, kind, payload in records:
+        if kind != OUTPUT:
+            continue
+        text = decoder.decode(strip_controls(payload))
+        starts.append(pos)
+        times.append(t)
+        texts.append(text)
+        pos += len(text)
+    text = "".join(texts) + decoder.decode(b"", final=True)
+    for found in _find_lines(text, needle):
+        line_start = text.rfind("\n", 0, found) + 1
+        line_end = text.find("\n", found)
+        if line_end < 0:
+            line_end = len(text)
+        line = text[line_start:line_end].strip()
+        yield SessionMatch(session, times[bisect_right(starts, found) - 1], line)
+
+
+def _find_lines(text: str, needle: str):
+    """Where ``needle`` (case-folded) first occurs in each line of ``text`` that has it."""
+    folded = text.casefold()
+    if len(folded) == len(text):
+        found = folded.find(needle)
+        while found >= 0:
+            yield found
+            # one hit per line is enough
+            line_end = text.find("\n", found)
+            if line_end < 0:
+                return
+            found = folded.find(needle, line_end)
+        return
+    # some character folds to several (ß -> ss), so positions shift; go line by line
+    line_start = 0
+    for line in text.split("\n"):
+        if needle in line.casefold():
+            yield line_start
+        line_start += len(line) + 1
+
+
+class SessionReader:
+    """Random access to one recorded session for replay."""
+
+    def __init__(self, catalog: SessionCatalog, session: SessionInfo):
+        self.session = session
+        self.chunks = catalog.chunks(session.id)
+        self._starts = [chunk.start for chunk in self.chunks]
+        self._file = open(session.path, "rb")
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def started(self) -> float:
+        return self.chunks[0].start if self.chunks else self.session.started
+
+    @property
+    def ended(self) -> float:
+        return self.chunks[-1].end if self.chunks else self.session.started
+
+    def replay_start(self, t: float) -> int:
+        """Chunk to replay from to show the screen at ``t``.
+
+        Only the last ``REPLAY_CONTEXT`` bytes of output before the target's
+        chunk are replayed, so seeking never decompresses the whole session.
+        """
+        index = max(bisect_right(self._starts, t) - 1, 0)
+        context = 0
+        while index > 0 and context < REPLAY_CONTEXT:
+            index -= 1
+            context += self.chunks[index].raw_length
+        return index
+
+    def records(self, first_chunk: int = 0):
+        """``(time, kind, payload)`` from chunk ``first_chunk`` to the end."""
+        for chunk in self.chunks[first_chunk:]:
+            yield from read_chunk(self._file, chunk)
+
+
+class SessionRecorder:
+    """Writes one terminal session to disk on a background thread.
+
+    ``write`` and ``resize`` only queue the data, so they are cheap enough
+    to call from the shell reader for every read; the thread batches records
+    into chunks of ``CHUNK_BYTES`` (or whatever arrived within
+    ``FLUSH_INTERVAL``), compresses and appends them, then adds them to the
+    catalog.
+    """
+
+    def __init__(self, catalog: SessionCatalog, host: str, user: str, cols: int, rows: int):
+        self.catalog = catalog
+        self.info = catalog.add_session(host, user, time.time())
+        self.cols, self.rows = cols, rows
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="session-recorder", daemon=True)
+        self._thread.start()
+
+    def write(self, data: bytes):
+        if data:
+            self._queue.put((time.time(), OUTPUT, bytes(data)))
+
+    def resize(self, cols: int, rows: int):
+        self._queue.put((time.time(), RESIZE, f"{cols},{rows}".encode()))
+
+    def close(self, wait: float = 5.0):
+        self._queue.put(_CLOSE)
+        self._thread.join(wait)
+
+    def _run(self):
+        records: list[tuple[float, bytes, bytes]] = []
+        size = 0
+        seq = 0
+        # terminal size when the current chunk started
+        size_at_start = (self.cols, self.rows)
+        try:
+            f = open(self.info.path, "ab")
+        except OSError as e:
+            print("session log error:", e)
+            return
+        with f:
+            while True:
+                timeout = None
+                if records:
+                    timeout = max(records[0][0] + FLUSH_INTERVAL - time.time(), 0.0)
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None     # the chunk is old enough: write what there is
+                if item is _CLOSE:
+                    break
+                if item is not None:
+                    records.append(item)
+                    if item[1] == RESIZE:
+                        cols, rows = item[2].split(b",")
+                        self.cols, self.rows = int(cols), int(rows)
+                    else:
+                        size += len(item[2])
+                    if size < CHUNK_BYTES:
+                        continue
+                self._write_chunk(f, seq, records, size_at_start)
+                seq += 1
+                records, size = [], 0
+                size_at_start = (self.cols, self.rows)
+            if records:
+                self._write_chunk(f, seq, records, size_at_start)
+        self.catalog.end_session(self.info.id, time.time())
+        self.catalog.close()
+
+    def _write_chunk(self, f, seq: int, records, size_at_start: tuple[int, int]):
+        try:
+            self._append(f, seq, records, size_at_start)
+        except (OSError, sqlite3.Error) as e:
+            print("session log error:", e)
+
+    def _append(self, f, seq: int, records, size_at_start: tuple[int, int]):
+        start, end = records[0][0], records[-1][0]
+        raw = _pack_records(records, start)
+        compressed = zlib.compress(raw, 6)
+        offset = f.tell()
+        f.write(_CHUNK.pack(_CHUNK_MAGIC, len(compressed), len(raw), start, end))
+        f.write(compressed)
+        f.flush()
+        plain = fold_case(strip_controls(b"".join(p for _, kind, p in records if kind == OUTPUT)))
+        chunk = ChunkInfo(seq, offset, len(compressed), len(raw), start, end, *size_at_start)
+        self.catalog.add_chunk(self.info.id, chunk, build_filter(plain))
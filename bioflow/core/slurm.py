@@ -0,0 +1,336 @@
+from dataclasses import dataclass, field, replace
+import shlex
+import time
+from bioflow.core.ssh_client import ExecTimeout
+
+# poll interval while jobs are changing state...
+FAST_POLL = 5.0
+# ...stretched by this factor after every quiet poll, up to
+SLOW_POLL = 60.0
+POLL_BACKOFF = 1.5
+
+# finished jobs looked up per sacct call
+SACCT_BATCH = 500
+# polls a vanished job may wait for accounting before it is marked ENDED
+FINAL_STATE_TRIES = 3
+# accounting history fetched again before the last sync, for jobs recorded late
+SYNC_MARGIN = 300.0
+
+# states a job is expected to leave soon
+TRANSITIONAL_STATES = {
+    "CONFIGURING", "COMPLETING", "STAGE_OUT", "SIGNALING", "REQUEUED",
+    "REQUEUE_FED", "RESIZING", "ENDING",
+}
+FINISHED_STATES = {
+    "COMPLETED", "FAILED", "CANCELLED", "TIMEOUT", "OUT_OF_MEMORY", "NODE_FAIL",
+    "PREEMPTED", "BOOT_FAIL", "DEADLINE", "REVOKED", "ENDED",
+}
+
+# job id, state, elapsed, partition, nodes or pending reason, submit time, name (last: it may contain "|")
+SQUEUE_COMMAND = "squeue -h -r -u \"$USER\" -o '%i|%T|%M|%P|%R|%V|%j'"
+# without -X: the job steps carry the memory high-water mark
+SACCT_COMMAND = (
+    "sacct -n -P -o JobID,State,Elapsed,Partition,NodeList,ExitCode,Submit,End,TotalCPU,MaxRSS,AllocCPUS,JobName"
+)
+# times as epoch seconds, whatever the cluster's time zone
+_TIME_FORMAT = "SLURM_TIME_FORMAT=%s "
+# sacct's answer on clusters that keep no accounting
+_NO_ACCOUNTING = "accounting storage is disabled"
+
+_MEMORY_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+@dataclass(slots=True)
+class SlurmJob:
+    job_id: str
+    name: str
+    state: str
+    partition: str
+    # nodes while running or finished, the reason while pending
+    where: str
+    # local time the job started (derived from its elapsed time), while running
+    started: float | None = None
+    # run time of a finished job
+    elapsed: float | None = None
+    exit_code: str = ""
+    # when the job finished (end time from accounting, else when it was seen to end)
+    ended: float | None = None
+    submitted: float | None = None
+    # resource usage from accounting, once the job has finished
+    cpu_time: float | None = None
+    max_rss: int | None = None
+    alloc_cpus: int | None = None
+    # set for jobs BioFlow submitted itself
+    plugin_id: str = ""
+    project: str = ""
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def key(self) -> tuple:
+        """Fields whose change is worth a table update; run time ticks locally."""
+        return (self.state, self.name, self.partition, self.where, self.exit_code)
+
+    def run_time(self, now: float | None = None) -> float | None:
+        if self.elapsed is not None:
+            return self.elapsed
+        if self.started is not None:
+            return max((now or time.time()) - self.started, 0.0)
+        return None
+
+
+@dataclass
+class JobDiff:
+    added: list[SlurmJob] = field(default_factory=list)
+    changed: list[SlurmJob] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+def parse_duration(text: str) -> float | None:
+    """Slurm durations: ``MM:SS``, ``HH:MM:SS`` or ``D-HH:MM:SS``, seconds possibly fractional."""
+    text = text.strip()
+    days = 0
+    if "-" in text:
+        day_text, text = text.split("-", 1)
+        if not day_text.isdigit():
+            return None
+        days = int(day_text)
+    parts = text.split(":")
+    last = parts[-1].replace(".", "", 1)
+    if not 1 <= len(parts) <= 3 or not last.isdigit() or not all(p.isdigit() for p in parts[:-1]):
+        return None
+    seconds = 0.0
+    for part in parts[:-1]:
+        seconds = seconds * 60 + int(part)
+    return days * 86400 + seconds * 60 + float(parts[-1])
+
+
+def parse_memory(text: str) -> int | None:
+    """Slurm memory sizes (``123456K``, ``1.5G``) in bytes."""
+    text = text.strip()
+    if not text:
+        return None
+    scale = _MEMORY_UNITS.get(text[-1].upper())
+    try:
+        return int(float(text[:-1] if scale else text) * (scale or 1))
+    except ValueError:
+        return None
+
+
+def _parse_epoch(text: str) -> float | None:
+    return float(text) if text.isdigit() else None
+
+
+def format_duration(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    days, rest = divmod(seconds, 86400)
+    if days:
+        return f"{days}-{rest // 3600:02d}:{rest // 60 % 60:02d}:{rest % 60:02d}"
+    return f"{rest // 3600:d}:{rest // 60 % 60:02d}:{rest % 60:02d}"
+
+
+def parse_squeue(text: str, now: float) -> dict[str, SlurmJob]:
+    jobs = {}
+    for line in text.splitlines():
+        fields = line.split("|", 6)
+        if len(fields) < 7:
+            continue
+        job_id, state, elapsed, partition, where, submitted, name = fields
+        seconds = parse_duration(elapsed) if state == "RUNNING" else None
+        started = now - seconds if seconds is not None else None
+        jobs[job_id] = SlurmJob(job_id, name, state, partition, where, started, submitted=_parse_epoch(submitted))
+    return jobs
+
+
+def parse_sacct(text: str, now: float) -> dict[str, SlurmJob]:
+    jobs: dict[str, SlurmJob] = {}
+    step_rss: dict[str, int] = {}
+    for line in text.splitlines():
+        fields = line.split("|", 11)
+        if len(fields) < 12:
+            continue
+        job_id, state, elapsed, partition, nodes, exit_code, submitted, end, cpu, rss, cpus, name = fields
+        if "." in job_id:
+            # a step (1234.batch, 1234_5.0): only its memory peak matters
+            parent = job_id.split(".", 1)[0]
+            rss_bytes = parse_memory(rss)
+            if rss_bytes is not None:
+                step_rss[parent] = max(step_rss.get(parent, 0), rss_bytes)
+            continue
+        # "CANCELLED by 1234"
+        state = state.split(" ", 1)[0]
+        job = SlurmJob(
+            job_id, name, state, partition, nodes,
+            elapsed=parse_duration(elapsed), exit_code=exit_code, submitted=_parse_epoch(submitted),
+            cpu_time=parse_duration(cpu), max_rss=parse_memory(rss),
+            alloc_cpus=int(cpus) if cpus.isdigit() else None,
+        )
+        if job.finished:
+            job.ended = _parse_epoch(end) or now
+        jobs[job_id] = job
+    for job_id, rss_bytes in step_rss.items():
+        job = jobs.get(job_id)
+        if job is not None:
+            job.max_rss = max(job.max_rss or 0, rss_bytes)
+    return jobs
+
+
+class SlurmMonitor:
+    """Poll the user's Slurm jobs and report what changed since the last poll.
+
+    ``squeue`` lists queued and running jobs (array tasks one per row);
+    jobs that drop out of it are looked up once in ``sacct`` for their
+    final state. Only rows whose state, reason, nodes or exit code changed
+    are reported, and running time is derived locally from the start, so
+    thousands of running array tasks cost nothing per poll while they run.
+
+    The poll interval is ``FAST_POLL`` while jobs are changing or in a
+    transitional state and grows by ``POLL_BACKOFF`` after each quiet poll,
+    up to ``SLOW_POLL``.
+
+    With a ``JobStore``, the snapshot starts from the jobs stored for
+    ``account``, the first poll only asks accounting for what happened
+    since the last sync, and every change is written back.
+    """
+
+    def __init__(self, ssh_client, history_hours: int = 24, keep_finished: float = 6 * 3600,
+                 timeout: float = 30.0, store=None, account: str = ""):
+        self.ssh_client = ssh_client
+        self.history_hours = history_hours
+        self.keep_finished = keep_finished
+        self.timeout = timeout
+        self.store = store
+        self.account = account
+        self.jobs: dict[str, SlurmJob] = {}
+        self.interval = FAST_POLL
+        # off on clusters without sacct or accounting; then vanished jobs just end
+        self.accounting = True
+        self._polled = False
+        self._synced: float | None = None
+        self._ending: dict[str, int] = {}
+        if store is not None:
+            self._synced = store.synced_at(account)
+            self.jobs = {job.job_id: job for job in store.recent(account, time.time() - keep_finished)}
+
+    def hurry(self):
+        """Poll at the fast rate again, e.g. after a manual refresh or a submit."""
+        self.interval = FAST_POLL
+
+    def poll(self) -> JobDiff:
+        now = time.time()
+        current = parse_squeue(self._run(SQUEUE_COMMAND), now)
+        diff = JobDiff()
+
+        if not self._polled:
+            window = self.history_hours * 3600
+            if self._synced is not None:
+                window = min(max(now - self._synced, 0) + SYNC_MARGIN, window)
+            history = self._sacct(f"-u \"$USER\" -S now-{int(window)}seconds", now)
+            # tried again next poll if accounting did not answer
+            self._polled = history is not None
+            for job in (history or {}).values():
+                if job.finished and job.job_id not in current:
+                    self._update(job, diff)
+
+        for job in current.values():
+            if self._update(job, diff):
+                self._ending.pop(job.job_id, None)
+
+        vanished = [job_id for job_id, job in self.jobs.items() if not job.finished and job_id not in current]
+        if vanished:
+            diff.changed.extend(self._finish(vanished, now))
+
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.ended is not None and now - job.ended > self.keep_finished]
+        for job_id in expired:
+            del self.jobs[job_id]
+        diff.removed.extend(expired)
+
+        busy = diff.added or diff.changed or any(job.state in TRANSITIONAL_STATES for job in self.jobs.values())
+        self.interval = FAST_POLL if busy else min(self.interval * POLL_BACKOFF, SLOW_POLL)
+        if self.store is not None:
+            self.store.record(self.account, diff.added + diff.changed, now)
+            if self._polled:
+                self._synced = now
+        return diff
+
+    def _update(self, job: SlurmJob, diff: JobDiff) -> bool:
+        old = self.jobs.get(job.job_id)
+        if old is None:
+            diff.added.append(job)
+        elif old.key() != job.key() or (old.started is None) != (job.started is None):
+            _carry_over(old, job)
+            diff.changed.append(job)
+        else:
+            return False
+        self.jobs[job.job_id] = job
+        return True
+
+    def _finish(self, job_ids: list[str], now: float) -> list[SlurmJob]:
+        """Final states of jobs that left the queue; those accounting has not caught up with wait as ENDING."""
+        final: dict[str, SlurmJob] = {}
+        # jobs whose lookup failed; a hiccup of the accounting daemon does not count as a try
+        unknown: set[str] = set()
+        for i in range(0, len(job_ids), SACCT_BATCH):
+            batch = job_ids[i:i + SACCT_BATCH]
+            found = self._sacct("-j " + shlex.quote(",".join(batch)), now)
+            if found is None:
+                unknown.update(batch)
+            else:
+                final.update(found)
+        changed = []
+        for job_id in job_ids:
+            old = self.jobs[job_id]
+            job = final.get(job_id)
+            if job is None or not job.finished:
+                tries = self._ending.get(job_id, 0) + (job_id not in unknown)
+                self._ending[job_id] = tries
+                state = "ENDED" if tries >= FINAL_STATE_TRIES or not self.accounting else "ENDING"
+                job = replace(old, state=state, elapsed=old.run_time(now), started=None)
+                if state == "ENDED":
+                    job.ended = now
+            else:
+                _carry_over(old, job)
+            if job.finished:
+                self._ending.pop(job_id, None)
+            if job.key() != old.key() or job.ended != old.ended:
+                self.jobs[job_id] = job
+                changed.append(job)
+        return changed
+
+    def _sacct(self, selection: str, now: float) -> dict[str, SlurmJob] | None:
+        """Jobs accounting knows about, or None if it could not be asked this time."""
+        if not self.accounting:
+            return {}
+        try:
+            out, err, code = self.ssh_client.exec(f"{_TIME_FORMAT}{SACCT_COMMAND} {selection}", timeout=self.timeout)
+        except ExecTimeout:
+            print("sacct error: timed out")
+            return None
+        if code == 0:
+            return parse_sacct(out, now)
+        print("sacct error:", err.strip() or f"sacct exited with {code}")
+        if code == 127 or _NO_ACCOUNTING in err.lower():
+            self.accounting = False
+            return {}
+        return None
+
+    def _run(self, command: str) -> str:
+        out, err, code = self.ssh_client.exec(_TIME_FORMAT + command, timeout=self.timeout)
+        if code != 0:
+            raise RuntimeError(err.strip() or f"{command.split()[0]} exited with {code}")
+        return out
+
+
+def _carry_over(old: SlurmJob, job: SlurmJob):
+    """Keep what only BioFlow knows about a job when Slurm reports it anew."""
+    job.plugin_id = job.plugin_id or old.plugin_id
+    job.project = job.project or old.project
+    if job.submitted is None:
+        job.submitted = old.submitted
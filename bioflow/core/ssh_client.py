@@ -1,67 +1,632 @@
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional
+import codecs
+import select
+import threading
+import time
 import paramiko
 
+PoolKey = tuple[str, int, str]
+
+
+@dataclass
+class PooledConnection:
+    key: PoolKey
+    client: paramiko.SSHClient
+    password: str | None = None
+    key_filename: str | None = None
+    sock_factory: Callable[[], paramiko.Channel] | None = None
+    connect_timeout: float = 10.0
+    leases: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class SSHConnectionPool:
+    """Share authenticated SSH transports keyed by (host, port, user).
+
+    A handshake to an HPC login node is slow and often rate-limited, so every
+    view that talks to the same account leases the same transport and opens
+    its own channels over it. Transports with no leases are kept warm for
+    ``idle_timeout`` seconds; a housekeeping thread pings them every
+    ``health_interval`` seconds, reconnects dead ones that are still leased
+    and evicts dead or expired idle ones.
+    """
+
+    def __init__(self, idle_timeout: float = 300.0, health_interval: float = 30.0, keepalive: int = 30):
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.keepalive = keepalive
+        self._entries: dict[PoolKey, PooledConnection] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._housekeeper: threading.Thread | None = None
+
+    def acquire(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str | None = None,
+        key_filename: str | None = None,
+        sock_factory: Callable[[], paramiko.Channel] | None = None,
+        connect_timeout: float = 10.0,
+    ) -> paramiko.SSHClient:
+        """Lease a connected client for ``(host, port, username)``.
+
+        ``sock_factory`` opens the underlying socket when the host is only
+        reachable through a tunnel; it is called again on every reconnect.
+
+        A live transport is only shared with callers presenting the
+        credentials it logged in with. Others get a fresh handshake if nobody
+        holds a lease on it, and ``AuthenticationException`` otherwise; the
+        stored credentials change only once a handshake with the new ones
+        has succeeded.
+        """
+        key = (host, int(port), username)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                client = paramiko.SSHClient()
+                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                entry = PooledConnection(key=key, client=client)
+                self._entries[key] = entry
+        # Handshakes for different keys run concurrently; callers racing on
+        # the same key wait for the first one instead of opening a second.
+        with entry.lock:
+            if sock_factory is not None:
+                entry.sock_factory = sock_factory
+            entry.connect_timeout = connect_timeout
+            alive = self._is_alive(entry.client)
+            changed = (password is not None and password != entry.password) or (
+                key_filename is not None and key_filename != entry.key_filename
+            )
+            if alive and changed and entry.leases:
+                raise paramiko.AuthenticationException(
+                    f"{username}@{host} is already connected with other credentials"
+                )
+            if not alive or changed:
+                previous = entry.password, entry.key_filename
+                if password is not None:
+                    entry.password = password
+                if key_filename is not None:
+                    entry.key_filename = key_filename
+                try:
+                    self._connect(entry)
+                except Exception:
+                    entry.password, entry.key_filename = previous
+                    with self._lock:
+                        if entry.leases == 0 and self._entries.get(key) is entry:
+                            del self._entries[key]
+                    if entry.leases == 0:
+                        self._close_client(entry.client)
+                    raise
+            entry.leases += 1
+            entry.last_used = time.monotonic()
+        self._ensure_housekeeper()
+        return entry.client
+
+    def release(self, client: paramiko.SSHClient, keep_warm: bool = True):
+        """Drop a lease; without ``keep_warm`` the transport closes once nobody holds one."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.client is client:
+                    entry.leases = max(entry.leases - 1, 0)
+                    entry.last_used = time.monotonic()
+                    break
+            else:
+                return
+            if keep_warm or entry.leases:
+                return
+            del self._entries[entry.key]
+        self._close_client(entry.client)
+
+    def revive(self, client: paramiko.SSHClient) -> bool:
+        """Reconnect a leased transport in place if it has died."""
+        entry = self._find(client)
+        if entry is None:
+            return False
+        with entry.lock:
+            if self._is_alive(entry.client):
+                return True
+            try:
+                self._connect(entry)
+            except Exception:
+                return False
+        return True
+
+    def touch(self, client: paramiko.SSHClient):
+        entry = self._find(client)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+
+    def evict(self, key: PoolKey):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._close_client(entry.client)
+
+    def health_check(self):
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            if not entry.lock.acquire(blocking=False):
+                # a handshake is in progress for this key
+                continue
+            try:
+                if entry.leases == 0:
+                    expired = now - entry.last_used > self.idle_timeout
+                    if expired or not self._ping(entry.client):
+                        self._remove_idle(entry)
+                elif not self._ping(entry.client):
+                    try:
+                        self._connect(entry)
+                    except Exception:
+                        pass
+            finally:
+                entry.lock.release()
+
+    def close_all(self):
+        self._stop.set()
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._close_client(entry.client)
+
+    def credentials(self, client: paramiko.SSHClient) -> tuple[str | None, str | None]:
+        """Return the ``(password, key_filename)`` a leased client logged in with."""
+        entry = self._find(client)
+        if entry is None:
+            return None, None
+        return entry.password, entry.key_filename
+
+    def stats(self) -> dict[PoolKey, int]:
+        with self._lock:
+            return {key: entry.leases for key, entry in self._entries.items()}
+
+    # ---- internals ----
+    def _find(self, client: paramiko.SSHClient) -> PooledConnection | None:
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.client is client:
+                    return entry
+        return None
+
+    def _connect(self, entry: PooledConnection):
+        # Reconnect on the same paramiko.SSHClient instance so that every
+        # holder of the leased client keeps a valid reference.
+        self._close_client(entry.client)
+        host, port, username = entry.key
+        kwargs = dict(
+            hostname=host,
+            port=port,
+            username=username,
+            allow_agent=True,
+            look_for_keys=True,
+            timeout=entry.connect_timeout,
+            banner_timeout=entry.connect_timeout,
+            auth_timeout=entry.connect_timeout,
+        )
+        if entry.sock_factory is not None:
+            kwargs["sock"] = entry.sock_factory()
+        if entry.key_filename:
+            kwargs["key_filename"] = entry.key_filename
+        else:
+            kwargs["password"] = entry.password
+        entry.client.connect(**kwargs)
+        transport = entry.client.get_transport()
+        if transport is not None and self.keepalive:
+            transport.set_keepalive(self.keepalive)
+
+    def _remove_idle(self, entry: PooledConnection):
+        with self._lock:
+            if entry.leases != 0 or self._entries.get(entry.key) is not entry:
+                return
+            del self._entries[entry.key]
+        self._close_client(entry.client)
+
+    def _ensure_housekeeper(self):
+        with self._lock:
+            if self._housekeeper is not None and self._housekeeper.is_alive():
+                return
+            self._stop.clear()
+            self._housekeeper = threading.Thread(
+                target=self._housekeeping_loop, name="ssh-pool-housekeeper", daemon=True
+            )
+            self._housekeeper.start()
+
+    def _housekeeping_loop(self):
+        while not self._stop.wait(self.health_interval):
+            try:
+                self.health_check()
+            except Exception:
+                pass
+            with self._lock:
+                if not self._entries:
+                    self._housekeeper = None
+                    return
+
+    @staticmethod
+    def _is_alive(client: paramiko.SSHClient) -> bool:
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    @classmethod
+    def _ping(cls, client: paramiko.SSHClient) -> bool:
+        if not cls._is_alive(client):
+            return False
+        try:
+            client.get_transport().send_ignore()
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _close_client(client: paramiko.SSHClient):
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+default_pool = SSHConnectionPool()
+
+
+class ExecTimeout(TimeoutError):
+    pass
+
+
+class ExecCancelled(Exception):
+    pass
+
+
+STDOUT = "stdout"
+STDERR = "stderr"
+
+
+class ExecStream:
+    """Incremental reader over a remote command's stdout and stderr.
+
+    Iterating yields ``(stream, text)`` pairs where ``stream`` is ``STDOUT``
+    or ``STDERR`` and ``text`` is one line without its terminator (or a raw
+    decoded chunk when ``lines`` is false). Data is only pulled off the
+    channel while the consumer iterates, so a slow consumer lets the SSH
+    window fill up and the remote command blocks, rather than BioFlow
+    buffering the whole output. Each stream has its own incremental UTF-8
+    decoder, so multibyte characters split across packets survive.
+
+    ``exit_code`` is set once iteration finishes. Closing the stream early
+    closes the channel.
+    """
+
+    def __init__(
+        self,
+        channel: paramiko.Channel,
+        command: str,
+        timeout: float | None = None,
+        cancel_event: threading.Event | None = None,
+        closing: threading.Event | None = None,
+        lines: bool = True,
+        chunk_size: int = 32768,
+        max_line: int = 65536,
+    ):
+        self.channel = channel
+        self.command = command
+        self.cancel_event = cancel_event
+        self.closing = closing
+        self.lines = lines
+        self.chunk_size = chunk_size
+        self.max_line = max_line
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.exit_code: int | None = None
+        self._decoders = {
+            STDOUT: codecs.getincrementaldecoder("utf-8")(errors="replace"),
+            STDERR: codecs.getincrementaldecoder("utf-8")(errors="replace"),
+        }
+        self._partial = {STDOUT: "", STDERR: ""}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        try:
+            self.channel.close()
+        except Exception:
+            pass
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        chan = self.channel
+        try:
+            while True:
+                if (self.closing is not None and self.closing.is_set()) or (
+                    self.cancel_event is not None and self.cancel_event.is_set()
+                ):
+                    raise ExecCancelled(self.command)
+                if self.deadline is not None and time.monotonic() >= self.deadline:
+                    raise ExecTimeout(self.command)
+                # Alternate between the two streams so neither can starve
+                # the other of window space.
+                got = False
+                if chan.recv_ready():
+                    got = True
+                    yield from self._feed(STDOUT, chan.recv(self.chunk_size))
+                if chan.recv_stderr_ready():
+                    got = True
+                    yield from self._feed(STDERR, chan.recv_stderr(self.chunk_size))
+                if got:
+                    continue
+                wait = 0.1
+                if self.deadline is not None:
+                    wait = max(min(wait, self.deadline - time.monotonic()), 0.0)
+                if chan.eof_received:
+                    if chan.exit_status_ready():
+                        break
+                    chan.status_event.wait(wait)
+                    continue
+                select.select([chan], [], [], wait)
+            for name in (STDOUT, STDERR):
+                yield from self._flush(name)
+            self.exit_code = chan.recv_exit_status()
+        finally:
+            self.close()
+
+    def _feed(self, name: str, data: bytes) -> Iterator[tuple[str, str]]:
+        text = self._decoders[name].decode(data)
+        if not text:
+            return
+        if not self.lines:
+            yield name, text
+            return
+        buf = self._partial[name] + text
+        *complete, rest = buf.split("\n")
+        for line in complete:
+            yield name, line.rstrip("\r")
+        # Output without newlines (progress bars, binary junk) must not grow
+        # the pending line without bound.
+        while len(rest) >= self.max_line:
+            yield name, rest[: self.max_line]
+            rest = rest[self.max_line :]
+        self._partial[name] = rest
+
+    def _flush(self, name: str) -> Iterator[tuple[str, str]]:
+        text = self._decoders[name].decode(b"", final=True)
+        rest = self._partial[name] + text
+        self._partial[name] = ""
+        if not rest:
+            return
+        if self.lines:
+            for line in rest.split("\n"):
+                if line:
+                    yield name, line.rstrip("\r")
+        else:
+            yield name, rest
+
+
 class SSHClient:
-    def __init__(self):
+    # OpenSSH allows 10 sessions per connection by default (MaxSessions);
+    # stay below it so an interactive shell can always get a channel.
+    max_parallel_exec = 8
+
+    def __init__(self, pool: SSHConnectionPool | None = None):
+        self.pool = pool or default_pool
         self.client: Optional[paramiko.SSHClient] = None
         self.channel: Optional[paramiko.Channel] = None
+        # every open shell channel, so close() can take them all down
+        self._shells: set[paramiko.Channel] = set()
+        self._shells_lock = threading.Lock()
+        self.address: tuple[str, int, str] | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self._closing = threading.Event()
 
     def connect(self, host: str, port: int, username: str, password: str | None = None, key_filename: str | None = None):
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        if key_filename:
-            client.connect(
-                hostname=host,
-                port=port,
-                username=username,
-                key_filename=key_filename,
-                allow_agent=True,
-                look_for_keys=True,
-                timeout=10,
-            )
-        else:
-            client.connect(
-                hostname=host,
-                port=port,
-                username=username,
-                password=password,
-                allow_agent=True,
-                look_for_keys=True,
-                timeout=10,
+        client = self.pool.acquire(host, port, username, password=password, key_filename=key_filename)
+        self._adopt(client)
+        self.address = (host, int(port), username)
+
+    def connect_via(self, gateway: "SSHClient", host: str, port: int = 22, connect_timeout: float = 10.0):
+        """Connect to ``host`` through a tunnel over ``gateway``'s transport.
+
+        Compute nodes are usually only reachable from the login node; this
+        reuses the gateway's username and credentials and keeps the node
+        connection in the pool like any other.
+        """
+        if not gateway.client:
+            raise RuntimeError("Gateway not connected")
+        username = gateway._transport().get_username()
+        password, key_filename = self.pool.credentials(gateway.client)
+
+        def open_tunnel():
+            return gateway._transport().open_channel(
+                "direct-tcpip", (host, port), ("127.0.0.1", 0), timeout=connect_timeout
             )
+
+        client = self.pool.acquire(
+            host,
+            port,
+            username,
+            password=password,
+            key_filename=key_filename,
+            sock_factory=open_tunnel,
+            connect_timeout=connect_timeout,
+        )
+        self._adopt(client)
+        self.address = (host, int(port), username)
+
+    def _adopt(self, client: paramiko.SSHClient):
+        if self.client is not None:
+            self.close()
+        self._closing.clear()
         self.client = client
 
-    def exec(self, command: str) -> tuple[str, str, int]:
+    def _transport(self) -> paramiko.Transport:
         if not self.client:
             raise RuntimeError("Not connected")
-        stdin, stdout, stderr = self.client.exec_command(command)
-        out = stdout.read().decode()
-        err = stderr.read().decode()
-        code = stdout.channel.recv_exit_status()
-        return out, err, code
+        transport = self.client.get_transport()
+        if transport is None or not transport.is_active():
+            if not self.pool.revive(self.client):
+                raise RuntimeError("SSH transport is not active")
+            transport = self.client.get_transport()
+        self.pool.touch(self.client)
+        return transport
+
+    def exec(self, command: str, timeout: float | None = None,
+             cancel_event: threading.Event | None = None) -> tuple[str, str, int]:
+        return self._run_exec(command, timeout, cancel_event)
+
+    def exec_async(
+        self,
+        command: str,
+        timeout: float | None = None,
+        cancel_event: threading.Event | None = None,
+    ) -> Future:
+        """Run ``command`` on its own channel in a worker thread.
+
+        The future resolves to ``(stdout, stderr, exit_code)``. It raises
+        ``ExecTimeout`` once ``timeout`` seconds pass and ``ExecCancelled`` when
+        ``cancel_event`` is set or the client is closed; in both cases the
+        remote channel is closed.
+        """
+        if not self.client:
+            raise RuntimeError("Not connected")
+        return self._get_executor().submit(self._run_exec, command, timeout, cancel_event)
+
+    def exec_many(
+        self,
+        commands: Iterable[str],
+        timeout: float | None = None,
+        cancel_event: threading.Event | None = None,
+    ) -> list[Future]:
+        """Start several commands in parallel channels over the one transport."""
+        return [self.exec_async(cmd, timeout=timeout, cancel_event=cancel_event) for cmd in commands]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_parallel_exec, thread_name_prefix="ssh-exec"
+                )
+            return self._executor
+
+    def exec_stream(
+        self,
+        command: str,
+        timeout: float | None = None,
+        cancel_event: threading.Event | None = None,
+        lines: bool = True,
+    ) -> ExecStream:
+        """Start ``command`` and return an ``ExecStream`` to iterate its output."""
+        chan = self.open_exec_channel(command)
+        try:
+            chan.shutdown_write()
+        except Exception:
+            chan.close()
+            raise
+        return ExecStream(
+            chan,
+            command,
+            timeout=timeout,
+            cancel_event=cancel_event,
+            closing=self._closing,
+            lines=lines,
+        )
+
+    def open_exec_channel(self, command: str) -> paramiko.Channel:
+        """Start ``command`` and hand back the raw channel, stdin still open.
+
+        For binary pipelines (e.g. tar streams) where the caller reads or
+        writes the channel directly.
+        """
+        chan = self._transport().open_session()
+        try:
+            chan.exec_command(command)
+        except Exception:
+            chan.close()
+            raise
+        return chan
+
+    def exec_lines(
+        self,
+        command: str,
+        on_stdout: Callable[[str], None] | None = None,
+        on_stderr: Callable[[str], None] | None = None,
+        timeout: float | None = None,
+        cancel_event: threading.Event | None = None,
+    ) -> int:
+        """Run ``command`` calling ``on_stdout``/``on_stderr`` per line; return the exit code."""
+        with self.exec_stream(command, timeout=timeout, cancel_event=cancel_event) as stream:
+            for name, line in stream:
+                callback = on_stdout if name == STDOUT else on_stderr
+                if callback is not None:
+                    callback(line)
+        return stream.exit_code
+
+    def _run_exec(
+        self,
+        command: str,
+        timeout: float | None,
+        cancel_event: threading.Event | None,
+    ) -> tuple[str, str, int]:
+        out: list[str] = []
+        err: list[str] = []
+        stream = self.exec_stream(command, timeout=timeout, cancel_event=cancel_event, lines=False)
+        for name, text in stream:
+            (out if name == STDOUT else err).append(text)
+        return "".join(out), "".join(err), stream.exit_code
+
+    def open_sftp(self) -> paramiko.SFTPClient:
+        """Open a new SFTP session on its own channel of the shared transport."""
+        return paramiko.SFTPClient.from_transport(self._transport())
 
     # ---- Interactive shell (MobaXterm style) ----
     def open_shell(self, term: str = "xterm", width: int = 120, height: int = 32):
         if not self.client:
             raise RuntimeError("Not connected")
         # Close old channel if exists
-        if self.channel is not None:
-            try:
-                self.channel.close()
-            except Exception:
-                pass
-            self.channel = None
-        transport = self.client.get_transport()
-        if transport is None or not transport.is_active():
-            raise RuntimeError("SSH transport is not active")
-        chan = transport.open_session()
-        # Request a PTY so that we get real terminal behavior (like MobaXterm)
-        chan.get_pty(term=term, width=width, height=height)
-        chan.invoke_shell()
+        self.close_shell()
+        self.channel = self.open_shell_channel(term, width, height)
+        return self.channel
+
+    def open_shell_channel(self, term: str = "xterm", width: int = 120, height: int = 32) -> paramiko.Channel:
+        """Open another interactive shell on the shared transport.
+
+        Costs one channel-open round-trip, not a handshake. The channel is
+        independent of ``channel`` and of other shells; the caller owns it
+        and closes it with ``close_shell_channel`` (``close`` closes any
+        that are left).
+        """
+        if not self.client:
+            raise RuntimeError("Not connected")
+        try:
+            chan = self._transport().open_session()
+        except paramiko.ChannelException as e:
+            raise RuntimeError(f"server refused another session ({e}); too many open shells?") from e
+        try:
+            # Request a PTY so that we get real terminal behavior (like MobaXterm)
+            chan.get_pty(term=term, width=width, height=height)
+            chan.invoke_shell()
+        except Exception:
+            chan.close()
+            raise
         chan.settimeout(0.0)
-        self.channel = chan
+        with self._shells_lock:
+            self._shells.add(chan)
         return chan
 
+    def close_shell_channel(self, chan: paramiko.Channel):
+        with self._shells_lock:
+            self._shells.discard(chan)
+        try:
+            chan.close()
+        except Exception:
+            pass
+
     def shell_send(self, data: str):
         if self.channel is None:
             raise RuntimeError("Shell not open")
@@ -75,19 +640,35 @@ class SSHClient:
             return self.channel.recv(bufsize).decode(errors="ignore")
         return ""
 
+    def resize_shell(self, width: int, height: int):
+        if self.channel is not None:
+            self.channel.resize_pty(width=width, height=height)
+
     def close_shell(self):
         if self.channel is not None:
-            try:
-                self.channel.close()
-            except Exception:
-                pass
+            self.close_shell_channel(self.channel)
             self.channel = None
 
-    def close(self):
+    def close(self, keep_warm: bool = True):
+        """Close every channel and drop the lease.
+
+        The pool keeps an unleased transport warm for a quick reconnect;
+        ``keep_warm=False`` (an explicit disconnect) closes it right away.
+        """
+        self._closing.set()
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
         self.close_shell()
-        if self.client:
+        with self._shells_lock:
+            shells, self._shells = self._shells, set()
+        for chan in shells:
             try:
-                self.client.close()
+                chan.close()
             except Exception:
                 pass
+        if self.client:
+            self.pool.release(self.client, keep_warm=keep_warm)
             self.client = None
+            self.address = None
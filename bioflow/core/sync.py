@@ -0,0 +1,210 @@
+from dataclasses import dataclass, field
+import hashlib
+import os
+import posixpath
+import shlex
+import threading
+
+# fixed block size for delta comparison of large files
+SYNC_BLOCK_SIZE = 1024 * 1024
+
+# changed files at least this big are patched block by block
+DELTA_THRESHOLD = 8 * 1024 * 1024
+
+# tolerance for mtime comparison; tar keeps whole seconds only
+MTIME_SLACK = 1.0
+
+# Runs remotely under python3: NUL-separated names on stdin, one
+# "<index> <md5>,<md5>,..." line per readable file on stdout.
+REMOTE_BLOCK_SCRIPT = r"""
+import hashlib, sys
+bs = int(sys.argv[1])
+for i, name in enumerate(sys.stdin.buffer.read().split(b"\0")):
+    if not name:
+        continue
+    sums = []
+    try:
+        with open(name, "rb") as f:
+            for block in iter(lambda: f.read(bs), b""):
+                sums.append(hashlib.md5(block).hexdigest())
+    except OSError:
+        continue
+    sys.stdout.write("%d %s\n" % (i, ",".join(sums)))
+"""
+
+
+def remote_project_dir(project_id: str, *parts: str) -> str:
+    """``~/bioflow/<project_id>/...`` relative to the login directory.
+
+    SFTP and exec channels both start in the home directory, so the
+    relative form works for either without expanding ``~``.
+    """
+    return posixpath.join("bioflow", project_id, *parts)
+
+
+@dataclass
+class FileState:
+    size: int
+    mtime: float
+
+
+@dataclass
+class SyncPlan:
+    """What a push from ``local`` to ``remote`` has to do, by relative path."""
+    local: dict[str, FileState]
+    remote: dict[str, FileState]
+    dirs: list[str] = field(default_factory=list)
+    new: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    # same content, only the remote mtime needs fixing
+    retime: list[str] = field(default_factory=list)
+
+
+def scan_local(root: str) -> tuple[list[str], dict[str, FileState]]:
+    dirs: list[str] = []
+    files: dict[str, FileState] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root)
+        rel_dir = "" if rel_dir == "." else rel_dir.replace(os.sep, "/")
+        for d in dirnames:
+            dirs.append(posixpath.join(rel_dir, d))
+        for name in filenames:
+            rel = posixpath.join(rel_dir, name)
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            files[rel] = FileState(st.st_size, st.st_mtime)
+    return dirs, files
+
+
+def scan_remote(ssh_client, root: str) -> tuple[set[str], dict[str, FileState]]:
+    """One ``find`` round-trip; a missing ``root`` is an empty tree."""
+    out, err, code = ssh_client.exec(
+        f"cd {shlex.quote(root)} 2>/dev/null || exit 0; find . -mindepth 1 "
+        "\\( -type d -printf 'd 0 0 %P\\n' \\) -o \\( -type f -printf 'f %s %T@ %P\\n' \\)"
+    )
+    if code != 0:
+        raise OSError(err.strip() or f"cannot list {root}")
+    dirs: set[str] = set()
+    files: dict[str, FileState] = {}
+    for line in out.splitlines():
+        parts = line.split(" ", 3)
+        if len(parts) != 4:
+            continue
+        kind, size, mtime, rel = parts
+        if kind == "d":
+            dirs.add(rel)
+            continue
+        try:
+            files[rel] = FileState(int(size), float(mtime))
+        except ValueError:
+            continue
+    return dirs, files
+
+
+def plan_sync(local_dirs: list[str], local: dict[str, FileState],
+              remote_dirs: set[str], remote: dict[str, FileState]) -> SyncPlan:
+    """Classify local files by size and mtime against the remote listing."""
+    plan = SyncPlan(local, remote, dirs=[d for d in local_dirs if d not in remote_dirs])
+    for rel, state in local.items():
+        other = remote.get(rel)
+        if other is None:
+            plan.new.append(rel)
+        elif other.size != state.size or abs(other.mtime - state.mtime) > MTIME_SLACK:
+            plan.changed.append(rel)
+        else:
+            plan.unchanged.append(rel)
+    return plan
+
+
+def remote_sha256(ssh_client, root: str, names: list[str]) -> dict[str, str] | None:
+    """sha256 of several remote files in one exec; unreadable files are left out."""
+    if not names:
+        return {}
+    chan = ssh_client.open_exec_channel(f"cd {shlex.quote(root)} && xargs -0 sha256sum --")
+    return _read_indexed(chan, names, _parse_sha256)
+
+
+def remote_block_sums(ssh_client, root: str, names: list[str], block_size: int = SYNC_BLOCK_SIZE) -> dict[str, list[str]] | None:
+    """Per-block md5 lists for remote files, or None if the server has no python3."""
+    if not names:
+        return {}
+    chan = ssh_client.open_exec_channel(
+        f"cd {shlex.quote(root)} && python3 -c {shlex.quote(REMOTE_BLOCK_SCRIPT)} {int(block_size)}"
+    )
+    return _read_indexed(chan, names, _parse_block_line)
+
+
+def local_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def local_block_sums(path: str, block_size: int = SYNC_BLOCK_SIZE) -> list[str]:
+    with open(path, "rb") as f:
+        return [hashlib.md5(block).hexdigest() for block in iter(lambda: f.read(block_size), b"")]
+
+
+def changed_blocks(local_sums: list[str], remote_sums: list[str], size: int,
+                   block_size: int = SYNC_BLOCK_SIZE) -> list[tuple[int, int]]:
+    """``(offset, length)`` of local blocks whose content differs from the remote copy."""
+    out = []
+    for i, digest in enumerate(local_sums):
+        if i < len(remote_sums) and remote_sums[i] == digest:
+            continue
+        offset = i * block_size
+        length = min(block_size, size - offset)
+        if out and out[-1][0] + out[-1][1] == offset:
+            out[-1] = (out[-1][0], out[-1][1] + length)
+        else:
+            out.append((offset, length))
+    return out
+
+
+def _read_indexed(chan, names: list[str], parse):
+    def send():
+        # a separate thread: xargs starts hashing and writing before it has
+        # read the whole list, and both directions share flow-control windows
+        try:
+            chan.sendall(b"\0".join(n.encode("utf-8") for n in names) + b"\0")
+            chan.shutdown_write()
+        except Exception:
+            pass
+
+    sender = threading.Thread(target=send, name="sync-names", daemon=True)
+    sender.start()
+    try:
+        with chan.makefile("rb") as stream:
+            out = stream.read().decode("utf-8", errors="replace")
+        code = chan.recv_exit_status()
+        sender.join(timeout=5)
+    finally:
+        chan.close()
+    if code == 127:
+        return None
+    result = {}
+    for line in out.splitlines():
+        parsed = parse(line, names)
+        if parsed is not None:
+            result[parsed[0]] = parsed[1]
+    return result
+
+
+def _parse_sha256(line: str, names: list[str]):
+    # sha256sum escapes odd file names with a leading backslash; skip those
+    if line.startswith("\\") or "  " not in line:
+        return None
+    digest, name = line.split("  ", 1)
+    return name, digest.lower()
+
+
+def _parse_block_line(line: str, names: list[str]):
+    index, _, sums = line.partition(" ")
+    if not index.isdigit() or int(index) >= len(names):
+        return None
+    return names[int(index)], sums.split(",") if sums else []
@@ -0,0 +1,945 @@
+from array import array
+from itertools import compress, islice
+from operator import ne
+import re
+import unicodedata
+
+# A cell attribute is one int: foreground index (bits 0-8), background index
+# (bits 9-17), both 0-255 or DEFAULT_COLOR, then style flags.
+DEFAULT_COLOR = 256
+BOLD = 1 << 18
+DIM = 1 << 19
+ITALIC = 1 << 20
+UNDERLINE = 1 << 21
+REVERSE = 1 << 22
+INVISIBLE = 1 << 23
+STRIKE = 1 << 24
+DEFAULT_ATTR = DEFAULT_COLOR | (DEFAULT_COLOR << 9)
+
+_FG_MASK = 0x1FF
+_BG_MASK = 0x1FF << 9
+
+
+def attr_fg(attr: int) -> int:
+    return attr & _FG_MASK
+
+
+def attr_bg(attr: int) -> int:
+    return (attr >> 9) & _FG_MASK
+
+
+# lines that scroll off the top of the main screen and are kept for scrolling back
+SCROLLBACK_LINES = 10000
+
+# the common tokens in one pattern: a printable run (everything but C0
+# controls and DEL), a CSI sequence, or a line break
+_TOKEN = re.compile(r"([^\x00-\x1f\x7f]+)|\x1b\[([\x30-\x3f]*)[\x20-\x2f]*([\x40-\x7e])|(\r\n|\r|\n)")
+_CSI = re.compile(r"\x1b\[([\x30-\x3f]*)[\x20-\x2f]*([\x40-\x7e])")
+# OSC / DCS / APC strings end with BEL or ST; their content is ignored
+_STRING = re.compile(r"\x1b[\]P_^].*?(?:\x07|\x1b\\)", re.S)
+_ESC = re.compile(r"\x1b([\x20-\x2f]*)([\x30-\x7e])")
+# (SGR parameters, attribute before) -> attribute after; prompts and `ls
+# --color` repeat the same few sequences over and over
+_SGR_CACHE: dict[tuple[str, int], int] = {}
+
+# an escape sequence cut off by the end of a chunk is kept until the next one
+_MAX_PENDING = 4096
+
+# DEC special graphics (ESC ( 0), as used for box drawing by ncurses tools
+_DEC_GRAPHICS = str.maketrans(
+    "`abcdefghijklmnopqrstuvwxyz{|}~",
+    "◆▒␉␌␍␊°±␤␋┘┐┌└┼⎺⎻─⎼⎽├┤┴┬│≤≥π≠£·",
+)
+
+
+def char_width(ch: str) -> int:
+    """Cells taken by ``ch``: 2 for East Asian wide/fullwidth, 0 for combining marks."""
+    if ch < "\u0300":
+        return 1
+    if unicodedata.combining(ch):
+        return 0
+    return 2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1
+
+
+class Line:
+    """One row of cells. A wide character's second cell holds ``""``."""
+    __slots__ = ("chars", "attrs", "wrapped")
+
+    def __init__(self, cols: int, attr: int = DEFAULT_ATTR):
+        self.chars = [" "] * cols
+        self.attrs = [attr] * cols
+        # True when the text continues on the next line (soft wrap)
+        self.wrapped = False
+
+    def text(self) -> str:
+        return "".join(self.chars)
+
+    def runs(self) -> list[tuple[str, int]]:
+        """``(text, attr)`` pieces of equal attribute, left to right."""
+        out = []
+        chars, attrs = self.chars, self.attrs
+        start, n = 0, len(chars)
+        while start < n:
+            attr = attrs[start]
+            end = start + 1
+            while end < n and attrs[end] == attr:
+                end += 1
+            out.append(("".join(chars[start:end]), attr))
+            start = end
+        return out
+
+
+class Scrollback:
+    """Lines that scrolled off a terminal, oldest first, at most ``max_lines``.
+
+    A fixed-size ring: once full, each new line overwrites the oldest one,
+    so memory stays flat however long a log is tailed. Lines are stored
+    compactly — the text as one string with trailing blanks dropped, and
+    the attributes as ``(end column, attr)`` runs, or nothing when the whole
+    line uses the default attribute. Indexing rebuilds a ``Line`` so only the
+    rows actually painted are expanded back to cells.
+    """
+
+    def __init__(self, max_lines: int = SCROLLBACK_LINES):
+        self._allocate(max(max_lines, 0))
+        # lines ever pushed out by the cap; lets a view keep its place
+        self.dropped = 0
+
+    def _allocate(self, capacity: int):
+        self._capacity = capacity
+        self._text: list[str] = [""] * capacity
+        self._runs: list[array | None] = [None] * capacity
+        self._wrapped = bytearray(capacity)
+        self._start = 0
+        self._count = 0
+
+    @property
+    def max_lines(self) -> int:
+        return self._capacity
+
+    def set_max_lines(self, max_lines: int):
+        """Change the cap, keeping the newest lines that still fit."""
+        max_lines = max(max_lines, 0)
+        if max_lines == self._capacity:
+            return
+        keep = min(self._count, max_lines)
+        old = [self._slot(i) for i in range(self._count - keep, self._count)]
+        texts = [self._text[s] for s in old]
+        runs = [self._runs[s] for s in old]
+        wrapped = [self._wrapped[s] for s in old]
+        self.dropped += self._count - keep
+        self._allocate(max_lines)
+        self._text[:keep] = texts
+        self._runs[:keep] = runs
+        self._wrapped[:keep] = bytes(wrapped)
+        self._count = keep
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _slot(self, index: int) -> int:
+        return (self._start + index) % self._capacity
+
+    def clear(self):
+        self.dropped += self._count
+        self._text = [""] * self._capacity
+        self._runs = [None] * self._capacity
+        self._start = 0
+        self._count = 0
+
+    # ---- storing ----
+    def append(self, line: Line):
+        if not self._capacity:
+            self.dropped += 1
+            return
+        text, runs = _encode(line)
+        if self._count < self._capacity:
+            slot = self._slot(self._count)
+            self._count += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self._capacity
+            self.dropped += 1
+        self._text[slot] = text
+        self._runs[slot] = runs
+        self._wrapped[slot] = line.wrapped
+
+    def extend(self, lines):
+        for line in lines:
+            self.append(line)
+
+    # ---- reading ----
+    def text(self, index: int) -> str:
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return self._text[self._slot(index)]
+
+    def __getitem__(self, index: int) -> Line:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        slot = self._slot(index)
+        return _decode(self._text[slot], self._runs[slot], bool(self._wrapped[slot]))
+
+    def search(self, needle: str, start: int | None = None, backwards: bool = True,
+               case_sensitive: bool = False) -> tuple[int, int] | None:
+        """Next line containing ``needle`` from ``start`` (inclusive), as ``(index, column)``.
+
+        Searches towards older lines by default, starting from the newest.
+        """
+        if not needle or not self._count:
+            return None
+        if start is None:
+            start = self._count - 1 if backwards else 0
+        if backwards:
+            indexes = range(min(start, self._count - 1), -1, -1)
+        else:
+            indexes = range(max(start, 0), self._count)
+        if not case_sensitive:
+            needle = needle.lower()
+        texts, capacity, first = self._text, self._capacity, self._start
+        for index in indexes:
+            text = texts[(first + index) % capacity]
+            pos = (text if case_sensitive else text.lower()).find(needle)
+            if pos >= 0:
+                return index, cell_column(text, pos)
+        return None
+
+
+def cell_column(text: str, pos: int) -> int:
+    """Cell column of character ``pos`` in a line's text (wide characters take two)."""
+    if text.isascii():
+        return pos
+    return sum(char_width(ch) for ch in text[:pos])
+
+
+def _encode(line: Line) -> tuple[str, array | None]:
+    chars, attrs = line.chars, line.attrs
+    text = "".join(chars)
+    n = len(attrs)
+    stripped = text.rstrip(" ")
+    blank = len(text) - len(stripped)
+    if blank and attrs[n - blank:] != [DEFAULT_ATTR] * blank:
+        # some of them have a background colour; keep those
+        kept = 0
+        while kept < blank and attrs[n - 1 - kept] == DEFAULT_ATTR:
+            kept += 1
+        blank = kept
+    if blank:
+        # blanks in the default attribute at the end are not drawn
+        n -= blank
+        text, attrs = text[:len(text) - blank], attrs[:n]
+    if not n:
+        return "", None
+    first = attrs[0]
+    if attrs.count(first) == n:
+        # one attribute across the line: the common case for plain output
+        return text, None if first == DEFAULT_ATTR else array("I", (n, first))
+    # columns where the attribute changes, found without a Python-level loop
+    ends = list(compress(range(1, n), map(ne, attrs, islice(attrs, 1, None))))
+    ends.append(n)
+    runs = array("I")
+    for end in ends:
+        runs.append(end)
+        runs.append(attrs[end - 1])
+    return text, runs
+
+
+def _decode(text: str, runs: array | None, wrapped: bool) -> Line:
+    line = Line.__new__(Line)
+    if text.isascii():
+        chars = list(text)
+    else:
+        chars = []
+        for ch in text:
+            chars.append(ch)
+            if char_width(ch) == 2:
+                chars.append("")
+    if runs is None:
+        attrs = [DEFAULT_ATTR] * len(chars)
+    else:
+        attrs = []
+        start = 0
+        for i in range(0, len(runs), 2):
+            end = runs[i]
+            attrs.extend([runs[i + 1]] * (end - start))
+            start = end
+    line.chars = chars
+    line.attrs = attrs
+    line.wrapped = wrapped
+    return line
+
+
+class TerminalScreen:
+    """VT100/xterm state machine over a fixed grid of cells.
+
+    ``feed`` takes decoded text and updates the grid: cursor addressing,
+    erase/insert/delete, scroll regions, SGR attributes (16/256/true
+    color), the alternate screen, autowrap and the modes full-screen tools
+    rely on. Rows touched since the last ``take_dirty`` are recorded so a
+    view repaints only those. Lines scrolled off the top of the main screen
+    go to ``history``, a ``Scrollback`` capped at ``history_lines``.
+    Replies the remote side asked for (cursor position, device attributes)
+    are passed to ``reply``.
+    """
+
+    def __init__(self, cols: int = 80, rows: int = 24, history_lines: int = SCROLLBACK_LINES, reply=None):
+        self.cols = max(cols, 1)
+        self.rows = max(rows, 1)
+        self.reply = reply
+        self.history = Scrollback(history_lines)
+        self.dirty: set[int] = set()
+        self.title = ""
+        self.reset()
+
+    # ---- state ----
+    def reset(self):
+        self._main = [Line(self.cols) for _ in range(self.rows)]
+        self._alt = [Line(self.cols) for _ in range(self.rows)]
+        self.lines = self._main
+        self.alt_screen = False
+        self.x = 0
+        self.y = 0
+        self.wrap_pending = False
+        self.attr = DEFAULT_ATTR
+        self.top = 0
+        self.bottom = self.rows - 1
+        self.autowrap = True
+        self.origin_mode = False
+        self.insert_mode = False
+        self.cursor_visible = True
+        self.app_cursor_keys = False
+        self.app_keypad = False
+        self.bracketed_paste = False
+        self._graphics = [False, False]  # G0 / G1 designated as DEC graphics
+        self._shift_out = False
+        self._saved = None
+        self._saved_alt = None
+        self._tabs = set(range(8, self.cols, 8))
+        self._pending = ""
+        self.history.clear()
+        self.dirty = set(range(self.rows))
+
+    def take_dirty(self) -> set[int]:
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    def line(self, y: int) -> Line:
+        return self.lines[y]
+
+    def text(self) -> str:
+        return "\n".join(line.text().rstrip() for line in self.lines)
+
+    def resize(self, cols: int, rows: int):
+        cols, rows = max(cols, 1), max(rows, 1)
+        if cols == self.cols and rows == self.rows:
+            return
+        self._tabs = {t for t in self._tabs if t < cols} | set(range(self.cols // 8 * 8 + 8, cols, 8))
+        for screen in (self._main, self._alt):
+            for line in screen:
+                if cols < self.cols:
+                    del line.chars[cols:]
+                    del line.attrs[cols:]
+                else:
+                    line.chars.extend(" " * (cols - self.cols))
+                    line.attrs.extend([DEFAULT_ATTR] * (cols - self.cols))
+        # shrinking keeps the cursor's row on screen; the rows above it go to history
+        if rows < self.rows:
+            cut = max(self.y - rows + 1, 0)
+            if cut:
+                if not self.alt_screen:
+                    self.history.extend(self._main[:cut])
+                del self._main[:cut]
+                del self._alt[:cut]
+                self.y -= cut
+            del self._main[rows:]
+            del self._alt[rows:]
+        else:
+            for screen in (self._main, self._alt):
+                screen.extend(Line(cols) for _ in range(rows - len(screen)))
+        self.cols, self.rows = cols, rows
+        self.lines = self._alt if self.alt_screen else self._main
+        self.top, self.bottom = 0, rows - 1
+        self.x = min(self.x, cols - 1)
+        self.y = min(self.y, rows - 1)
+        self.wrap_pending = False
+        self.dirty = set(range(rows))
+
+    # ---- input ----
+    def feed(self, text: str):
+        if self._pending:
+            text = self._pending + text
+            self._pending = ""
+        pos, n = 0, len(text)
+        token = _TOKEN.match
+        while pos < n:
+            m = token(text, pos)
+            if m is not None:
+                pos = m.end()
+                kind = m.lastindex
+                if kind == 1:
+                    self._print(m.group(1))
+                elif kind == 3:
+                    params, final = m.group(2, 3)
+                    if final == "m" and not params.startswith(("?", ">", "=", "<")):
+                        self._sgr_cached(params)
+                    else:
+                        self._csi(params, final)
+                else:
+                    if m.group(4) != "\n":
+                        self.x = 0
+                    if m.group(4) != "\r":
+                        self._index()
+                    self.wrap_pending = False
+                continue
+            ch = text[pos]
+            if ch == "\x1b":
+                end = self._escape(text, pos)
+                if end < 0:
+                    rest = text[pos:]
+                    if len(rest) < _MAX_PENDING:
+                        self._pending = rest
+                        return
+                    end = pos + 1  # not a sequence after all; drop the ESC
+                pos = end
+            else:
+                self._control(ch)
+                pos += 1
+
+    def _control(self, ch: str):
+        if ch == "\r":
+            self.x = 0
+            self.wrap_pending = False
+        elif ch in "\n\x0b\x0c":
+            self._index()
+        elif ch == "\b":
+            if self.x > 0:
+                self.x -= 1
+            self.wrap_pending = False
+        elif ch == "\t":
+            self.x = min((t for t in self._tabs if t > self.x), default=self.cols - 1)
+            self.wrap_pending = False
+        elif ch == "\x0e":
+            self._shift_out = True
+        elif ch == "\x0f":
+            self._shift_out = False
+        # BEL and the rest are ignored
+
+    def _print(self, run: str):
+        if self._graphics[1 if self._shift_out else 0]:
+            run = run.translate(_DEC_GRAPHICS)
+        if run.isascii():
+            self._print_ascii(run)
+            return
+        for ch in run:
+            width = char_width(ch)
+            if width == 0:
+                continue
+            if self.wrap_pending or self.x + width > self.cols:
+                if not self.autowrap:
+                    self.x = self.cols - width
+                    self.wrap_pending = False
+                else:
+                    self._wrap()
+            line = self.lines[self.y]
+            if self.insert_mode:
+                self._insert_cells(width)
+            self._clear_wide(line, self.x, width)
+            line.chars[self.x] = ch
+            line.attrs[self.x] = self.attr
+            if width == 2 and self.x + 1 < self.cols:
+                line.chars[self.x + 1] = ""
+                line.attrs[self.x + 1] = self.attr
+            self.dirty.add(self.y)
+            self.x += width
+            if self.x >= self.cols:
+                self.x = self.cols - 1
+                self.wrap_pending = self.autowrap
+        return
+
+    def _print_ascii(self, run: str):
+        cols = self.cols
+        x, k = self.x, len(run)
+        if x + k < cols and not self.wrap_pending and not self.insert_mode:
+            # fits on the current line: the common case
+            line = self.lines[self.y]
+            chars = line.chars
+            if chars[x + k] != "" and (x == 0 or chars[x] != ""):
+                chars[x:x + k] = run
+                line.attrs[x:x + k] = [self.attr] * k
+                self.x = x + k
+                self.dirty.add(self.y)
+                return
+        while run:
+            if self.wrap_pending:
+                if self.autowrap:
+                    self._wrap()
+                else:
+                    self.wrap_pending = False
+            x = self.x
+            line = self.lines[self.y]
+            piece = run[: cols - x]
+            run = run[len(piece):]
+            k = len(piece)
+            if self.insert_mode:
+                self._insert_cells(k)
+            if x + k < cols and line.chars[x + k] == "":
+                line.chars[x + k] = " "
+            if x > 0 and line.chars[x] == "":
+                line.chars[x - 1] = " "
+            line.chars[x:x + k] = piece
+            line.attrs[x:x + k] = [self.attr] * k
+            self.dirty.add(self.y)
+            if x + k >= cols:
+                self.x = cols - 1
+                if self.autowrap:
+                    self.wrap_pending = True
+                elif run:
+                    # without autowrap the rest keeps overwriting the last cell
+                    line.chars[cols - 1] = run[-1]
+                    run = ""
+            else:
+                self.x = x + k
+
+    def _wrap(self):
+        self.lines[self.y].wrapped = True
+        self.x = 0
+        self.wrap_pending = False
+        self._index()
+
+    def _clear_wide(self, line: Line, x: int, width: int):
+        # overwriting half of a wide character blanks the other half
+        if line.chars[x] == "" and x > 0:
+            line.chars[x - 1] = " "
+        end = x + width
+        if end < self.cols and line.chars[end] == "":
+            line.chars[end] = " "
+
+    # ---- scrolling ----
+    def _blank(self) -> Line:
+        # erased cells take the current background (xterm "bce")
+        return Line(self.cols, DEFAULT_COLOR | (self.attr & _BG_MASK))
+
+    def _index(self):
+        self.wrap_pending = False
+        if self.y == self.bottom:
+            self.scroll_up(1)
+        elif self.y < self.rows - 1:
+            self.y += 1
+
+    def _reverse_index(self):
+        self.wrap_pending = False
+        if self.y == self.top:
+            self.scroll_down(1)
+        elif self.y > 0:
+            self.y -= 1
+
+    def scroll_up(self, n: int = 1, keep: bool = True):
+        """Scroll the region up; with ``keep`` lines leaving a full-height main screen go to history."""
+        top, bottom = self.top, self.bottom
+        n = min(n, bottom - top + 1)
+        lines = self.lines
+        gone = lines[top:top + n]
+        del lines[top:top + n]
+        for _ in range(n):
+            lines.insert(bottom - n + 1, self._blank())
+        if keep and top == 0 and not self.alt_screen:
+            self.history.extend(gone)
+        if len(self.dirty) < self.rows:
+            self.dirty.update(range(top, bottom + 1))
+
+    def scroll_down(self, n: int = 1):
+        top, bottom = self.top, self.bottom
+        n = min(n, bottom - top + 1)
+        lines = self.lines
+        del lines[bottom - n + 1:bottom + 1]
+        for _ in range(n):
+            lines.insert(top, self._blank())
+        self.dirty.update(range(top, bottom + 1))
+
+    # ---- escape sequences ----
+    def _escape(self, text: str, pos: int) -> int:
+        """Handle the sequence at ``pos``; returns where it ends, or -1 if incomplete."""
+        if pos + 1 >= len(text):
+            return -1
+        kind = text[pos + 1]
+        if kind == "[":
+            m = _CSI.match(text, pos)
+            if m is None:
+                # incomplete unless something that cannot be part of a CSI shows up
+                for i in range(pos + 2, len(text)):
+                    if not "\x20" <= text[i] <= "\x3f":
+                        return i  # malformed: skip up to the offending character
+                return -1
+            self._csi(m.group(1), m.group(2))
+            return m.end()
+        if kind in "]P_^":
+            m = _STRING.match(text, pos)
+            if m is None:
+                return -1
+            if kind == "]":
+                self._osc(m.group()[2:].rstrip("\x07").removesuffix("\x1b\\"))
+            return m.end()
+        m = _ESC.match(text, pos)
+        if m is None:
+            return -1 if all("\x20" <= c <= "\x2f" for c in text[pos + 1:]) else pos + 2
+        self._esc(m.group(1), m.group(2))
+        return m.end()
+
+    def _esc(self, intermediate: str, final: str):
+        if intermediate in ("(", ")"):
+            self._graphics[0 if intermediate == "(" else 1] = final == "0"
+        elif intermediate == "#":
+            if final == "8":  # DECALN: fill the screen with E
+                for line in self.lines:
+                    line.chars[:] = ["E"] * self.cols
+                    line.attrs[:] = [DEFAULT_ATTR] * self.cols
+                self.dirty.update(range(self.rows))
+        elif intermediate:
+            return
+        elif final == "7":
+            self._save_cursor()
+        elif final == "8":
+            self._restore_cursor()
+        elif final == "D":
+            self._index()
+        elif final == "E":
+            self.x = 0
+            self._index()
+        elif final == "M":
+            self._reverse_index()
+        elif final == "H":
+            self._tabs.add(self.x)
+        elif final == "c":
+            self.reset()
+        elif final == "=":
+            self.app_keypad = True
+        elif final == ">":
+            self.app_keypad = False
+
+    def _osc(self, body: str):
+        code, _, value = body.partition(";")
+        if code in ("0", "2"):
+            self.title = value
+
+    def _csi(self, params: str, final: str):
+        private = ""
+        if params and params[0] in "?>=<":
+            private, params = params[0], params[1:]
+        if ":" in params:
+            params = params.replace(":", ";")
+        args = [int(p) if p.isdigit() else 0 for p in params.split(";")] if params else []
+
+        def arg(i: int = 0, default: int = 1) -> int:
+            value = args[i] if i < len(args) else 0
+            return value or default
+
+        if final == "m":
+            if not private:
+                self._sgr(args)
+            return
+        if final in "hl":
+            self._set_modes(private, args, final == "h")
+            return
+        if private == ">" or private == "=":
+            if final == "c" and self.reply is not None:
+                self.reply("\x1b[>0;276;0c")
+            return
+
+        x, y = self.x, self.y
+        self.wrap_pending = False
+        if final == "A":
+            self.y = max(y - arg(), self.top if y >= self.top else 0)
+        elif final in "Be":
+            self.y = min(y + arg(), self.bottom if y <= self.bottom else self.rows - 1)
+        elif final in "Ca":
+            self.x = min(x + arg(), self.cols - 1)
+        elif final == "D":
+            self.x = max(x - arg(), 0)
+        elif final == "E":
+            self.y = min(y + arg(), self.bottom if y <= self.bottom else self.rows - 1)
+            self.x = 0
+        elif final == "F":
+            self.y = max(y - arg(), self.top if y >= self.top else 0)
+            self.x = 0
+        elif final in "G`":
+            self.x = min(arg() - 1, self.cols - 1)
+        elif final in "Hf":
+            self._goto(arg(1) - 1, arg(0) - 1)
+        elif final == "d":
+            self._goto(self.x, arg() - 1)
+        elif final == "J":
+            self._erase_display(arg(0, 0))
+        elif final == "K":
+            self._erase_line(arg(0, 0))
+        elif final == "X":
+            self._fill(y, x, x + min(arg(), self.cols - x))
+        elif final == "@":
+            self._insert_cells(arg())
+        elif final == "P":
+            self._delete_cells(arg())
+        elif final == "L":
+            self._insert_lines(arg())
+        elif final == "M":
+            self._delete_lines(arg())
+        elif final == "S":
+            self.scroll_up(arg())
+        elif final == "T" and not private:
+            self.scroll_down(arg())
+        elif final == "r" and not private:
+            top, bottom = arg(0) - 1, arg(1, self.rows) - 1
+            if 0 <= top < bottom < self.rows:
+                self.top, self.bottom = top, bottom
+                self._goto(0, 0)
+        elif final == "s" and not private:
+            self._save_cursor()
+        elif final == "u" and not private:
+            self._restore_cursor()
+        elif final == "g":
+            if arg(0, 0) == 3:
+                self._tabs.clear()
+            else:
+                self._tabs.discard(x)
+        elif final == "n" and self.reply is not None:
+            if arg(0, 0) == 6:
+                row = y - self.top if self.origin_mode else y
+                self.reply(f"\x1b[{private}{row + 1};{self.x + 1}R")
+            elif arg(0, 0) == 5:
+                self.reply("\x1b[0n")
+        elif final == "c" and self.reply is not None and arg(0, 0) == 0:
+            self.reply("\x1b[?1;2c")
+        if self.y != y or self.x != x:
+            self.dirty.add(y)
+            self.dirty.add(self.y)
+
+    def _goto(self, x: int, y: int):
+        if self.origin_mode:
+            y = min(max(y + self.top, self.top), self.bottom)
+        self.x = min(max(x, 0), self.cols - 1)
+        self.y = min(max(y, 0), self.rows - 1)
+        self.wrap_pending = False
+
+    def _fill(self, y: int, start: int, end: int):
+        if end <= start:
+            return
+        line = self.lines[y]
+        blank_attr = DEFAULT_COLOR | (self.attr & _BG_MASK)
+        if start > 0 and line.chars[start] == "":
+            line.chars[start - 1] = " "
+        if end < self.cols and line.chars[end] == "":
+            line.chars[end] = " "
+        line.chars[start:end] = [" "] * (end - start)
+        line.attrs[start:end] = [blank_attr] * (end - start)
+        line.wrapped = False
+        self.dirty.add(y)
+
+    def _erase_display(self, mode: int):
+        if mode == 0:
+            self._erase_line(0)
+            rows = range(self.y + 1, self.rows)
+        elif mode == 1:
+            self._erase_line(1)
+            rows = range(0, self.y)
+        elif mode == 2:
+            rows = range(self.rows)
+        else:
+            if not self.alt_screen:
+                self.history.clear()
+            return
+        for y in rows:
+            self.lines[y] = self._blank()
+            self.dirty.add(y)
+
+    def _erase_line(self, mode: int):
+        if mode == 0:
+            self._fill(self.y, self.x, self.cols)
+        elif mode == 1:
+            self._fill(self.y, 0, self.x + 1)
+        else:
+            self._fill(self.y, 0, self.cols)
+
+    def _insert_cells(self, n: int):
+        line, x = self.lines[self.y], self.x
+        n = min(n, self.cols - x)
+        blank_attr = DEFAULT_COLOR | (self.attr & _BG_MASK)
+        line.chars[x:x] = [" "] * n
+        line.attrs[x:x] = [blank_attr] * n
+        del line.chars[self.cols:]
+        del line.attrs[self.cols:]
+        self.dirty.add(self.y)
+
+    def _delete_cells(self, n: int):
+        line, x = self.lines[self.y], self.x
+        n = min(n, self.cols - x)
+        blank_attr = DEFAULT_COLOR | (self.attr & _BG_MASK)
+        del line.chars[x:x + n]
+        del line.attrs[x:x + n]
+        line.chars.extend(" " * n)
+        line.attrs.extend([blank_attr] * n)
+        self.dirty.add(self.y)
+
+    def _insert_lines(self, n: int):
+        if not self.top <= self.y <= self.bottom:
+            return
+        top = self.top
+        self.top = self.y
+        self.scroll_down(n)
+        self.top = top
+        self.x = 0
+
+    def _delete_lines(self, n: int):
+        if not self.top <= self.y <= self.bottom:
+            return
+        top = self.top
+        self.top = self.y
+        self.scroll_up(n, keep=False)
+        self.top = top
+        self.x = 0
+
+    def _save_cursor(self):
+        state = (self.x, self.y, self.attr, self.origin_mode, self.autowrap, list(self._graphics), self._shift_out)
+        if self.alt_screen:
+            self._saved_alt = state
+        else:
+            self._saved = state
+
+    def _restore_cursor(self):
+        state = self._saved_alt if self.alt_screen else self._saved
+        if state is None:
+            self._goto(0, 0)
+            return
+        self.dirty.add(self.y)
+        x, y, self.attr, self.origin_mode, self.autowrap, graphics, self._shift_out = state
+        self._graphics = list(graphics)
+        self.x, self.y = min(x, self.cols - 1), min(y, self.rows - 1)
+        self.wrap_pending = False
+        self.dirty.add(self.y)
+
+    def _set_modes(self, private: str, args: list[int], on: bool):
+        for mode in args:
+            if private != "?":
+                if mode == 4:
+                    self.insert_mode = on
+                continue
+            if mode == 1:
+                self.app_cursor_keys = on
+            elif mode == 6:
+                self.origin_mode = on
+                self._goto(0, 0)
+            elif mode == 7:
+                self.autowrap = on
+            elif mode == 25:
+                self.cursor_visible = on
+                self.dirty.add(self.y)
+            elif mode in (47, 1047, 1049):
+                self._switch_screen(on, save_cursor=mode == 1049)
+            elif mode == 2004:
+                self.bracketed_paste = on
+
+    def _switch_screen(self, alt: bool, save_cursor: bool):
+        if alt == self.alt_screen:
+            return
+        if alt:
+            if save_cursor:
+                self._save_cursor()
+            self._alt = [Line(self.cols) for _ in range(self.rows)]
+            self.lines = self._alt
+            self.alt_screen = True
+        else:
+            self.lines = self._main
+            self.alt_screen = False
+            if save_cursor:
+                self._restore_cursor()
+        self.top, self.bottom = 0, self.rows - 1
+        self.dirty = set(range(self.rows))
+
+    # ---- attributes ----
+    def _sgr_cached(self, params: str):
+        key = (params, self.attr)
+        attr = _SGR_CACHE.get(key)
+        if attr is None:
+            self._csi(params, "m")
+            if len(_SGR_CACHE) > 4096:
+                _SGR_CACHE.clear()
+            _SGR_CACHE[key] = self.attr
+        else:
+            self.attr = attr
+
+    def _sgr(self, args: list[int]):
+        if not args:
+            args = [0]
+        attr = self.attr
+        i, n = 0, len(args)
+        while i < n:
+            code = args[i]
+            if code == 0:
+                attr = DEFAULT_ATTR
+            elif code == 1:
+                attr |= BOLD
+            elif code == 2:
+                attr |= DIM
+            elif code == 3:
+                attr |= ITALIC
+            elif code == 4:
+                attr |= UNDERLINE
+            elif code == 7:
+                attr |= REVERSE
+            elif code == 8:
+                attr |= INVISIBLE
+            elif code == 9:
+                attr |= STRIKE
+            elif code in (21, 22):
+                attr &= ~(BOLD | DIM)
+            elif code == 23:
+                attr &= ~ITALIC
+            elif code == 24:
+                attr &= ~UNDERLINE
+            elif code == 27:
+                attr &= ~REVERSE
+            elif code == 28:
+                attr &= ~INVISIBLE
+            elif code == 29:
+                attr &= ~STRIKE
+            elif 30 <= code <= 37:
+                attr = (attr & ~_FG_MASK) | (code - 30)
+            elif code == 39:
+                attr = (attr & ~_FG_MASK) | DEFAULT_COLOR
+            elif 40 <= code <= 47:
+                attr = (attr & ~_BG_MASK) | ((code - 40) << 9)
+            elif code == 49:
+                attr = (attr & ~_BG_MASK) | (DEFAULT_COLOR << 9)
+            elif 90 <= code <= 97:
+                attr = (attr & ~_FG_MASK) | (code - 90 + 8)
+            elif 100 <= code <= 107:
+                attr = (attr & ~_BG_MASK) | ((code - 100 + 8) << 9)
+            elif code in (38, 48) and i + 1 < n:
+                color = None
+                if args[i + 1] == 5 and i + 2 < n:
+                    color = min(args[i + 2], 255)
+                    i += 2
+                elif args[i + 1] == 2 and i + 4 < n:
+                    color = rgb_to_index(*args[i + 2:i + 5])
+                    i += 4
+                if color is not None:
+                    if code == 38:
+                        attr = (attr & ~_FG_MASK) | color
+                    else:
+                        attr = (attr & ~_BG_MASK) | (color << 9)
+            i += 1
+        self.attr = attr
+
+
+def rgb_to_index(r: int, g: int, b: int) -> int:
+    """Nearest xterm-256 color for a 24-bit one."""
+    def level(v: int) -> int:
+        return 0 if v < 48 else 1 if v < 115 else (v - 35) // 40
+
+    r, g, b = (min(max(v, 0), 255) for v in (r, g, b))
+    if r == g == b:
+        if r < 8:
+            return 16
+        if r > 238:
+            return 231
+        return 232 + (r - 8) // 10
+    return 16 + 36 * level(r) + 6 * level(g) + level(b)
@@ -0,0 +1,128 @@
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity (timestamp, value) buffer backed by NumPy arrays.
+
+    Appends are O(1) and never reallocate; once full the oldest sample is
+    overwritten.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._t = np.zeros(capacity, dtype=np.float64)
+        self._v = np.zeros(capacity, dtype=np.float64)
+        self._head = 0  # next write position
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+    def append(self, t: float, value: float):
+        self._t[self._head] = t
+        self._v[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def last(self) -> tuple[float, float] | None:
+        if not self._size:
+            return None
+        idx = (self._head - 1) % self.capacity
+        return float(self._t[idx]), float(self._v[idx])
+
+    def arrays(self, count: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Return copies of the newest ``count`` samples in chronological order."""
+        n = self._size if count is None else max(min(count, self._size), 0)
+        start = (self._head - n) % self.capacity
+        if start + n <= self.capacity:
+            return self._t[start:start + n].copy(), self._v[start:start + n].copy()
+        first = self.capacity - start
+        return (
+            np.concatenate((self._t[start:], self._t[: n - first])),
+            np.concatenate((self._v[start:], self._v[: n - first])),
+        )
+
+
+# (bucket seconds, number of buckets): 1 h at 1 s, 6 h at 10 s, 24 h at 1 min.
+DEFAULT_RESOLUTIONS = ((1.0, 3600), (10.0, 2160), (60.0, 1440))
+
+
+class MetricHistory:
+    """One metric kept at several resolutions in constant memory.
+
+    Every sample is averaged into the current bucket of each resolution;
+    a bucket is committed to that resolution's ring buffer when a sample
+    lands in a later bucket. ``series`` includes the still-open bucket, so
+    the newest point is never held back.
+    """
+
+    def __init__(self, resolutions=DEFAULT_RESOLUTIONS):
+        self.resolutions = tuple(float(step) for step, _ in resolutions)
+        self._rings = {float(step): RingBuffer(size) for step, size in resolutions}
+        # step -> [bucket index, sum, count]
+        self._pending = {step: [None, 0.0, 0] for step in self.resolutions}
+
+    def clear(self):
+        for ring in self._rings.values():
+            ring.clear()
+        for pending in self._pending.values():
+            pending[:] = [None, 0.0, 0]
+
+    def append(self, t: float, value: float | None):
+        if value is None:
+            return
+        for step in self.resolutions:
+            bucket = int(t // step)
+            pending = self._pending[step]
+            if pending[0] is not None and bucket != pending[0] and pending[2]:
+                self._rings[step].append(pending[0] * step, pending[1] / pending[2])
+                pending[1] = 0.0
+                pending[2] = 0
+            pending[0] = bucket
+            pending[1] += value
+            pending[2] += 1
+
+    def resolution_for(self, span: float, max_points: int = 600) -> float:
+        """Finest resolution that covers ``span`` seconds in at most ``max_points`` points."""
+        for step in self.resolutions:
+            if span / step <= max_points and step * self._rings[step].capacity >= span:
+                return step
+        return self.resolutions[-1]
+
+    def series(self, step: float | None = None, span: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Timestamps and values at resolution ``step`` covering the last ``span`` seconds."""
+        if step is None:
+            step = self.resolutions[0] if span is None else self.resolution_for(span)
+        ring = self._rings[step]
+        count = None if span is None else int(span // step) + 1
+        t, v = ring.arrays(count)
+        bucket, total, n = self._pending[step]
+        if n:
+            t = np.append(t, bucket * step)
+            v = np.append(v, total / n)
+        if span is not None and len(t):
+            keep = t >= t[-1] - span
+            t, v = t[keep], v[keep]
+        return t, v
+
+    def latest(self) -> float | None:
+        step = self.resolutions[0]
+        bucket, total, n = self._pending[step]
+        if n:
+            return total / n
+        last = self._rings[step].last()
+        return None if last is None else last[1]
+
+    def summary(self, span: float) -> tuple[float, float] | None:
+        """``(mean, max)`` over the last ``span`` seconds, or None without data."""
+        _, v = self.series(span=span)
+        if not len(v):
+            return None
+        return float(v.mean()), float(v.max())
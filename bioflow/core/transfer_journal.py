@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".bioflow", "transfers")
+
+
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge overlapping or touching ``(start, end)`` half-open ranges."""
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class TransferJournal:
+    """On-disk record of the byte ranges of one file that have already moved.
+
+    The journal is keyed by (direction, host, remote path, local path) and
+    remembers the source size and mtime; if the source changed since the
+    journal was written, the recorded ranges are thrown away. Every
+    completed range is persisted immediately (write to a temp file, then
+    atomic replace), so a crash or dropped VPN loses at most the ranges
+    that were in flight.
+    """
+
+    def __init__(self, path: str, meta: dict, completed: list[tuple[int, int]] | None = None):
+        self.path = path
+        self.meta = meta
+        self.completed = merge_ranges(completed or [])
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(
+        cls,
+        direction: str,
+        host: str,
+        remote_path: str,
+        local_path: str,
+        size: int,
+        source_mtime: float | None,
+        root: str = JOURNAL_DIR,
+    ) -> "TransferJournal":
+        key = "\0".join((direction, host, remote_path, os.path.abspath(local_path)))
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json"
+        meta = {
+            "direction": direction,
+            "host": host,
+            "remote_path": remote_path,
+            "local_path": os.path.abspath(local_path),
+            "size": size,
+            "source_mtime": int(source_mtime) if source_mtime is not None else None,
+        }
+        path = os.path.join(root, name)
+        completed = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("meta") == meta:
+                completed = [tuple(r) for r in data.get("completed", [])]
+        except (OSError, ValueError):
+            pass
+        return cls(path, meta, completed)
+
+    @property
+    def done_bytes(self) -> int:
+        with self._lock:
+            return sum(end - start for start, end in self.completed)
+
+    def missing(self, ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """Subset of ``(offset, length)`` ranges not fully covered by the journal."""
+        with self._lock:
+            completed = list(self.completed)
+        out = []
+        for offset, length in ranges:
+            end = offset + length
+            if not any(start <= offset and end <= stop for start, stop in completed):
+                out.append((offset, length))
+        return out
+
+    def mark_done(self, offset: int, length: int):
+        with self._lock:
+            self.completed = merge_ranges(self.completed + [(offset, offset + length)])
+            self._save_locked()
+
+    def reset(self):
+        with self._lock:
+            self.completed = []
+            self._save_locked()
+
+    def discard(self):
+        with self._lock:
+            self.completed = []
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def _save_locked(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"meta": self.meta, "completed": self.completed}, f)
+        os.replace(tmp, self.path)
@@ -0,0 +1,281 @@
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QSpinBox,
+    QSplitter,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+)
+from PySide6.QtCore import Qt, QObject, QThread, Signal, QRectF
+from PySide6.QtGui import QColor, QPainter
+import threading
+import time
+from bioflow.core.metrics import ClusterCollector, NodeStatus, expand_hostlist
+
+
+COLUMNS = ["Node", "CPU %", "Load1", "Mem %", "Disk %", "Down", "Up", "Updated"]
+HEATMAP_COLUMNS = ["CPU", "Mem", "Disk"]
+STALE_COLOR = QColor("#9CA3AF")
+
+
+def _usage_color(value: float) -> QColor:
+    """Green -> amber -> red for 0..100 %."""
+    value = max(0.0, min(100.0, value))
+    low, mid, high = QColor("#10B981"), QColor("#F59E0B"), QColor("#EF4444")
+    if value <= 50:
+        a, b, t = low, mid, value / 50.0
+    else:
+        a, b, t = mid, high, (value - 50.0) / 50.0
+    return QColor(
+        int(a.red() + (b.red() - a.red()) * t),
+        int(a.green() + (b.green() - a.green()) * t),
+        int(a.blue() + (b.blue() - a.blue()) * t),
+    )
+
+
+def _fmt_rate(rate: float | None) -> str:
+    if rate is None:
+        return "-"
+    return f"{rate / (1024 * 1024):.2f} MB/s"
+
+
+def _fmt_pct(value: float | None) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+class HeatmapWidget(QWidget):
+    """Node x metric grid, one colored cell per usage percentage."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: list[tuple[str, list[float | None], bool]] = []
+        self.setMinimumWidth(180)
+
+    def set_rows(self, rows: list[tuple[str, list[float | None], bool]]):
+        self._rows = rows
+        self.setMinimumHeight(20 + 16 * len(rows))
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        fm = painter.fontMetrics()
+        label_w = max([fm.horizontalAdvance(name) for name, _, _ in self._rows] + [40]) + 8
+        header_h = fm.height() + 4
+        cols = len(HEATMAP_COLUMNS)
+        cell_w = max((self.width() - label_w) / cols, 1.0)
+        cell_h = max(min((self.height() - header_h) / max(len(self._rows), 1), 24.0), 4.0)
+
+        for c, title in enumerate(HEATMAP_COLUMNS):
+            rect = QRectF(label_w + c * cell_w, 0, cell_w, header_h)
+            painter.drawText(rect, Qt.AlignCenter, title)
+
+        for r, (name, values, stale) in enumerate(self._rows):
+            y = header_h + r * cell_h
+            if cell_h >= fm.height():
+                painter.drawText(QRectF(0, y, label_w - 4, cell_h), Qt.AlignRight | Qt.AlignVCenter, name)
+            for c, value in enumerate(values):
+                rect = QRectF(label_w + c * cell_w + 1, y + 1, cell_w - 2, cell_h - 2)
+                if value is None or stale:
+                    color = STALE_COLOR
+                else:
+                    color = _usage_color(value)
+                painter.fillRect(rect, color)
+                if value is not None and cell_h >= fm.height():
+                    painter.setPen(QColor("#111827"))
+                    painter.drawText(rect, Qt.AlignCenter, f"{value:.0f}")
+                    painter.setPen(self.palette().windowText().color())
+        painter.end()
+
+
+class ClusterPollWorker(QObject):
+    statuses_ready = Signal(object)
+    finished = Signal()
+
+    def __init__(self, collector: ClusterCollector, interval: float):
+        super().__init__()
+        self.collector = collector
+        self.interval = interval
+        self._cancel = threading.Event()
+
+    def stop(self):
+        self._cancel.set()
+
+    def run(self):
+        while not self._cancel.is_set():
+            started = time.monotonic()
+            try:
+                self.statuses_ready.emit(self.collector.poll())
+            except Exception:
+                pass
+            self._cancel.wait(max(self.interval - (time.monotonic() - started), 0.1))
+        self.collector.close()
+        self.finished.emit()
+
+
+class ClusterMetricsView(QWidget):
+    """Fan-out CPU / memory / network / disk dashboard for compute nodes."""
+
+    def __init__(self, ssh_client=None, parent=None):
+        super().__init__(parent)
+        self.ssh_client = ssh_client
+        self.poll_thread: QThread | None = None
+        self.poll_worker: ClusterPollWorker | None = None
+        self._rows: dict[str, int] = {}
+        self.stale_after = 15.0
+        self.setWindowTitle("Cluster nodes")
+        self.resize(900, 560)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 12, 12, 12)
+        layout.setSpacing(8)
+
+        controls = QHBoxLayout()
+        self.nodes_edit = QLineEdit()
+        self.nodes_edit.setPlaceholderText("Nodes, e.g. node[01-40], gpu01")
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(1, 300)
+        self.interval_spin.setValue(5)
+        self.interval_spin.setSuffix(" s")
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 64)
+        self.concurrency_spin.setValue(8)
+        self.concurrency_spin.setPrefix("parallel ")
+        self.start_btn = QPushButton("Start")
+        self.stop_btn = QPushButton("Stop")
+        self.stop_btn.setEnabled(False)
+        self.summary_label = QLabel("")
+        self.summary_label.setStyleSheet("color: #6B7280;")
+        controls.addWidget(self.nodes_edit, 1)
+        controls.addWidget(self.interval_spin)
+        controls.addWidget(self.concurrency_spin)
+        controls.addWidget(self.start_btn)
+        controls.addWidget(self.stop_btn)
+        layout.addLayout(controls)
+        layout.addWidget(self.summary_label)
+
+        splitter = QSplitter(Qt.Horizontal)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.heatmap = HeatmapWidget()
+        splitter.addWidget(self.table)
+        splitter.addWidget(self.heatmap)
+        splitter.setSizes([600, 300])
+        layout.addWidget(splitter, 1)
+
+        self.start_btn.clicked.connect(self.start)
+        self.stop_btn.clicked.connect(self.stop)
+        self.nodes_edit.returnPressed.connect(self.start)
+
+    def start(self):
+        if self.poll_thread is not None:
+            return
+        if not self.ssh_client or not getattr(self.ssh_client, "client", None):
+            self.summary_label.setText("Not connected")
+            return
+        nodes = expand_hostlist(self.nodes_edit.text())
+        if not nodes:
+            return
+        interval = float(self.interval_spin.value())
+        self.stale_after = max(3 * interval, 15.0)
+        collector = ClusterCollector(
+            self.ssh_client,
+            nodes,
+            max_workers=self.concurrency_spin.value(),
+            timeout=max(min(interval, 10.0), 3.0),
+            stale_after=self.stale_after,
+        )
+        self._reset_rows(nodes)
+
+        self.poll_thread = QThread()
+        self.poll_worker = ClusterPollWorker(collector, interval)
+        self.poll_worker.moveToThread(self.poll_thread)
+        self.poll_thread.started.connect(self.poll_worker.run)
+        self.poll_worker.statuses_ready.connect(self._apply_statuses)
+        self.poll_worker.finished.connect(self.poll_thread.quit)
+        self.poll_worker.finished.connect(self.poll_worker.deleteLater)
+        self.poll_thread.finished.connect(self._cleanup_thread)
+        self.poll_thread.start()
+        self.start_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.summary_label.setText(f"Polling {len(nodes)} nodes…")
+
+    def stop(self):
+        if self.poll_worker is not None:
+            self.poll_worker.stop()
+        self.stop_btn.setEnabled(False)
+
+    def _cleanup_thread(self):
+        if self.poll_thread is not None:
+            self.poll_thread.deleteLater()
+        self.poll_thread = None
+        self.poll_worker = None
+        self.start_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+
+    def closeEvent(self, event):
+        self.stop()
+        super().closeEvent(event)
+
+    def _reset_rows(self, nodes: list[str]):
+        self.table.setRowCount(len(nodes))
+        self._rows = {}
+        for row, node in enumerate(nodes):
+            self._rows[node] = row
+            self.table.setItem(row, 0, QTableWidgetItem(node))
+            for col in range(1, len(COLUMNS)):
+                self.table.setItem(row, col, QTableWidgetItem("-"))
+        self.heatmap.set_rows([(node, [None] * len(HEATMAP_COLUMNS), True) for node in nodes])
+
+    def _set_cell(self, row: int, col: int, text: str, color: QColor | None = None):
+        item = self.table.item(row, col)
+        if item is None:
+            item = QTableWidgetItem()
+            self.table.setItem(row, col, item)
+        if item.text() != text:
+            item.setText(text)
+        if color is not None:
+            item.setForeground(color)
+
+    def _apply_statuses(self, statuses: list[NodeStatus]):
+        now = time.time()
+        heat_rows = []
+        stale_count = 0
+        for status in statuses:
+            row = self._rows.get(status.node)
+            if row is None:
+                continue
+            stale = status.is_stale(self.stale_after, now)
+            stale_count += stale
+            snap = status.snapshot
+            color = STALE_COLOR if stale else self.palette().text().color()
+            values = [None] * len(HEATMAP_COLUMNS)
+            if snap is not None:
+                values = [snap.cpu_percent, snap.mem_percent, snap.disk_percent]
+                self._set_cell(row, 1, _fmt_pct(snap.cpu_percent), color)
+                self._set_cell(row, 2, "-" if snap.load1 is None else f"{snap.load1:.2f}", color)
+                self._set_cell(row, 3, _fmt_pct(snap.mem_percent), color)
+                self._set_cell(row, 4, _fmt_pct(snap.disk_percent), color)
+                self._set_cell(row, 5, _fmt_rate(snap.net_rx_rate), color)
+                self._set_cell(row, 6, _fmt_rate(snap.net_tx_rate), color)
+            if status.last_ok is None:
+                updated = status.error or "-"
+            else:
+                updated = f"{now - status.last_ok:.0f}s ago"
+                if stale:
+                    updated += " (stale)"
+            self._set_cell(row, 7, updated, color)
+            self.table.item(row, 7).setToolTip(status.error or "")
+            heat_rows.append((status.node, values, stale))
+        self.heatmap.set_rows(heat_rows)
+        self.summary_label.setText(
+            f"{len(statuses) - stale_count}/{len(statuses)} nodes up to date"
+            + (f", {stale_count} stale" if stale_count else "")
+        )
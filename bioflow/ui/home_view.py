@@ -1,7 +1,17 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QGroupBox
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QGroupBox, QComboBox
 from PySide6.QtCharts import QChart, QChartView, QLineSeries, QValueAxis
 from PySide6.QtCore import QTimer, QPointF, Qt
+import time
 import psutil
+from bioflow.core.timeseries import MetricHistory
+
+# label, span in seconds
+CHART_WINDOWS = (
+    ("Last 1 min", 60),
+    ("Last 10 min", 600),
+    ("Last 1 h", 3600),
+    ("Last 24 h", 86400),
+)
 
 class HomeView(QWidget):
     def __init__(self):
@@ -29,14 +39,24 @@ class HomeView(QWidget):
         servers_layout = QVBoxLayout(servers_group)
         servers_layout.addWidget(QLabel("No servers configured"))
         layout.addWidget(servers_group)
+        window_row = QHBoxLayout()
+        window_row.addStretch(1)
+        self.window_selector = QComboBox()
+        for label, span in CHART_WINDOWS:
+            self.window_selector.addItem(label, span)
+        self.window_selector.currentIndexChanged.connect(self._redraw_charts)
+        window_row.addWidget(self.window_selector)
+        layout.addLayout(window_row)
+        self.cpu_history = MetricHistory()
+        self.mem_history = MetricHistory()
         charts_row = QHBoxLayout()
         self.cpu_series = QLineSeries()
         self.cpu_chart = QChart()
         self.cpu_chart.addSeries(self.cpu_series)
         self.cpu_chart.setTitle("CPU Usage (%)")
         self.cpu_axis_x = QValueAxis()
-        self.cpu_axis_x.setRange(0, 60)
-        self.cpu_axis_x.setLabelFormat("%d")
+        self.cpu_axis_x.setRange(-1, 0)
+        self.cpu_axis_x.setLabelFormat("%.0f")
         self.cpu_axis_y = QValueAxis()
         self.cpu_axis_y.setRange(0, 100)
         self.cpu_axis_y.setLabelFormat("%d")
@@ -51,8 +71,8 @@ class HomeView(QWidget):
         self.mem_chart.addSeries(self.mem_series)
         self.mem_chart.setTitle("Memory Usage (%)")
         self.mem_axis_x = QValueAxis()
-        self.mem_axis_x.setRange(0, 60)
-        self.mem_axis_x.setLabelFormat("%d")
+        self.mem_axis_x.setRange(-1, 0)
+        self.mem_axis_x.setLabelFormat("%.0f")
         self.mem_axis_y = QValueAxis()
         self.mem_axis_y.setRange(0, 100)
         self.mem_axis_y.setLabelFormat("%d")
@@ -70,18 +90,22 @@ class HomeView(QWidget):
         self.timer.timeout.connect(self.update_stats)
         self.timer.start(1000)
 
-    def _append_point(self, series, value):
-        if series.count() >= 60:
-            points = [series.at(i) for i in range(series.count())][1:]
-            series.clear()
-            for idx, p in enumerate(points):
-                series.append(QPointF(idx, p.y()))
-            series.append(QPointF(59, value))
-        else:
-            series.append(QPointF(series.count(), value))
+    def _draw_series(self, series, axis_x, history, span):
+        """Replace the whole series in one call; x is minutes before now."""
+        t, v = history.series(span=span)
+        now = time.time()
+        x = (t - now) / 60.0
+        series.replace([QPointF(float(a), float(b)) for a, b in zip(x, v)])
+        axis_x.setRange(-span / 60.0, 0)
+        axis_x.setLabelFormat("%.1f" if span <= 600 else "%.0f")
+
+    def _redraw_charts(self):
+        span = self.window_selector.currentData() or 60
+        self._draw_series(self.cpu_series, self.cpu_axis_x, self.cpu_history, span)
+        self._draw_series(self.mem_series, self.mem_axis_x, self.mem_history, span)
 
     def update_stats(self):
-        cpu = psutil.cpu_percent(interval=None)
-        mem = psutil.virtual_memory().percent
-        self._append_point(self.cpu_series, cpu)
-        self._append_point(self.mem_series, mem)
+        now = time.time()
+        self.cpu_history.append(now, psutil.cpu_percent(interval=None))
+        self.mem_history.append(now, psutil.virtual_memory().percent)
+        self._redraw_charts()
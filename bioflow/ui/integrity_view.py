@@ -0,0 +1,262 @@
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QComboBox,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QFileDialog,
+)
+from PySide6.QtCore import QObject, QThread, Signal
+from PySide6.QtGui import QColor
+import posixpath
+import threading
+from bioflow.core.integrity import (
+    ALGORITHMS,
+    ERROR,
+    MISMATCH,
+    MISSING,
+    OK,
+    IntegrityService,
+    ManifestEntry,
+    VerifyResult,
+)
+from bioflow.core.ssh_client import ExecCancelled
+
+STATUS_COLORS = {OK: "#059669", MISMATCH: "#DC2626", MISSING: "#D97706", ERROR: "#DC2626"}
+
+
+class IntegrityWorker(QObject):
+    """Runs one checksum job at a time off the GUI thread."""
+    result = Signal(object)              # VerifyResult
+    done = Signal(str)                   # error text ("" if ok)
+    finished = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._cancel = threading.Event()
+        self._job = None
+
+    def submit(self, func, *args):
+        """Run ``func(*args, on_result=..., cancel_event=...)`` next."""
+        with self._lock:
+            self._job = (func, args)
+        self._cancel.set()
+        self._wake.set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def stop(self):
+        self._stop.set()
+        self._cancel.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            with self._lock:
+                self._wake.clear()
+                job, self._job = self._job, None
+                self._cancel.clear()
+            if job is None:
+                continue
+            func, args = job
+            try:
+                func(*args, on_result=self.result.emit, cancel_event=self._cancel)
+                error = ""
+            except ExecCancelled:
+                error = ""
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            if not self._stop.is_set():
+                self.done.emit(error)
+        self.finished.emit()
+
+
+class IntegrityPanel(QWidget):
+    """Checksums of remote files: verify a facility manifest, or hash a selection.
+
+    With a manifest the listed files are checked on the server, and on
+    request against a local copy of the delivery. Without one the selected
+    files are hashed on the server; those digests can then be checked
+    against a local folder or saved as a manifest.
+    """
+
+    def __init__(self, service: IntegrityService, manifest: str | None = None,
+                 paths: list[str] | None = None, base_dir: str = "", parent=None):
+        super().__init__(parent)
+        self.service = service
+        self.manifest = manifest
+        self.paths = paths or []
+        self.base_dir = posixpath.dirname(manifest) if manifest else base_dir
+        self.entries: list[ManifestEntry] = []
+        self._counts: dict[str, int] = {}
+        self._running = False
+        self._closed = False
+        self.setWindowTitle(f"Checksums · {posixpath.basename(manifest) if manifest else self.base_dir}")
+        self.resize(900, 520)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(6)
+
+        row = QHBoxLayout()
+        self.algo_combo = QComboBox()
+        for algo in ALGORITHMS:
+            self.algo_combo.addItem(algo)
+        self.remote_btn = QPushButton("Verify server copy" if manifest else "Hash on server")
+        self.local_btn = QPushButton("Verify local copy…")
+        self.save_btn = QPushButton("Save manifest…")
+        self.cancel_btn = QPushButton("Cancel")
+        if manifest:
+            self.algo_combo.setVisible(False)
+            self.save_btn.setVisible(False)
+        else:
+            row.addWidget(self.algo_combo)
+        for w in (self.remote_btn, self.local_btn, self.save_btn):
+            row.addWidget(w)
+        row.addStretch(1)
+        row.addWidget(self.cancel_btn)
+        layout.addLayout(row)
+
+        self.results = QTreeWidget()
+        self.results.setHeaderLabels(["File", "Status", "Expected", "Actual"])
+        self.results.setRootIsDecorated(False)
+        self.results.setUniformRowHeights(True)
+        self.results.header().resizeSection(0, 300)
+        self.results.header().resizeSection(1, 80)
+        layout.addWidget(self.results, 1)
+
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #6B7280; font-size: 11px;")
+        layout.addWidget(self.status_label)
+
+        self.worker = IntegrityWorker()
+        # not parented to the panel: a closed panel lives on until the worker is out of its job
+        self.worker_thread = QThread()
+        self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.result.connect(self._on_result)
+        self.worker.done.connect(self._on_done)
+        self.worker.finished.connect(self.worker_thread.quit)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker_thread.finished.connect(self._on_thread_finished)
+        self.worker_thread.start()
+
+        self.remote_btn.clicked.connect(self.verify_remote)
+        self.local_btn.clicked.connect(self.verify_local)
+        self.save_btn.clicked.connect(self.save_manifest)
+        self.cancel_btn.clicked.connect(self.worker.cancel)
+        self.verify_remote()
+
+    # ---- jobs ----
+    def _start(self, text: str, func, *args):
+        self.results.clear()
+        self._counts = {}
+        self._running = True
+        self._update_buttons()
+        self.status_label.setText(text)
+        self.worker.submit(func, *args)
+
+    def verify_remote(self):
+        if self.manifest:
+            self._start(f"Checking {self.manifest} on the server…", self._remote_manifest_job, self.manifest)
+        else:
+            self._start("Hashing on the server…", self._hash_job, list(self.paths), self.algo_combo.currentText())
+
+    def verify_local(self):
+        if not self.entries:
+            return
+        local_dir = QFileDialog.getExistingDirectory(self, "Local copy of " + self.base_dir)
+        if not local_dir:
+            return
+        self._start(f"Checking local copy in {local_dir}…", self.service.verify_local, list(self.entries), local_dir)
+
+    # these run on the worker thread
+    def _remote_manifest_job(self, manifest: str, on_result, cancel_event):
+        self.entries = self.service.read_remote_manifest(manifest)
+        if not self.entries:
+            raise ValueError(f"no md5/sha256 lines in {manifest}")
+        self.service.verify_remote(self.entries, self.base_dir, on_result=on_result, cancel_event=cancel_event)
+
+    def _hash_job(self, paths: list[str], algo: str, on_result, cancel_event):
+        files = []
+        for path in paths:
+            if path.endswith("/"):
+                files.extend(self.service.list_remote_files(path.rstrip("/"), cancel_event=cancel_event))
+            else:
+                files.append(path)
+        entries = []
+
+        def report(path: str, digest: str):
+            name = posixpath.relpath(path, self.base_dir)
+            entries.append(ManifestEntry(name, algo, digest))
+            on_result(VerifyResult(name, path, algo, "", digest, OK))
+
+        self.service.remote(files, algo, on_result=report, cancel_event=cancel_event)
+        # the server's digests are what a local copy is checked against
+        self.entries = sorted(entries, key=lambda e: e.name)
+
+    # ---- results ----
+    def _on_result(self, result: VerifyResult):
+        self._counts[result.status] = self._counts.get(result.status, 0) + 1
+        status = result.status if result.expected else result.algo
+        item = QTreeWidgetItem([result.name, status, result.expected, result.actual or result.error])
+        if result.expected:
+            item.setForeground(1, QColor(STATUS_COLORS.get(result.status, "#6B7280")))
+        self.results.addTopLevelItem(item)
+        self.status_label.setText(self._summary("working…"))
+
+    def _on_done(self, error: str):
+        self._running = False
+        self._update_buttons()
+        if error:
+            print("checksum error:", error)
+            self.status_label.setText(self._summary(f"failed: {error}"))
+            return
+        self.status_label.setText(self._summary("done"))
+
+    def _summary(self, state: str) -> str:
+        parts = [f"{count} {status}" for status, count in sorted(self._counts.items())]
+        return f"{', '.join(parts) or 'nothing checked'} · {state}"
+
+    def _update_buttons(self):
+        for w in (self.remote_btn, self.local_btn, self.save_btn, self.algo_combo):
+            w.setEnabled(not self._running)
+        self.cancel_btn.setEnabled(self._running)
+
+    def save_manifest(self):
+        if not self.entries:
+            return
+        algo = self.entries[0].algo
+        path, _ = QFileDialog.getSaveFileName(self, "Save manifest", f"{algo}sums.txt")
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                for entry in self.entries:
+                    f.write(f"{entry.digest}  {entry.name}\n")
+        except OSError as e:
+            print("save manifest error:", e)
+
+    def closeEvent(self, event):
+        # a running job stops at its next cancel check; the panel is deleted once the thread is done
+        self.worker.stop()
+        if self.worker_thread is not None:
+            self._closed = True
+            event.ignore()
+            self.hide()
+            return
+        super().closeEvent(event)
+
+    def _on_thread_finished(self):
+        self.worker_thread.deleteLater()
+        self.worker_thread = None
+        if self._closed:
+            self.deleteLater()
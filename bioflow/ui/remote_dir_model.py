@@ -0,0 +1,330 @@
+from dataclasses import dataclass
+from PySide6.QtCore import Qt, QObject, Signal, QAbstractTableModel, QModelIndex
+import datetime
+import fnmatch
+import os
+import re
+import stat as statmod
+import threading
+
+COLUMNS = ["Name", "Size", "Type", "Modified"]
+
+# entries handed to the GUI thread per batch while a listing streams in
+LIST_BATCH = 2000
+
+# rows exposed to the view per fetchMore()
+FETCH_PAGE = 5000
+
+
+@dataclass(slots=True)
+class RemoteEntry:
+    name: str
+    mode: int
+    size: int
+    mtime: float
+
+    @property
+    def is_dir(self) -> bool:
+        return statmod.S_ISDIR(self.mode)
+
+    @classmethod
+    def from_attr(cls, attr) -> "RemoteEntry":
+        return cls(attr.filename, attr.st_mode or 0, attr.st_size or 0, attr.st_mtime or 0)
+
+
+PARENT_ENTRY = RemoteEntry("..", statmod.S_IFDIR, 0, 0)
+
+
+def entry_kind(entry: RemoteEntry) -> str:
+    if entry is PARENT_ENTRY:
+        return "Parent"
+    if entry.is_dir:
+        return "Folder"
+    ext = os.path.splitext(entry.name)[1].lower()
+    if ext == ".py":
+        return "Python file"
+    if ext in (".sh", ".bash"):
+        return "Shell script"
+    if ext in (".txt", ".log"):
+        return "Text file"
+    if ext in (".ipynb",):
+        return "Notebook"
+    return f"{ext} file" if ext else "File"
+
+
+class DirListWorker(QObject):
+    """Lists remote directories on its own SFTP session, off the GUI thread.
+
+    Only the newest request matters: a running listing is abandoned as soon
+    as another one is queued. Entries stream out in batches so the first
+    rows show up long before a 200k-entry scratch directory is read.
+    """
+    batch_ready = Signal(int, str, object)   # generation, path, [RemoteEntry]
+    listing_done = Signal(int, str, str)     # generation, path, error text ("" if ok)
+    finished = Signal()
+
+    def __init__(self, ssh_client):
+        super().__init__()
+        self.ssh_client = ssh_client
+        self.sftp = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pending: tuple[int, str] | None = None
+        self._generation = 0
+        self._drop_session = False
+
+    def request(self, path: str) -> int:
+        """Queue ``path`` for listing (any thread); returns its generation."""
+        with self._lock:
+            self._generation += 1
+            self._pending = (self._generation, path)
+        self._wake.set()
+        return self._generation
+
+    def reset_session(self):
+        """Drop the SFTP session, e.g. after a disconnect; reopened on demand."""
+        with self._lock:
+            self._pending = None
+            self._generation += 1
+            self._drop_session = True
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _superseded(self, generation: int) -> bool:
+        return self._stop.is_set() or self._generation != generation
+
+    def run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            with self._lock:
+                self._wake.clear()
+                pending, self._pending = self._pending, None
+                drop, self._drop_session = self._drop_session, False
+            if drop:
+                self._close_session()
+            if pending is None:
+                continue
+            generation, path = pending
+            try:
+                self._list(generation, path)
+                error = ""
+            except Exception as e:
+                # the session may be dead (dropped VPN); reopen next time
+                self._close_session()
+                error = str(e) or type(e).__name__
+            if not self._superseded(generation):
+                self.listing_done.emit(generation, path, error)
+        self._close_session()
+        self.finished.emit()
+
+    def _list(self, generation: int, path: str):
+        if self.sftp is None:
+            self.sftp = self.ssh_client.open_sftp()
+        batch: list[RemoteEntry] = []
+        for attr in self.sftp.listdir_iter(path):
+            if self._superseded(generation):
+                return
+            batch.append(RemoteEntry.from_attr(attr))
+            if len(batch) >= LIST_BATCH:
+                self.batch_ready.emit(generation, path, batch)
+                batch = []
+        if batch and not self._superseded(generation):
+            self.batch_ready.emit(generation, path, batch)
+
+    def _close_session(self):
+        if self.sftp is not None:
+            try:
+                self.sftp.close()
+            except Exception:
+                pass
+        self.sftp = None
+
+
+class RemoteDirModel(QAbstractTableModel):
+    """Flat model of one remote directory.
+
+    Entries are kept as small slot objects; display text (size, type,
+    timestamp) is only formatted for rows the view actually asks about.
+    Sorting and filtering rebuild an index list, never widgets. Rows are
+    exposed to the view in pages through ``canFetchMore``/``fetchMore``.
+    """
+
+    def __init__(self, dir_icon=None, file_icon=None, parent=None):
+        super().__init__(parent)
+        self.dir_icon = dir_icon
+        self.file_icon = file_icon
+        self.path = ""
+        self._entries: list[RemoteEntry] = []
+        self._rows: list[RemoteEntry] = []
+        self._exposed = 0
+        self._filter = ""
+        self._match = None
+        self._sort_column = 0
+        self._sort_order = Qt.AscendingOrder
+        self.loading = False
+
+    # ---- population ----
+    def reset(self, path: str, entries: list[RemoteEntry] | None = None, loading: bool = False):
+        self.beginResetModel()
+        self.path = path
+        self._entries = list(entries or [])
+        self.loading = loading
+        self._rows = self._visible_rows()
+        self._exposed = min(len(self._rows), FETCH_PAGE)
+        self.endResetModel()
+
+    def append_entries(self, entries: list[RemoteEntry]):
+        """Add a streamed batch at the end; the full sort runs in ``finish_loading``."""
+        self._entries.extend(entries)
+        rows = [e for e in entries if self._accepts(e)]
+        # rows past the exposed count stay hidden until the view calls fetchMore
+        self._rows.extend(rows)
+        show = min(len(self._rows), max(self._exposed, FETCH_PAGE)) - self._exposed
+        if show > 0:
+            self.beginInsertRows(QModelIndex(), self._exposed, self._exposed + show - 1)
+            self._exposed += show
+            self.endInsertRows()
+
+    def finish_loading(self):
+        self.loading = False
+        self._resort()
+
+    def replace_entries(self, entries: list[RemoteEntry]):
+        """Swap in a fresh listing of the same directory without a reset."""
+        self._entries = list(entries)
+        self.loading = False
+        self._resort()
+
+    @property
+    def entry_count(self) -> int:
+        return len(self._entries)
+
+    def entries(self) -> list[RemoteEntry]:
+        return list(self._entries)
+
+    def entry(self, index: QModelIndex) -> RemoteEntry | None:
+        if not index.isValid() or index.row() >= self._exposed:
+            return None
+        return self._rows[index.row()]
+
+    # ---- filtering / sorting ----
+    def set_filter(self, text: str):
+        text = text.strip().lower()
+        if text == self._filter:
+            return
+        self._filter = text
+        if not text:
+            self._match = None
+        elif any(ch in text for ch in "*?["):
+            self._match = re.compile(fnmatch.translate(text)).match
+        else:
+            self._match = lambda name: text in name
+        self._resort()
+
+    def _accepts(self, entry: RemoteEntry) -> bool:
+        if self._match is None or entry is PARENT_ENTRY:
+            return True
+        return bool(self._match(entry.name.lower()))
+
+    def _visible_rows(self) -> list[RemoteEntry]:
+        rows = [e for e in self._entries if self._accepts(e)]
+        column, reverse = self._sort_column, self._sort_order == Qt.DescendingOrder
+        if column == 1:
+            key = lambda e: e.size
+        elif column == 2:
+            key = lambda e: entry_kind(e).lower()
+        elif column == 3:
+            key = lambda e: e.mtime
+        else:
+            key = lambda e: e.name.lower()
+        rows.sort(key=key, reverse=reverse)
+        # folders first regardless of direction (stable sort keeps the rest)
+        rows.sort(key=lambda e: not e.is_dir)
+        if self.path not in ("/", ""):
+            rows.insert(0, PARENT_ENTRY)
+        return rows
+
+    def _resort(self):
+        rows = self._visible_rows()
+        target = min(len(rows), max(self._exposed, FETCH_PAGE))
+        # row count changes are announced separately; the layout change
+        # itself only reorders
+        if target < self._exposed:
+            self.beginRemoveRows(QModelIndex(), target, self._exposed - 1)
+            self._exposed = target
+            self.endRemoveRows()
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        held = [self.entry(index) for index in persistent]
+        self._rows = rows
+        if persistent:
+            # keep selection and current item on the same names, also across
+            # a re-listing that produced new entry objects
+            position = {entry.name: row for row, entry in enumerate(rows[: self._exposed])}
+            moved = [
+                self.index(position[entry.name], index.column())
+                if entry is not None and entry.name in position else QModelIndex()
+                for entry, index in zip(held, persistent)
+            ]
+            self.changePersistentIndexList(persistent, moved)
+        self.layoutChanged.emit()
+        if target > self._exposed:
+            self.beginInsertRows(QModelIndex(), self._exposed, target - 1)
+            self._exposed = target
+            self.endInsertRows()
+
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self._resort()
+
+    # ---- Qt model API ----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._exposed
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._exposed < len(self._rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(FETCH_PAGE, len(self._rows) - self._exposed)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._exposed, self._exposed + count - 1)
+        self._exposed += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        entry = self.entry(index)
+        if entry is None:
+            return None
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return entry.name
+            if entry is PARENT_ENTRY:
+                return "Parent" if column == 2 else ""
+            if column == 1:
+                return "-" if entry.is_dir else str(entry.size)
+            if column == 2:
+                return entry_kind(entry)
+            if column == 3:
+                return datetime.datetime.fromtimestamp(entry.mtime).strftime("%Y-%m-%d %H:%M")
+        elif role == Qt.DecorationRole and column == 0:
+            return self.dir_icon if entry.is_dir else self.file_icon
+        elif role == Qt.UserRole:
+            return entry.mode
+        return None
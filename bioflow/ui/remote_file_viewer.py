@@ -0,0 +1,291 @@
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QComboBox,
+    QPlainTextEdit,
+)
+from PySide6.QtCore import QObject, QThread, Signal
+from PySide6.QtGui import QFontDatabase
+import posixpath
+import threading
+from bioflow.core.remote_reader import (
+    GzipPager,
+    RangedReader,
+    is_gzip_name,
+    remote_line_offset,
+    remote_lines,
+)
+
+PAGE_BYTES = 128 * 1024
+# lines per page when a gzip file is addressed by line number
+PAGE_LINES = 2000
+
+
+def _fmt_size(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024.0
+    return f"{n:.1f} TB"
+
+
+class FilePageWorker(QObject):
+    """Reads pages of one remote file on its own SFTP session.
+
+    Requests are ``(action, argument)`` pairs; like the directory lister,
+    only the newest pending request is served.
+    """
+    page_ready = Signal(int, str, str)  # generation, status, text
+    failed = Signal(int, str)
+    finished = Signal()
+
+    def __init__(self, ssh_client, path: str):
+        super().__init__()
+        self.ssh_client = ssh_client
+        self.path = path
+        self.gz = is_gzip_name(path)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        # aborts a line lookup running on the server (head | wc over a 30 GB file takes a while)
+        self._cancel = threading.Event()
+        self._pending: tuple[int, str, int] | None = None
+        self._generation = 0
+        self._sftp = None
+        self._reader: RangedReader | None = None
+        self._pager: GzipPager | None = None
+        # current page: byte range for plain files, decompressed range for gzip
+        self._start = 0
+        self._end = 0
+        self._line: int | None = None  # gzip pages addressed by line number
+
+    def request(self, action: str, argument: int = 0) -> int:
+        with self._lock:
+            self._generation += 1
+            self._pending = (self._generation, action, argument)
+        self._wake.set()
+        return self._generation
+
+    def stop(self):
+        self._stop.set()
+        self._cancel.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            with self._lock:
+                self._wake.clear()
+                pending, self._pending = self._pending, None
+            if pending is None:
+                continue
+            generation, action, argument = pending
+            try:
+                self._open()
+                status, text = self._serve(action, argument)
+            except Exception as e:
+                if not self._stop.is_set():
+                    self.failed.emit(generation, str(e) or type(e).__name__)
+                continue
+            self.page_ready.emit(generation, status, text)
+        if self._reader is not None:
+            self._reader.close()
+        if self._sftp is not None:
+            try:
+                self._sftp.close()
+            except Exception:
+                pass
+        self.finished.emit()
+
+    def _open(self):
+        if self._reader is None:
+            self._sftp = self.ssh_client.open_sftp()
+            self._reader = RangedReader(self._sftp, self.path)
+
+    # ---- paging ----
+    def _serve(self, action: str, argument: int) -> tuple[str, str]:
+        if self.gz:
+            return self._serve_gzip(action, argument)
+        reader = self._reader
+        if action == "head":
+            data = self._page_from(0)
+        elif action == "next":
+            if self._end < reader.size:
+                data = self._page_from(self._end)
+            else:
+                data = reader.read(self._start, self._end - self._start)
+        elif action == "prev":
+            if self._start == 0:
+                data = self._page_from(0)
+            else:
+                begin = reader.line_start_after(max(self._start - PAGE_BYTES, 0))
+                if begin >= self._start:
+                    # a single line longer than a page
+                    begin = max(self._start - PAGE_BYTES, 0)
+                data = reader.read(begin, self._start - begin)
+                self._start, self._end = begin, self._start
+        elif action == "tail":
+            self._start, data = reader.tail(PAGE_BYTES)
+            self._end = reader.size
+        elif action == "offset":
+            data = self._page_from(reader.line_start_after(min(max(argument, 0), reader.size)))
+        elif action == "line":
+            data = self._page_from(remote_line_offset(self.ssh_client, self.path, argument, self._cancel))
+        else:
+            raise ValueError(f"unknown action {action}")
+        status = (
+            f"bytes {self._start:,}–{self._end:,} of {reader.size:,} · "
+            f"fetched {_fmt_size(reader.bytes_fetched)}"
+        )
+        return status, data.decode("utf-8", errors="replace")
+
+    def _page_from(self, start: int) -> bytes:
+        reader = self._reader
+        data = reader.read(start, PAGE_BYTES)
+        if start + len(data) < reader.size:
+            # end the page on a line boundary; the rest starts the next one
+            newline = data.rfind(b"\n")
+            if newline >= 0:
+                data = data[:newline + 1]
+        self._start, self._end = start, start + len(data)
+        return data
+
+    def _serve_gzip(self, action: str, argument: int) -> tuple[str, str]:
+        reader = self._reader
+        if action == "line" or (action == "next" and self._line is not None):
+            line = argument if action == "line" else self._line + PAGE_LINES
+            self._line = max(line, 1)
+            text = remote_lines(self.ssh_client, self.path, self._line, PAGE_LINES, gz=True,
+                                cancel_event=self._cancel)
+            return f"lines {self._line:,}–{self._line + PAGE_LINES - 1:,} (decompressed on the server)", text
+        if action == "head" or self._pager is None:
+            self._pager = GzipPager(reader)
+        elif action != "next":
+            raise ValueError("gzip files can only be paged forward or addressed by line")
+        self._line = None
+        pager = self._pager
+        self._start = pager.position
+        data = pager.read_lines(PAGE_BYTES)
+        self._end = pager.position
+        status = (
+            f"decompressed {self._start:,}–{self._end:,}{' (end)' if pager.eof else ''} · "
+            f"compressed read {_fmt_size(reader.bytes_fetched)} of {_fmt_size(reader.size)}"
+        )
+        return status, data.decode("utf-8", errors="replace")
+
+
+class RemoteFileViewer(QWidget):
+    """Head / tail / seek preview of a remote file without downloading it."""
+
+    def __init__(self, ssh_client, path: str, parent=None):
+        super().__init__(parent)
+        self.ssh_client = ssh_client
+        self.path = path
+        self._generation = 0
+        self._closed = False
+        self.setWindowTitle(f"Preview · {posixpath.basename(path)}")
+        self.resize(900, 640)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(6)
+
+        controls = QHBoxLayout()
+        self.head_btn = QPushButton("Head")
+        self.prev_btn = QPushButton("Prev")
+        self.next_btn = QPushButton("Next")
+        self.tail_btn = QPushButton("Tail")
+        self.goto_kind = QComboBox()
+        self.goto_kind.addItem("Line", "line")
+        self.goto_kind.addItem("Byte offset", "offset")
+        self.goto_edit = QLineEdit()
+        self.goto_edit.setPlaceholderText("e.g. 1000000")
+        self.goto_edit.setMaximumWidth(160)
+        self.goto_btn = QPushButton("Go")
+        for w in (self.head_btn, self.prev_btn, self.next_btn, self.tail_btn):
+            controls.addWidget(w)
+        controls.addStretch(1)
+        controls.addWidget(self.goto_kind)
+        controls.addWidget(self.goto_edit)
+        controls.addWidget(self.goto_btn)
+        layout.addLayout(controls)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        layout.addWidget(self.text, 1)
+
+        self.status_label = QLabel(path)
+        self.status_label.setStyleSheet("color: #6B7280; font-size: 11px;")
+        layout.addWidget(self.status_label)
+
+        self.worker = FilePageWorker(ssh_client, path)
+        if self.worker.gz:
+            # compressed streams have no byte addressing and no way back
+            self.prev_btn.setEnabled(False)
+            self.tail_btn.setEnabled(False)
+            self.goto_kind.removeItem(1)
+        # not parented to the viewer: a closed viewer lives on until the worker is out of its request
+        self.worker_thread = QThread()
+        self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.page_ready.connect(self._on_page)
+        self.worker.failed.connect(self._on_failed)
+        self.worker.finished.connect(self.worker_thread.quit)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker_thread.finished.connect(self._on_thread_finished)
+        self.worker_thread.start()
+
+        self.head_btn.clicked.connect(lambda: self._request("head"))
+        self.prev_btn.clicked.connect(lambda: self._request("prev"))
+        self.next_btn.clicked.connect(lambda: self._request("next"))
+        self.tail_btn.clicked.connect(lambda: self._request("tail"))
+        self.goto_btn.clicked.connect(self._goto)
+        self.goto_edit.returnPressed.connect(self._goto)
+        self._request("head")
+
+    def _request(self, action: str, argument: int = 0):
+        self.status_label.setText(f"{self.path} · loading…")
+        self._generation = self.worker.request(action, argument)
+
+    def _goto(self):
+        text = self.goto_edit.text().strip().replace(",", "").replace("_", "")
+        try:
+            value = int(text, 0)
+        except ValueError:
+            self.status_label.setText(f"Not a number: {text}")
+            return
+        self._request(self.goto_kind.currentData(), value)
+
+    def _on_page(self, generation: int, status: str, text: str):
+        if generation != self._generation:
+            return
+        self.text.setPlainText(text)
+        self.status_label.setText(f"{self.path} · {status}")
+
+    def _on_failed(self, generation: int, message: str):
+        if generation != self._generation:
+            return
+        print("preview error:", message)
+        self.status_label.setText(f"{self.path} · error: {message}")
+
+    def closeEvent(self, event):
+        # a running request is cancelled; the viewer is deleted once the thread is done
+        self.worker.stop()
+        if self.worker_thread is not None:
+            self._closed = True
+            event.ignore()
+            self.hide()
+            return
+        super().closeEvent(event)
+
+    def _on_thread_finished(self):
+        self.worker_thread.deleteLater()
+        self.worker_thread = None
+        if self._closed:
+            self.deleteLater()
@@ -0,0 +1,236 @@
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QAbstractItemView,
+)
+from PySide6.QtCore import Qt, QObject, QThread, QTimer, Signal
+import datetime
+import posixpath
+import threading
+import time
+from bioflow.core.search_index import RemoteSearchIndex, SearchHit, SEARCH_LIMIT
+
+# an index older than this is refreshed in the background when the panel opens
+STALE_AFTER = 15 * 60
+
+
+class IndexWorker(QObject):
+    """Runs index refreshes one after another on its own thread."""
+    progress = Signal(str, int)          # root, entries so far
+    refreshed = Signal(str, int, str)    # root, entries, error text ("" if ok)
+    finished = Signal()
+
+    def __init__(self, index: RemoteSearchIndex, ssh_client, host: str):
+        super().__init__()
+        self.index = index
+        self.ssh_client = ssh_client
+        self.host = host
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._cancel = threading.Event()
+        self._queue: list[tuple[str, str | None]] = []
+
+    def request(self, root: str, subtree: str | None = None):
+        with self._lock:
+            if (root, subtree) not in self._queue:
+                self._queue.append((root, subtree))
+        self._wake.set()
+
+    def cancel(self):
+        with self._lock:
+            self._queue.clear()
+        self._cancel.set()
+
+    def stop(self):
+        self._stop.set()
+        self._cancel.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            with self._lock:
+                self._wake.clear()
+                if not self._queue:
+                    continue
+                root, subtree = self._queue.pop(0)
+                if self._queue:
+                    self._wake.set()
+                self._cancel.clear()
+            try:
+                count = self.index.refresh(
+                    self.ssh_client, self.host, root, subtree,
+                    cancel_event=self._cancel,
+                    on_progress=lambda n, r=root: self.progress.emit(r, n),
+                )
+                error = ""
+            except Exception as e:
+                count, error = 0, str(e) or type(e).__name__
+            if not self._stop.is_set():
+                self.refreshed.emit(root, count, error)
+        self.index.close()
+        self.finished.emit()
+
+
+class RemoteSearchPanel(QWidget):
+    """Find files by name across an indexed remote project tree.
+
+    The tree under ``root`` is indexed once with a streamed ``find`` and
+    kept locally; typing a glob (``*.bam``) or a substring queries the
+    local index, never the server.
+    """
+    open_requested = Signal(object)      # SearchHit
+    reveal_requested = Signal(str)       # remote folder to show in the browser
+
+    def __init__(self, index: RemoteSearchIndex, ssh_client, host: str, root: str, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.host = host
+        self.root = posixpath.normpath(root)
+        self._refreshing = False
+        self.setWindowTitle(f"Search · {self.root}")
+        self.resize(820, 560)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(6)
+
+        row = QHBoxLayout()
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Name contains… or *.glob (use / to match paths)")
+        self.query_edit.setClearButtonEnabled(True)
+        self.refresh_btn = QPushButton("Refresh index")
+        self.reveal_btn = QPushButton("Show in folder")
+        row.addWidget(self.query_edit, 1)
+        row.addWidget(self.reveal_btn)
+        row.addWidget(self.refresh_btn)
+        layout.addLayout(row)
+
+        self.results = QTreeWidget()
+        self.results.setHeaderLabels(["Path", "Size", "Modified"])
+        self.results.setRootIsDecorated(False)
+        self.results.setUniformRowHeights(True)
+        self.results.setSortingEnabled(True)
+        self.results.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.results.header().resizeSection(0, 520)
+        layout.addWidget(self.results, 1)
+
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #6B7280; font-size: 11px;")
+        layout.addWidget(self.status_label)
+
+        self.worker = IndexWorker(index, ssh_client, host)
+        self.thread = QThread(self)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self._on_progress)
+        self.worker.refreshed.connect(self._on_refreshed)
+        self.worker.finished.connect(self.thread.quit)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.thread.start()
+
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(150)
+        self.query_timer.timeout.connect(self.run_query)
+        self.query_edit.textChanged.connect(self.query_timer.start)
+        self.query_edit.returnPressed.connect(self.run_query)
+        self.refresh_btn.clicked.connect(lambda: self.refresh_index())
+        self.reveal_btn.clicked.connect(self._reveal_selected)
+        self.results.itemDoubleClicked.connect(self._on_double_clicked)
+
+        info = index.root_info(host, self.root)
+        if info is None or info.indexed_at is None or time.time() - info.indexed_at > STALE_AFTER:
+            self.refresh_index()
+        else:
+            self._show_index_status()
+
+    # ---- index ----
+    def refresh_index(self, subtree: str | None = None):
+        self._refreshing = True
+        self.refresh_btn.setEnabled(False)
+        self.status_label.setText(f"Indexing {self.root}…")
+        self.worker.request(self.root, subtree)
+
+    def _on_progress(self, root: str, count: int):
+        if root == self.root:
+            self.status_label.setText(f"Indexing {root}… {count:,} entries")
+
+    def _on_refreshed(self, root: str, count: int, error: str):
+        self._refreshing = False
+        self.refresh_btn.setEnabled(True)
+        if error:
+            print("index error:", error)
+            self.status_label.setText(f"Indexing {root} failed: {error}")
+            return
+        self._show_index_status()
+        if self.query_edit.text().strip():
+            self.run_query()
+
+    def _show_index_status(self):
+        info = self.index.root_info(self.host, self.root)
+        if info is None or info.indexed_at is None:
+            self.status_label.setText("Not indexed yet")
+            return
+        when = datetime.datetime.fromtimestamp(info.indexed_at).strftime("%Y-%m-%d %H:%M")
+        self.status_label.setText(f"{info.files:,} entries indexed · updated {when}")
+
+    # ---- search ----
+    def run_query(self):
+        self.query_timer.stop()
+        query = self.query_edit.text().strip()
+        self.results.clear()
+        if not query:
+            if not self._refreshing:
+                self._show_index_status()
+            return
+        started = time.perf_counter()
+        try:
+            hits = self.index.search(self.host, self.root, query)
+        except Exception as e:
+            print("search error:", e)
+            self.status_label.setText(f"Search failed: {e}")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        self.results.setSortingEnabled(False)
+        items = []
+        for hit in hits:
+            item = QTreeWidgetItem([
+                posixpath.relpath(hit.path, self.root) + ("/" if hit.is_dir else ""),
+                "-" if hit.is_dir else str(hit.size),
+                datetime.datetime.fromtimestamp(hit.mtime).strftime("%Y-%m-%d %H:%M"),
+            ])
+            item.setData(0, Qt.UserRole, hit)
+            items.append(item)
+        self.results.addTopLevelItems(items)
+        self.results.setSortingEnabled(True)
+        more = "+" if len(hits) >= SEARCH_LIMIT else ""
+        if not self._refreshing:
+            self.status_label.setText(f"{len(hits):,}{more} matches in {elapsed:.1f} ms")
+
+    def _selected_hit(self) -> SearchHit | None:
+        item = self.results.currentItem()
+        return item.data(0, Qt.UserRole) if item is not None else None
+
+    def _on_double_clicked(self, item: QTreeWidgetItem, column: int):
+        hit = item.data(0, Qt.UserRole)
+        if hit is not None:
+            self.open_requested.emit(hit)
+
+    def _reveal_selected(self):
+        hit = self._selected_hit()
+        if hit is not None:
+            self.reveal_requested.emit(hit.path if hit.is_dir else posixpath.dirname(hit.path))
+
+    def closeEvent(self, event):
+        self.worker.stop()
+        self.thread.quit()
+        self.thread.wait(2000)
+        super().closeEvent(event)
@@ -2,8 +2,8 @@ from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QLabel,
-    QTreeWidget,
-    QTreeWidgetItem,
+    QTreeView,
+    QLineEdit,
     QHBoxLayout,
     QPushButton,
     QFileDialog,
@@ -11,9 +11,11 @@ from PySide6.QtWidgets import (
     QToolBar,
     QAbstractItemView,
     QStyle,
+    QProgressBar,
+    QInputDialog,
 )
-from PySide6.QtCore import Qt, QPoint
-from PySide6.QtGui import QGuiApplication
+from PySide6.QtCore import Qt, QPoint, QObject, QThread, QTimer, Signal, QModelIndex, QCoreApplication
+from PySide6.QtGui import QGuiApplication, QKeySequence, QShortcut
 import os
 import posixpath
 import sys
@@ -22,6 +24,22 @@ import stat as statmod
 import datetime
 import tempfile
 import webbrowser
+from bioflow.ui.remote_file_viewer import RemoteFileViewer
+from bioflow.ui.remote_search_view import RemoteSearchPanel
+from bioflow.ui.integrity_view import IntegrityPanel
+from bioflow.ui.remote_dir_model import DirListWorker, RemoteDirModel, RemoteEntry, PARENT_ENTRY
+from bioflow.core.dir_cache import DirListingCache
+from bioflow.core.integrity import IntegrityService, is_manifest_name
+from bioflow.core.preview_cache import PreviewCache
+from bioflow.core.remote_reader import is_gzip_name
+from bioflow.core.search_index import RemoteSearchIndex, SearchHit
+from bioflow.core.sync import remote_project_dir
+from bioflow.core.transfers import TransferEngine, TransferTask, UPLOAD, DONE, FAILED, CANCELLED
+
+
+# files above this size (and compressed ones) open in the ranged viewer
+# instead of being downloaded on double-click
+PREVIEW_DOWNLOAD_LIMIT = 32 * 1024 * 1024
 
 
 class QActionButton(QPushButton):
@@ -34,6 +52,19 @@ class QActionButton(QPushButton):
         )
 
 
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}" if unit != "B" else f"{int(n)} B"
+        n /= 1024.0
+    return f"{n:.1f} TB"
+
+
+class TransferBridge(QObject):
+    """Carries engine progress callbacks from worker threads to the GUI thread."""
+    progress = Signal(object)
+
+
 class ServerFilesView(QWidget):
     """Remote files panel with MobaXterm-like context menu."""
     def __init__(self, ssh_client=None):
@@ -41,7 +72,34 @@ class ServerFilesView(QWidget):
         self.ssh_client = ssh_client
         self.sftp = None
         self.current_path = "."
+        self.transfers: TransferEngine | None = None
+        # host the transfer engine's SFTP sessions belong to
+        self._transfers_host = ""
+        # host the SFTP sessions, listings and history belong to
+        self._session_host = ""
+        self.list_thread: QThread | None = None
+        self.list_worker: DirListWorker | None = None
+        self._list_generation = 0
+        self._revalidating = False
+        self._revalidated_entries = []
+        self.dir_cache = DirListingCache()
+        self.preview_cache = PreviewCache()
+        # id(task) -> (task, host, size, mtime) for downloads to open when done
+        self._pending_opens: dict[int, tuple] = {}
+        # preview and checksum windows kept alive until closed
+        self._viewers: list[QWidget] = []
+        self.search_index = RemoteSearchIndex()
+        self._search_panels: list[RemoteSearchPanel] = []
+        self.integrity: IntegrityService | None = None
+        self._back: list[str] = []
+        self._forward: list[str] = []
+        self.transfer_bridge = TransferBridge()
+        self.transfer_bridge.progress.connect(self._on_transfer_progress)
         self._build_ui()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(lambda: self._stop_lister(wait=True))
+            app.aboutToQuit.connect(lambda: [panel.close() for panel in list(self._search_panels)])
 
     # ---- UI ----
     def _build_ui(self):
@@ -55,42 +113,98 @@ class ServerFilesView(QWidget):
         self.path_label.setStyleSheet("font-weight: 500;")
         header_row.addWidget(self.path_label)
         header_row.addStretch(1)
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter (text or *.glob)")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.setMaximumWidth(200)
+        header_row.addWidget(self.filter_edit)
 
         toolbar = QToolBar()
         toolbar.setIconSize(toolbar.iconSize())
+        self.btn_back = QActionButton("Back")
+        self.btn_forward = QActionButton("Forward")
+        self.btn_back.setEnabled(False)
+        self.btn_forward.setEnabled(False)
         self.btn_up = QActionButton("Up")
         self.btn_refresh = QActionButton("Refresh")
         self.btn_download = QActionButton("Download")
         self.btn_upload = QActionButton("Upload")
+        self.btn_upload_folder = QActionButton("Upload Folder")
+        self.btn_sync = QActionButton("Sync Folder")
+        self.btn_search = QActionButton("Search")
         self.btn_new_folder = QActionButton("New Folder")
         self.btn_delete = QActionButton("Delete")
 
+        header_row.addWidget(self.btn_back)
+        header_row.addWidget(self.btn_forward)
         header_row.addWidget(self.btn_up)
         header_row.addWidget(self.btn_refresh)
+        header_row.addWidget(self.btn_search)
         header_row.addWidget(self.btn_download)
         header_row.addWidget(self.btn_upload)
+        header_row.addWidget(self.btn_upload_folder)
+        header_row.addWidget(self.btn_sync)
         header_row.addWidget(self.btn_new_folder)
         header_row.addWidget(self.btn_delete)
 
         layout.addLayout(header_row)
 
-        # tree
-        self.tree = QTreeWidget()
-        self.tree.setColumnCount(4)
-        self.tree.setHeaderLabels(["Name", "Size", "Type", "Modified"])
-        self.tree.setRootIsDecorated(True)
+        # listing: a flat model; the view only asks for rows on screen
+        style = self.style()
+        self.model = RemoteDirModel(style.standardIcon(QStyle.SP_DirIcon), style.standardIcon(QStyle.SP_FileIcon), self)
+        self.tree = QTreeView()
+        self.tree.setModel(self.model)
+        self.tree.setRootIsDecorated(False)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setSortingEnabled(True)
+        self.tree.sortByColumn(0, Qt.AscendingOrder)
+        self.tree.header().resizeSection(0, 280)
         self.tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.tree.setContextMenuPolicy(Qt.CustomContextMenu)
         layout.addWidget(self.tree)
 
+        # transfer status (hidden while idle)
+        self.transfer_row = QWidget()
+        transfer_layout = QHBoxLayout(self.transfer_row)
+        transfer_layout.setContentsMargins(0, 0, 0, 0)
+        transfer_layout.setSpacing(6)
+        self.transfer_label = QLabel("")
+        self.transfer_label.setStyleSheet("font-size: 11px;")
+        self.transfer_progress = QProgressBar()
+        self.transfer_progress.setMaximumHeight(10)
+        self.transfer_progress.setTextVisible(False)
+        self.btn_retry_transfers = QActionButton("Retry")
+        self.btn_cancel_transfers = QActionButton("Cancel")
+        transfer_layout.addWidget(self.transfer_label, 1)
+        transfer_layout.addWidget(self.transfer_progress, 1)
+        transfer_layout.addWidget(self.btn_retry_transfers)
+        transfer_layout.addWidget(self.btn_cancel_transfers)
+        self.transfer_row.setVisible(False)
+        layout.addWidget(self.transfer_row)
+
         # connections
+        self.btn_cancel_transfers.clicked.connect(self.cancel_transfers)
+        self.btn_retry_transfers.clicked.connect(self.retry_transfers)
+        self.btn_back.clicked.connect(self.go_back)
+        self.btn_forward.clicked.connect(self.go_forward)
+        QShortcut(QKeySequence.Back, self, self.go_back)
+        QShortcut(QKeySequence.Forward, self, self.go_forward)
         self.btn_up.clicked.connect(self.go_up)
         self.btn_refresh.clicked.connect(self.refresh)
+        self.btn_search.clicked.connect(self.action_search)
         self.btn_download.clicked.connect(self.action_download)
         self.btn_upload.clicked.connect(self.action_upload)
+        self.btn_upload_folder.clicked.connect(self.action_upload_folder)
+        self.btn_sync.clicked.connect(self.action_sync)
         self.btn_new_folder.clicked.connect(self.action_new_folder)
         self.btn_delete.clicked.connect(self.action_delete)
-        self.tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        # re-filtering 200k names per keystroke is noticeable; wait for a pause
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(lambda: self.model.set_filter(self.filter_edit.text()))
+        self.filter_edit.textChanged.connect(self.filter_timer.start)
+        self.tree.doubleClicked.connect(self.on_item_double_clicked)
         self.tree.customContextMenuRequested.connect(self.show_context_menu)
 
     # ---- SFTP helpers ----
@@ -116,76 +230,246 @@ class ServerFilesView(QWidget):
                 pass
         return self.sftp
 
+    def _ensure_transfers(self):
+        if not self.ssh_client or not getattr(self.ssh_client, "client", None):
+            return None
+        host = self._host_key()
+        if self.transfers is not None and self._transfers_host != host:
+            self._shutdown_transfers()
+        if self.transfers is None:
+            self.transfers = TransferEngine(self.ssh_client, on_progress=self.transfer_bridge.progress.emit)
+            self._transfers_host = host
+        return self.transfers
+
+    def _shutdown_transfers(self):
+        """Cancel everything queued and close the engine's SFTP sessions; they belong to the old connection."""
+        if self.transfers is None:
+            return
+        self.transfers.shutdown()
+        self.transfers = None
+        self._pending_opens.clear()
+        self.transfer_row.setVisible(False)
+
+    # ---- Transfers ----
+    def cancel_transfers(self):
+        """Cancel running transfers; when nothing is running, dismiss failed ones."""
+        engine = self.transfers
+        if engine is None:
+            return
+        if any(t.active for t in engine.tasks):
+            engine.cancel_all()
+        else:
+            engine.clear_finished()
+            self.transfer_row.setVisible(False)
+
+    def retry_transfers(self):
+        """Resume failed or cancelled transfers; journaled ranges are skipped."""
+        if self.transfers is not None:
+            self.transfers.retry_failed()
+
+    def _on_transfer_progress(self, task: TransferTask):
+        engine = self.transfers
+        if engine is None:
+            return
+        if task.status == FAILED:
+            print(f"{task.direction.capitalize()} error:", task.remote_path, task.error)
+        if not task.active and id(task) in self._pending_opens:
+            self._finish_open(task)
+        if task.status == DONE and task.direction == UPLOAD:
+            self._invalidate(posixpath.dirname(task.remote_path))
+            if task.is_dir:
+                self._invalidate(task.remote_path, tree=True)
+            if posixpath.dirname(task.remote_path) == self.current_path or (
+                task.is_dir and (self.current_path + "/").startswith(task.remote_path.rstrip("/") + "/")
+            ):
+                self.refresh()
+
+        transferred, total, rate = engine.totals()
+        active = [t for t in engine.tasks if t.active]
+        if not active:
+            unfinished = [t for t in engine.tasks if t.status in (FAILED, CANCELLED)]
+            if not unfinished:
+                engine.clear_finished()
+                self.transfer_row.setVisible(False)
+                return
+            # keep failed/cancelled transfers around so they can be resumed
+            self.transfer_row.setVisible(True)
+            self.transfer_progress.setVisible(False)
+            self.btn_retry_transfers.setVisible(True)
+            self.btn_cancel_transfers.setText("Dismiss")
+            first = unfinished[0]
+            self.transfer_label.setText(
+                f"{len(unfinished)} transfer(s) not finished · {first.name}: {first.error or first.status}"
+            )
+            return
+        self.transfer_row.setVisible(True)
+        self.transfer_progress.setVisible(True)
+        self.btn_retry_transfers.setVisible(False)
+        self.btn_cancel_transfers.setText("Cancel")
+        self.transfer_progress.setRange(0, 1000)
+        self.transfer_progress.setValue(int(transferred / total * 1000) if total else 0)
+        current = task if task.active else active[0]
+        self.transfer_label.setText(
+            f"{len(active)} transfer(s) · {current.name} "
+            f"{_fmt_bytes(current.transferred)}/{_fmt_bytes(current.size)} @ {_fmt_bytes(current.rate)}/s · "
+            f"total {_fmt_bytes(transferred)}/{_fmt_bytes(total)} @ {_fmt_bytes(rate)}/s"
+        )
+
 # ---- Loading ----
     def load_root(self, path=None):
+        """Show ``path``: instantly from the listing cache if possible, then revalidate."""
+        host = self._host_key()
+        if host and host != self._session_host:
+            self._switch_host(host, keep_path=bool(path))
         if path:
             self.current_path = path
         if not self._ensure_sftp():
-            self.tree.clear()
+            # a stale session from a previous connection is useless now
+            self.sftp = None
+            self._stop_lister()
+            self._shutdown_transfers()
+            # its checksums would be cached under the old host
+            self.integrity = None
+            self.dir_cache.clear()
+            self.model.reset("")
             self.path_label.setText("Not connected")
             return
 
-        self.tree.clear()
-        self.path_label.setText(self.current_path)
-
-        try:
-            entries = self.sftp.listdir_attr(self.current_path)
-        except Exception:
-            self.tree.clear()
-            self.path_label.setText(f"{self.current_path} (unreachable)")
+        cached = self.dir_cache.get(self.current_path)
+        if cached is not None:
+            self.model.reset(self.current_path, cached)
+            self.path_label.setText(f"{self.current_path} (refreshing…)")
+            self._revalidate()
             return
+        self.path_label.setText(f"{self.current_path} (loading…)")
+        self.model.reset(self.current_path, loading=True)
+        self._revalidating = False
+        self._list_generation = self._ensure_lister().request(self.current_path)
+
+    def _switch_host(self, host: str, keep_path: bool = False):
+        """Forget everything tied to the previous server: sessions, listings, history, transfers."""
+        first = not self._session_host
+        self._session_host = host
+        if first:
+            return
+        self.sftp = None
+        if self.list_worker is not None:
+            self.list_worker.reset_session()
+        self.dir_cache.clear()
+        self._shutdown_transfers()
+        self.integrity = None
+        self._back.clear()
+        self._forward.clear()
+        self._update_history_buttons()
+        if not keep_path:
+            # the old path most likely does not exist there; start at the home directory
+            self.current_path = "."
+
+    def _revalidate(self):
+        """List the shown directory again in the background; rows stay until it is in."""
+        self._revalidating = True
+        self._revalidated_entries = []
+        self._list_generation = self._ensure_lister().request(self.current_path)
+
+    def _ensure_lister(self) -> DirListWorker:
+        if self.list_worker is None:
+            # parented so that dropping our reference in _stop_lister does not
+            # destroy the thread before the worker has wound down
+            self.list_thread = QThread(self)
+            self.list_worker = DirListWorker(self.ssh_client)
+            self.list_worker.moveToThread(self.list_thread)
+            self.list_thread.started.connect(self.list_worker.run)
+            self.list_worker.batch_ready.connect(self._on_list_batch)
+            self.list_worker.listing_done.connect(self._on_list_done)
+            self.list_worker.finished.connect(self.list_thread.quit)
+            self.list_worker.finished.connect(self.list_worker.deleteLater)
+            self.list_thread.finished.connect(self.list_thread.deleteLater)
+            self.list_thread.start()
+        return self.list_worker
+
+    def _stop_lister(self, wait: bool = False):
+        if self.list_worker is not None:
+            self.list_worker.stop()
+        if wait and self.list_thread is not None:
+            self.list_thread.quit()
+            self.list_thread.wait(2000)
+        self.list_worker = None
+        self.list_thread = None
+
+    def _on_list_batch(self, generation: int, path: str, entries):
+        if generation != self._list_generation:
+            return
+        if self._revalidating:
+            self._revalidated_entries.extend(entries)
+            return
+        self.model.append_entries(entries)
+        self.path_label.setText(f"{path} (loading… {self.model.entry_count})")
 
-        # standard icons
-        style = self.style()
-        dir_icon = style.standardIcon(QStyle.SP_DirIcon)
-        file_icon = style.standardIcon(QStyle.SP_FileIcon)
-
-        # Add '..' entry
-        up_item = QTreeWidgetItem(["..", "", "Parent", ""])
-        up_item.setIcon(0, dir_icon)
-        self.tree.addTopLevelItem(up_item)
-
-        # Sort: directories first, then files
-        def sort_key(attr):
-            is_dir = statmod.S_ISDIR(attr.st_mode)
-            return (0 if is_dir else 1, attr.filename.lower())
-
-        for attr in sorted(entries, key=sort_key):
-            name = attr.filename
-            mode = attr.st_mode
-            is_dir = statmod.S_ISDIR(mode)
-            size = "-" if is_dir else str(attr.st_size)
-
-            if is_dir:
-                kind = "Folder"
-            else:
-                ext = os.path.splitext(name)[1].lower()
-                if ext == ".py":
-                    kind = "Python file"
-                elif ext in (".sh", ".bash"):
-                    kind = "Shell script"
-                elif ext in (".txt", ".log"):
-                    kind = "Text file"
-                elif ext in (".ipynb",):
-                    kind = "Notebook"
-                else:
-                    kind = f"{ext} file" if ext else "File"
-
-            mtime = datetime.datetime.fromtimestamp(attr.st_mtime).strftime("%Y-%m-%d %H:%M")
-            item = QTreeWidgetItem([name, size, kind, mtime])
-            item.setData(0, Qt.UserRole, mode)
-            if is_dir:
-                item.setIcon(0, dir_icon)
+    def _on_list_done(self, generation: int, path: str, error: str):
+        if generation != self._list_generation:
+            return
+        if error:
+            self.model.finish_loading()
+            print("listdir error:", error)
+            self.path_label.setText(f"{path} (unreachable)")
+            return
+        if self._revalidating:
+            self.model.replace_entries(self._revalidated_entries)
+            self._revalidated_entries = []
+        else:
+            self.model.finish_loading()
+        self.dir_cache.put(path, self.model.entries())
+        self.path_label.setText(path)
+
+    def _invalidate(self, *paths: str, tree: bool = False):
+        """Forget cached listings after BioFlow changed these remote directories."""
+        for path in paths:
+            if tree:
+                self.dir_cache.invalidate_tree(path)
             else:
-                item.setIcon(0, file_icon)
-            self.tree.addTopLevelItem(item)
-
-        self.tree.resizeColumnToContents(0)
+                self.dir_cache.invalidate(path)
+            # open search panels re-read just the part of their tree that changed
+            for panel in self._search_panels:
+                if path == panel.root or path.startswith(panel.root.rstrip("/") + "/"):
+                    panel.refresh_index(posixpath.relpath(path, panel.root))
 
     def refresh(self):
         """Reload current directory"""
-        self.load_root(self.current_path)
+        self.dir_cache.invalidate(self.current_path)
+        if self.model.path == self.current_path and not self.model.loading and self.list_worker is not None:
+            self.path_label.setText(f"{self.current_path} (refreshing…)")
+            self._revalidate()
+        else:
+            self.load_root(self.current_path)
+
+    # ---- Navigation ----
+    def navigate(self, path: str):
+        """Open ``path`` and record the move in the back/forward history."""
+        if path == self.current_path:
+            return
+        self._back.append(self.current_path)
+        del self._back[:-100]
+        self._forward.clear()
+        self.load_root(path)
+        self._update_history_buttons()
+
+    def go_back(self):
+        if not self._back:
+            return
+        self._forward.append(self.current_path)
+        self.load_root(self._back.pop())
+        self._update_history_buttons()
+
+    def go_forward(self):
+        if not self._forward:
+            return
+        self._back.append(self.current_path)
+        self.load_root(self._forward.pop())
+        self._update_history_buttons()
 
+    def _update_history_buttons(self):
+        self.btn_back.setEnabled(bool(self._back))
+        self.btn_forward.setEnabled(bool(self._forward))
 
     def go_up(self):
         # Navigate to parent directory
@@ -193,59 +477,127 @@ class ServerFilesView(QWidget):
             parent = "/"
         else:
             parent = os.path.dirname(self.current_path.rstrip("/")) or "/"
-        self.current_path = parent
-        self.load_root(self.current_path)
+        self.navigate(parent)
 
     # ---- Item helpers ----
-    def _selected_items(self):
-        return self.tree.selectedItems() or []
+    def _selected_items(self) -> list[RemoteEntry]:
+        rows = self.tree.selectionModel().selectedRows()
+        return [e for e in (self.model.entry(index) for index in rows) if e is not None]
 
-    def _selected_item(self):
-        items = self.tree.selectedItems()
+    def _selected_item(self) -> RemoteEntry | None:
+        items = self._selected_items()
         return items[0] if items else None
 
-    def _item_path_mode(self, item):
-        name = item.text(0)
-        if name == "..":
+    def _item_path_mode(self, item: RemoteEntry):
+        if item is PARENT_ENTRY:
             return None, None
-        mode = item.data(0, Qt.UserRole)
+        name = item.name
         path = posixpath.join(self.current_path, name) if self.current_path != "/" else "/" + name
-        return path, mode
+        return path, item.mode
 
     # ---- Toolbar actions ----
     def action_download(self):
-        # allow multi-select download (files only)
-        items = [
-            it for it in self._selected_items()
-            if self._item_path_mode(it)[0]
-            and not statmod.S_ISDIR(self._item_path_mode(it)[1])
-        ]
+        # allow multi-select download; folders are copied recursively
+        items = [it for it in self._selected_items() if self._item_path_mode(it)[0]]
         if not items:
             return
         dest_dir = QFileDialog.getExistingDirectory(self, "Download to")
         if not dest_dir:
             return
-        self._ensure_sftp()
+        engine = self._ensure_transfers()
+        if engine is None:
+            return
         for it in items:
             path, mode = self._item_path_mode(it)
-            local_path = os.path.join(dest_dir, os.path.basename(path))
-            try:
-                self.sftp.get(path, local_path)
-            except Exception as e:
-                print("Download error:", e)
+            local_path = os.path.join(dest_dir, posixpath.basename(path.rstrip("/")) or "root")
+            if mode is not None and statmod.S_ISDIR(mode):
+                engine.download_tree(path, local_path)
+            else:
+                engine.download(path, local_path)
 
     def action_upload(self):
         if not self._ensure_sftp():
             return
-        file_path, _ = QFileDialog.getOpenFileName(self, "Upload file")
-        if not file_path:
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Upload files")
+        if not file_paths:
             return
-        remote_path = posixpath.join(self.current_path, os.path.basename(file_path))
-        try:
-            self.sftp.put(file_path, remote_path)
-            self.refresh()
-        except Exception as e:
-            print("Upload error:", e)
+        engine = self._ensure_transfers()
+        if engine is None:
+            return
+        for file_path in file_paths:
+            remote_path = posixpath.join(self.current_path, os.path.basename(file_path))
+            engine.upload(file_path, remote_path)
+
+    def action_upload_folder(self):
+        if not self._ensure_sftp():
+            return
+        local_dir = QFileDialog.getExistingDirectory(self, "Upload folder")
+        if not local_dir:
+            return
+        engine = self._ensure_transfers()
+        if engine is None:
+            return
+        name = os.path.basename(os.path.normpath(local_dir))
+        engine.upload_tree(local_dir, posixpath.join(self.current_path, name))
+
+    def action_sync(self):
+        """Push a local project folder, sending only changed files or blocks."""
+        if not self._ensure_sftp():
+            return
+        local_dir = QFileDialog.getExistingDirectory(self, "Sync folder")
+        if not local_dir:
+            return
+        name = os.path.basename(os.path.normpath(local_dir))
+        remote_dir, ok = QInputDialog.getText(self, "Sync to", "Remote folder:", text=remote_project_dir(name))
+        remote_dir = remote_dir.strip()
+        if not ok or not remote_dir:
+            return
+        engine = self._ensure_transfers()
+        if engine is None:
+            return
+        engine.sync(local_dir, remote_dir)
+
+    def action_search(self):
+        """Search file names below the current folder (or the indexed project it is in)."""
+        if not self._ensure_sftp():
+            return
+        host = self._host_key()
+        root = self.search_index.find_root(host, self.current_path) or self.current_path
+        for panel in self._search_panels:
+            if panel.root == posixpath.normpath(root):
+                panel.raise_()
+                panel.activateWindow()
+                return
+        panel = RemoteSearchPanel(self.search_index, self.ssh_client, host, root)
+        panel.setAttribute(Qt.WA_DeleteOnClose)
+        panel.open_requested.connect(self._open_hit)
+        panel.reveal_requested.connect(self.navigate)
+        panel.destroyed.connect(
+            lambda _=None, p=panel: self._search_panels.remove(p) if p in self._search_panels else None
+        )
+        self._search_panels.append(panel)
+        panel.show()
+
+    def action_checksums(self):
+        """Check a selected checksum manifest, or hash the selected files on the server."""
+        items = [it for it in self._selected_items() if self._item_path_mode(it)[0]]
+        if not items or not self._ensure_sftp():
+            return
+        if self.integrity is None or self.integrity.host != self._host_key():
+            self.integrity = IntegrityService(self.ssh_client, self._host_key())
+        if len(items) == 1 and not items[0].is_dir and is_manifest_name(items[0].name):
+            panel = IntegrityPanel(self.integrity, manifest=self._item_path_mode(items[0])[0])
+        else:
+            # folders are expanded on the server; the trailing slash marks them
+            paths = [self._item_path_mode(it)[0] + ("/" if it.is_dir else "") for it in items]
+            panel = IntegrityPanel(self.integrity, paths=paths, base_dir=self.current_path)
+        panel.setAttribute(Qt.WA_DeleteOnClose)
+        panel.destroyed.connect(lambda _=None, p=panel: self._viewers.remove(p) if p in self._viewers else None)
+        self._viewers.append(panel)
+        panel.show()
+
+    def _open_hit(self, hit: SearchHit):
+        self._open_path(hit.path, hit.is_dir, hit.size)
 
     def action_new_folder(self):
         if not self._ensure_sftp():
@@ -257,6 +609,7 @@ class ServerFilesView(QWidget):
         remote_path = name
         try:
             self.sftp.mkdir(remote_path)
+            self._invalidate(posixpath.dirname(remote_path))
             self.refresh()
         except Exception as e:
             print("mkdir error:", e)
@@ -273,6 +626,7 @@ class ServerFilesView(QWidget):
             try:
                 if statmod.S_ISDIR(mode):
                     self.sftp.rmdir(path)
+                    self._invalidate(path, tree=True)
                 else:
                     self.sftp.remove(path)
             except Exception as e:
@@ -292,7 +646,9 @@ class ServerFilesView(QWidget):
         act_open = menu.addAction("Open")
         act_open_text = menu.addAction("Open with default text editor")
         act_open_prog = menu.addAction("Open with default program...")
+        act_preview = menu.addAction("Preview (head / tail / seek)")
         act_compare = menu.addAction("Compare file with...")
+        act_checksums = menu.addAction("Verify checksums...")
         menu.addSeparator()
         act_download = menu.addAction("Download")
         act_delete = menu.addAction("Delete")
@@ -311,6 +667,11 @@ class ServerFilesView(QWidget):
         if chosen == act_open or chosen == act_open_text or chosen == act_open_prog:
             if path and mode and not statmod.S_ISDIR(mode):
                 self._open_local(path)
+        elif chosen == act_preview:
+            if path and mode and not statmod.S_ISDIR(mode):
+                self._open_viewer(path)
+        elif chosen == act_checksums:
+            self.action_checksums()
         elif chosen == act_download:
             self.action_download()
         elif chosen == act_delete:
@@ -330,24 +691,34 @@ class ServerFilesView(QWidget):
             self._show_permissions(path, mode)
 
     # ---- Double click ----
-    def on_item_double_clicked(self, item: QTreeWidgetItem, column: int):
-        path, mode = self._item_path_mode(item)
-        if item.text(0) == "..":
+    def on_item_double_clicked(self, index: QModelIndex):
+        item = self.model.entry(index)
+        if item is None:
+            return
+        if item is PARENT_ENTRY:
             self.go_up()
             return
+        path, mode = self._item_path_mode(item)
         if not path or mode is None:
             return
-        if statmod.S_ISDIR(mode):
-            self.current_path = path
-            self.load_root(self.current_path)
+        self._open_path(path, statmod.S_ISDIR(mode), item.size)
+
+    def _open_path(self, path: str, is_dir: bool, size: int):
+        if is_dir:
+            self.navigate(path)
+        elif size > PREVIEW_DOWNLOAD_LIMIT or is_gzip_name(path):
+            self._open_viewer(path)
         else:
             self._open_local(path)
 
     # ---- Helper methods ----
     
     def _open_local(self, remote_path: str):
-        """Download a remote file to a local cache.
+        """Open a remote file through the local preview cache.
 
+        An unchanged file (same size and mtime) that was opened before is
+        reused at once; otherwise it is fetched by the transfer engine and
+        opened when the download finishes.
         On Windows we try to open it with the system default program.
         On Linux/macOS we *only* download and print the local path,
         不再调用 xdg-open，避免在没有 GUI 的服务器上各种报错。
@@ -355,21 +726,60 @@ class ServerFilesView(QWidget):
         if not self._ensure_sftp():
             return
         try:
-            cache_dir = os.path.join(os.path.expanduser("~"), ".bioflow_cache")
-            os.makedirs(cache_dir, exist_ok=True)
-            local_name = os.path.basename(remote_path)
-            tmp_path = os.path.join(cache_dir, local_name)
-            self.sftp.get(remote_path, tmp_path)
-            # Windows 下用系统默认程序打开，其它平台只打印路径
-            if sys.platform.startswith("win"):
-                try:
-                    os.startfile(tmp_path)  # type: ignore[attr-defined]
-                except Exception as e:
-                    print("open_local error:", e)
-            else:
-                print(f"Downloaded to: {tmp_path}")
+            st = self.sftp.stat(remote_path)
         except Exception as e:
             print("open_local error:", e)
+            return
+        host = self._host_key()
+        size, mtime = st.st_size or 0, st.st_mtime or 0
+        cached = self.preview_cache.lookup(host, remote_path, size, mtime)
+        if cached is not None:
+            self._launch_local(cached, from_cache=True)
+            return
+        for task, pending_host, _size, _mtime in self._pending_opens.values():
+            if pending_host == host and task.remote_path == remote_path and task.active:
+                # already on its way into the same .part file; it opens when done
+                return
+        engine = self._ensure_transfers()
+        if engine is None:
+            return
+        task = engine.download(remote_path, self.preview_cache.local_path(host, remote_path))
+        self._pending_opens[id(task)] = (task, host, size, mtime)
+
+    def _open_viewer(self, remote_path: str):
+        """Look at a (huge) remote file through ranged reads instead of downloading it."""
+        if not self.ssh_client or not getattr(self.ssh_client, "client", None):
+            return
+        viewer = RemoteFileViewer(self.ssh_client, remote_path)
+        viewer.setAttribute(Qt.WA_DeleteOnClose)
+        viewer.destroyed.connect(lambda _=None, v=viewer: self._viewers.remove(v) if v in self._viewers else None)
+        self._viewers.append(viewer)
+        viewer.show()
+
+    def _host_key(self) -> str:
+        address = getattr(self.ssh_client, "address", None)
+        return "{2}@{0}:{1}".format(*address) if address else ""
+
+    def _finish_open(self, task: TransferTask):
+        pending = self._pending_opens.pop(id(task), None)
+        if pending is None or task.status != DONE:
+            return
+        _, host, size, mtime = pending
+        self.preview_cache.commit(host, task.remote_path, size, mtime, task.local_path)
+        self._launch_local(task.local_path)
+
+    def _launch_local(self, local_path: str, from_cache: bool = False):
+        # Windows 下用系统默认程序打开，其它平台只打印路径
+        if sys.platform.startswith("win"):
+            try:
+                os.startfile(local_path)  # type: ignore[attr-defined]
+            except Exception as e:
+                print("open_local error:", e)
+        else:
+            stats = self.preview_cache.stats()
+            verb = "Cached copy at" if from_cache else "Downloaded to"
+            print(f"{verb}: {local_path} (preview cache {stats['hits']} hits / {stats['misses']} misses)")
+
     def _rename(self, remote_path: str | None):
         if not remote_path or not self._ensure_sftp():
             return
@@ -380,6 +790,8 @@ class ServerFilesView(QWidget):
             return
         try:
             self.sftp.rename(remote_path, new_path)
+            self._invalidate(posixpath.dirname(remote_path), posixpath.dirname(new_path))
+            self._invalidate(remote_path, tree=True)
             self.refresh()
         except Exception as e:
             print("rename error:", e)
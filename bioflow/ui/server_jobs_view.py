@@ -1,18 +1,344 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableWidget, QHBoxLayout, QPushButton
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableView, QHBoxLayout, QPushButton, QLineEdit, QHeaderView, QAbstractItemView
+from PySide6.QtCore import Qt, QObject, QThread, QTimer, Signal, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor
+from collections import Counter
+import threading
+import time
+from bioflow.core.job_store import JobStore
+from bioflow.core.slurm import FAST_POLL, JobDiff, SlurmJob, SlurmMonitor, format_duration
+
+COLUMNS = ["Job ID", "Name", "State", "Time", "Partition", "Nodes / Reason", "Max RSS", "Project"]
+TIME_COLUMN = 3
+
+STATE_COLORS = {
+    "RUNNING": QColor("#10B981"),
+    "PENDING": QColor("#F59E0B"),
+    "COMPLETED": QColor("#6B7280"),
+    "FAILED": QColor("#EF4444"),
+    "TIMEOUT": QColor("#EF4444"),
+    "OUT_OF_MEMORY": QColor("#EF4444"),
+    "NODE_FAIL": QColor("#EF4444"),
+    "CANCELLED": QColor("#9CA3AF"),
+}
+
+
+def _fmt_memory(n: int | None) -> str:
+    if n is None:
+        return "-"
+    if n >= 1 << 30:
+        return f"{n / (1 << 30):.1f} GB"
+    return f"{n / (1 << 20):.0f} MB"
+
+
+def _job_id_key(job_id: str):
+    # 1234_5 sorts as (1234, 5), not as text
+    head, _, task = job_id.partition("_")
+    return (int(head) if head.isdigit() else 0, int(task) if task.isdigit() else -1, job_id)
+
+
+class JobPollWorker(QObject):
+    diff_ready = Signal(object)      # JobDiff
+    failed = Signal(str)
+    finished = Signal()
+
+    def __init__(self, monitor: SlurmMonitor):
+        super().__init__()
+        self.monitor = monitor
+        self._cancel = threading.Event()
+        self._wake = threading.Event()
+
+    def refresh(self):
+        self.monitor.hurry()
+        self._wake.set()
+
+    def stop(self):
+        self._cancel.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._cancel.is_set():
+            try:
+                diff = self.monitor.poll()
+                if diff and not self._cancel.is_set():
+                    self.diff_ready.emit(diff)
+            except Exception as e:
+                self.failed.emit(str(e) or type(e).__name__)
+            self._wake.wait(max(self.monitor.interval, FAST_POLL))
+            self._wake.clear()
+        if self.monitor.store is not None:
+            self.monitor.store.close()
+        self.finished.emit()
+
+
+class JobTableModel(QAbstractTableModel):
+    """Slurm jobs as a table, updated row by row from ``JobDiff``s.
+
+    Changed jobs are updated in place and new ones appended, so rows do
+    not jump around between polls; sorting only happens when asked for.
+    Text is formatted only for the rows the view shows, and the running
+    time of every running job comes from its start time at paint time.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._jobs: dict[str, SlurmJob] = {}
+        self._rows: list[SlurmJob] = []
+        self._row_of: dict[str, int] = {}
+        self._filter = ""
+        self._sort_column = 0
+        self._sort_order = Qt.AscendingOrder
+
+    # ---- population ----
+    def apply(self, diff: JobDiff):
+        for job in diff.added:
+            self._jobs[job.job_id] = job
+        for job in diff.changed:
+            self._jobs[job.job_id] = job
+        for job_id in diff.removed:
+            self._jobs.pop(job_id, None)
+        if self._filter or diff.removed:
+            # rows may come and go anywhere; rebuilding the index is cheaper than thousands of single removals
+            self._resort()
+            return
+
+        changed = [self._row_of[job.job_id] for job in diff.changed if job.job_id in self._row_of]
+        for job in diff.changed:
+            row = self._row_of.get(job.job_id)
+            if row is not None:
+                self._rows[row] = job
+        if changed:
+            last = self.columnCount() - 1
+            if len(changed) > 100:
+                self.dataChanged.emit(self.index(min(changed), 0), self.index(max(changed), last))
+            else:
+                for row in changed:
+                    self.dataChanged.emit(self.index(row, 0), self.index(row, last))
+
+        added = [job for job in diff.added if job.job_id not in self._row_of]
+        if added:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for offset, job in enumerate(added):
+                self._row_of[job.job_id] = first + offset
+            self._rows.extend(added)
+            self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._jobs.clear()
+        self._rows = []
+        self._row_of = {}
+        self.endResetModel()
+
+    def state_counts(self) -> Counter:
+        return Counter(job.state for job in self._jobs.values())
+
+    def tick(self):
+        """Repaint running times."""
+        if self._rows:
+            self.dataChanged.emit(self.index(0, TIME_COLUMN), self.index(len(self._rows) - 1, TIME_COLUMN))
+
+    # ---- filtering / sorting ----
+    def set_filter(self, text: str):
+        text = text.strip().lower()
+        if text != self._filter:
+            self._filter = text
+            self._resort()
+
+    def _accepts(self, job: SlurmJob) -> bool:
+        text = self._filter
+        return (not text or text in job.job_id or text in job.name.lower() or text in job.state.lower()
+                or text in job.project.lower())
+
+    def _resort(self):
+        rows = [job for job in self._jobs.values() if self._accepts(job)]
+        column, reverse = self._sort_column, self._sort_order == Qt.DescendingOrder
+        if column == 0:
+            key = lambda job: _job_id_key(job.job_id)
+        elif column == TIME_COLUMN:
+            now = time.time()
+            key = lambda job: job.run_time(now) or 0.0
+        elif column == 6:
+            key = lambda job: job.max_rss or 0
+        else:
+            attr = ("job_id", "name", "state", None, "partition", "where", None, "project")[column]
+            key = lambda job: getattr(job, attr).lower()
+        rows.sort(key=key, reverse=reverse)
+        self.beginResetModel()
+        self._rows = rows
+        self._row_of = {job.job_id: row for row, job in enumerate(rows)}
+        self.endResetModel()
+
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self._resort()
+
+    # ---- Qt model API ----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        job = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return job.job_id
+            if column == 1:
+                return job.name
+            if column == 2:
+                return job.state
+            if column == TIME_COLUMN:
+                return format_duration(job.run_time())
+            if column == 4:
+                return job.partition
+            if column == 5:
+                if job.exit_code and job.exit_code != "0:0":
+                    return f"{job.where} (exit {job.exit_code})"
+                return job.where
+            if column == 6:
+                return _fmt_memory(job.max_rss)
+            if column == 7:
+                return job.project
+        elif role == Qt.ForegroundRole and column == 2:
+            return STATE_COLORS.get(job.state)
+        return None
+
 
 class ServerJobsView(QWidget):
-    def __init__(self, ssh_client=None):
+    """The user's Slurm jobs, polled in the background while the view is open.
+
+    Jobs known from earlier sessions come from the local ``JobStore`` at
+    once; polling then only brings in what changed on the cluster.
+    """
+
+    def __init__(self, ssh_client=None, store: JobStore | None = None):
         super().__init__()
         self.ssh_client = ssh_client
+        self.store = store
+        self.poll_thread: QThread | None = None
+        self.poll_worker: JobPollWorker | None = None
+        self.setWindowTitle("Jobs")
+        self.resize(900, 560)
         layout = QVBoxLayout(self)
         layout.setContentsMargins(6, 6, 6, 6)
         layout.setSpacing(4)
         header = QHBoxLayout()
         header.addWidget(QLabel("Jobs"))
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter by id, name or state")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.summary_label = QLabel("")
+        self.summary_label.setStyleSheet("color: #6B7280; font-size: 11px;")
         self.refresh_btn = QPushButton("Refresh")
+        header.addWidget(self.filter_edit, 1)
+        header.addWidget(self.summary_label)
         header.addStretch(1)
         header.addWidget(self.refresh_btn)
         layout.addLayout(header)
-        self.table = QTableWidget(0, 4)
-        self.table.setHorizontalHeaderLabels(["Job ID", "Name", "State", "Time"])
+        self.model = JobTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.AscendingOrder)
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setDefaultSectionSize(20)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.horizontalHeader().resizeSection(1, 240)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         layout.addWidget(self.table)
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #6B7280; font-size: 11px;")
+        layout.addWidget(self.status_label)
+
+        # running times advance locally between polls
+        self.tick_timer = QTimer(self)
+        self.tick_timer.setInterval(1000)
+        self.tick_timer.timeout.connect(self.model.tick)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(150)
+        self.filter_timer.timeout.connect(lambda: self.model.set_filter(self.filter_edit.text()))
+        self.filter_edit.textChanged.connect(self.filter_timer.start)
+        self.refresh_btn.clicked.connect(self.refresh)
+
+    def start(self):
+        if self.poll_thread is not None:
+            return
+        if not self.ssh_client or not getattr(self.ssh_client, "client", None):
+            self.status_label.setText("Not connected")
+            return
+        self.model.clear()
+        host, _port, user = self.ssh_client.address
+        try:
+            if self.store is None:
+                self.store = JobStore()
+            monitor = SlurmMonitor(self.ssh_client, store=self.store, account=f"{user}@{host}")
+        except Exception as e:
+            # the history is a convenience; poll without it
+            print("Jobs error:", e)
+            monitor = SlurmMonitor(self.ssh_client)
+        self.model.apply(JobDiff(added=list(monitor.jobs.values())))
+        self.poll_thread = QThread()
+        self.poll_worker = JobPollWorker(monitor)
+        self.poll_worker.moveToThread(self.poll_thread)
+        self.poll_thread.started.connect(self.poll_worker.run)
+        self.poll_worker.diff_ready.connect(self._apply_diff)
+        self.poll_worker.failed.connect(self._on_failed)
+        self.poll_worker.finished.connect(self.poll_thread.quit)
+        self.poll_worker.finished.connect(self.poll_worker.deleteLater)
+        self.poll_thread.finished.connect(self._cleanup_thread)
+        self.poll_thread.start()
+        self.tick_timer.start()
+        known = self.model.rowCount()
+        self.status_label.setText(f"{known:,} jobs from history, syncing…" if known else "Loading jobs…")
+
+    def stop(self):
+        if self.poll_worker is not None:
+            self.poll_worker.stop()
+        self.tick_timer.stop()
+
+    def refresh(self):
+        if self.poll_worker is not None:
+            self.poll_worker.refresh()
+        else:
+            self.start()
+
+    def _cleanup_thread(self):
+        if self.poll_thread is not None:
+            self.poll_thread.deleteLater()
+        self.poll_thread = None
+        self.poll_worker = None
+        # reopened while the old worker was winding down
+        if self.isVisible():
+            self.start()
+
+    def _apply_diff(self, diff: JobDiff):
+        self.model.apply(diff)
+        counts = self.model.state_counts()
+        self.summary_label.setText(" · ".join(f"{state.lower()} {n:,}" for state, n in counts.most_common()))
+        self.status_label.setText(f"Updated {time.strftime('%H:%M:%S')}")
+
+    def _on_failed(self, error: str):
+        print("Jobs error:", error)
+        self.status_label.setText(f"Job poll failed: {error}")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.start()
+
+    def closeEvent(self, event):
+        self.stop()
+        super().closeEvent(event)
@@ -1,126 +1,386 @@
-from PySide6.QtWidgets import QTextEdit
-from PySide6.QtCore import Qt, QThread, Signal, QObject
-from PySide6.QtGui import QTextCursor, QKeyEvent, QTextCharFormat, QColor, QGuiApplication
-import re
+from PySide6.QtWidgets import QAbstractScrollArea, QLineEdit
+from PySide6.QtCore import Qt, QThread, Signal, QObject, QRect, QPointF, QEvent
+from PySide6.QtGui import QKeyEvent, QColor, QGuiApplication, QPainter, QFont, QFontMetricsF
+from collections import deque
+import codecs
+import select
+import socket
+import threading
+import time
+from bioflow.core.session_log import SessionCatalog, SessionRecorder
+from bioflow.core.terminal_screen import (
+    BOLD,
+    DEFAULT_COLOR,
+    DIM,
+    INVISIBLE,
+    ITALIC,
+    REVERSE,
+    SCROLLBACK_LINES,
+    STRIKE,
+    UNDERLINE,
+    TerminalScreen,
+    attr_bg,
+    attr_fg,
+    cell_column,
+)
+
+
+DEFAULT_FG = QColor("#f8f9fa")
+DEFAULT_BG = QColor("#000000")
+SELECTION_COLOR = QColor(77, 171, 247, 110)
+
+
+def _xterm_palette() -> list[QColor]:
+    """The 256 xterm colors; the first 16 match BioFlow's earlier ANSI colors."""
+    base = [
+        "#000000", "#e03131", "#2f9e44", "#f08c00", "#1971c2", "#9c36b5", "#0c8599", "#f8f9fa",
+        "#868e96", "#ff6b6b", "#51cf66", "#ffd43b", "#4dabf7", "#da77f2", "#63e6be", "#ffffff",
+    ]
+    colors = [QColor(c) for c in base]
+    steps = [0, 95, 135, 175, 215, 255]
+    for r in steps:
+        for g in steps:
+            for b in steps:
+                colors.append(QColor(r, g, b))
+    for i in range(24):
+        level = 8 + i * 10
+        colors.append(QColor(level, level, level))
+    return colors
+
+
+PALETTE = _xterm_palette()
+
+# shell output reaches the screen at most this often...
+FRAME_INTERVAL = 1 / 60
+# ...in batches of at most this many characters, so one batch never stalls the UI for long
+MAX_BATCH = 128 * 1024
+# bytes read ahead of the view before the reader stops draining the channel
+MAX_BUFFER = 1024 * 1024
+READ_SIZE = 64 * 1024
+# how often an idle reader checks whether it has been stopped
+IDLE_TIMEOUT = 0.1
+# input goes out in pieces of at most one SSH packet...
+SEND_CHUNK = 32 * 1024
+# ...and, while the remote window is shut, the writer checks it this often
+WINDOW_WAIT = 0.005
+
+BRACKETED_PASTE_START = "\x1b[200~"
+BRACKETED_PASTE_END = "\x1b[201~"
+
+# keys with a fixed sequence; cursor keys depend on DECCKM and are handled apart
+KEY_SEQUENCES = {
+    Qt.Key_Return: "\r",
+    Qt.Key_Enter: "\r",
+    Qt.Key_Backspace: "\x7f",
+    Qt.Key_Tab: "\t",
+    Qt.Key_Backtab: "\x1b[Z",
+    Qt.Key_Escape: "\x1b",
+    Qt.Key_Insert: "\x1b[2~",
+    Qt.Key_Delete: "\x1b[3~",
+    Qt.Key_PageUp: "\x1b[5~",
+    Qt.Key_PageDown: "\x1b[6~",
+    Qt.Key_F1: "\x1bOP",
+    Qt.Key_F2: "\x1bOQ",
+    Qt.Key_F3: "\x1bOR",
+    Qt.Key_F4: "\x1bOS",
+    Qt.Key_F5: "\x1b[15~",
+    Qt.Key_F6: "\x1b[17~",
+    Qt.Key_F7: "\x1b[18~",
+    Qt.Key_F8: "\x1b[19~",
+    Qt.Key_F9: "\x1b[20~",
+    Qt.Key_F10: "\x1b[21~",
+    Qt.Key_F11: "\x1b[23~",
+    Qt.Key_F12: "\x1b[24~",
+}
+CURSOR_KEYS = {
+    Qt.Key_Up: "A",
+    Qt.Key_Down: "B",
+    Qt.Key_Right: "C",
+    Qt.Key_Left: "D",
+    Qt.Key_Home: "H",
+    Qt.Key_End: "F",
+}
 
 
-CSI_PATTERN = re.compile(r"\x1b\[([0-9;?]*)([A-Za-z])")
-OSC_PATTERN = re.compile(r"\x1b\][^\x07]*\x07")
+class ShellReader(QObject):
+    """Reads a shell channel on its own thread and hands text to the view in frame-sized batches.
+
+    The thread sleeps in ``select`` until the channel has data, then drains
+    everything available. Output is decoded incrementally, so multi-byte
+    characters split across reads survive, and is emitted at most once per
+    frame. A new batch is only emitted after the view has taken the last
+    one; while it catches up, reading stops once ``MAX_BUFFER`` bytes are
+    waiting, and the SSH window throttles the remote side. When a
+    ``recorder`` is set, every read is also handed to it, raw.
+    """
+    data_ready = Signal(int, str)        # generation, text
+    closed = Signal(int)                 # generation
+    finished = Signal()
+
+    def __init__(self, channel, generation: int = 0):
+        super().__init__()
+        self.channel = channel
+        self.generation = generation
+        self.recorder = None
+        self._running = True
+        self._taken = threading.Event()
+        self._taken.set()
 
+    def stop(self):
+        self._running = False
+        self._taken.set()
 
-def apply_sgr_to_format(fmt: QTextCharFormat, params: str) -> QTextCharFormat:
-    """Apply SGR (Select Graphic Rendition) codes to the QTextCharFormat.
+    def ack(self):
+        """Called by the view once it has processed the last batch."""
+        self._taken.set()
 
-    Supports basic colors: 30-37, 90-97 foreground; 40-47 background; 0 reset.
+    def run(self):
+        chan = self.channel
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending: list[str] = []
+        buffered = 0
+        last_emit = 0.0
+        eof = False
+        while self._running and not eof:
+            if pending and not self._taken.is_set():
+                # the view is still busy with the last batch
+                self._taken.wait(IDLE_TIMEOUT)
+                timeout = 0.0
+            elif pending:
+                timeout = max(last_emit + FRAME_INTERVAL - time.monotonic(), 0.0)
+            else:
+                timeout = IDLE_TIMEOUT
+            try:
+                if buffered < MAX_BUFFER:
+                    readable, _, _ = select.select([chan], [], [], timeout)
+                    if readable:
+                        while chan.recv_ready() and buffered < MAX_BUFFER:
+                            data = chan.recv(READ_SIZE)
+                            recorder = self.recorder
+                            if recorder is not None:
+                                recorder.write(data)
+                            buffered += len(data)
+                            pending.append(decoder.decode(data))
+                        eof = not chan.recv_ready() and (chan.eof_received or chan.closed)
+            except Exception as e:
+                print("Shell read error:", e)
+                break
+            if eof:
+                pending.append(decoder.decode(b"", final=True))
+            if pending and (eof or (self._taken.is_set() and time.monotonic() - last_emit >= FRAME_INTERVAL)):
+                text = "".join(pending)
+                pending = [text[MAX_BATCH:]] if len(text) > MAX_BATCH and not eof else []
+                buffered = len(pending[0]) if pending else 0
+                self._taken.clear()
+                last_emit = time.monotonic()
+                self.data_ready.emit(self.generation, text if eof else text[:MAX_BATCH])
+        if eof:
+            self.closed.emit(self.generation)
+        self.finished.emit()
+
+
+class ShellWriter(QObject):
+    """Sends keystrokes and pastes to a shell channel from its own thread.
+
+    Input is queued in order. A key pressed when nothing was sent in the
+    last frame goes out at once, straight from the caller's thread (the
+    channel never blocks); keys arriving within the same frame share one
+    packet. Pastes are cut into ``SEND_CHUNK`` pieces and only
+    sent while the channel's window is open, so a large paste neither
+    blocks the GUI nor loses data when the remote side is slow to read.
     """
-    if params == "":
-        codes = [0]
-    else:
-        codes = [int(p or 0) for p in params.split(";") if p != ""]
-
-    # Work on a copy
-    new_fmt = QTextCharFormat(fmt)
-
-    for code in codes:
-        if code == 0:
-            new_fmt = QTextCharFormat()  # reset
-        elif 30 <= code <= 37:
-            # standard foreground
-            color_map = {
-                30: QColor("#000000"),
-                31: QColor("#e03131"),  # red
-                32: QColor("#2f9e44"),  # green
-                33: QColor("#f08c00"),  # yellow
-                34: QColor("#1971c2"),  # blue
-                35: QColor("#9c36b5"),  # magenta
-                36: QColor("#0c8599"),  # cyan
-                37: QColor("#f8f9fa"),  # white
-            }
-            new_fmt.setForeground(color_map.get(code, QColor("#f8f9fa")))
-        elif 90 <= code <= 97:
-            # bright foreground
-            bright_map = {
-                90: QColor("#868e96"),  # bright black (gray)
-                91: QColor("#ff6b6b"),
-                92: QColor("#51cf66"),
-                93: QColor("#ffd43b"),
-                94: QColor("#4dabf7"),
-                95: QColor("#da77f2"),
-                96: QColor("#63e6be"),
-                97: QColor("#ffffff"),
-            }
-            new_fmt.setForeground(bright_map.get(code, QColor("#ffffff")))
-        elif 40 <= code <= 47:
-            # background colors
-            bg_map = {
-                40: QColor("#000000"),
-                41: QColor("#661515"),
-                42: QColor("#0f3b1d"),
-                43: QColor("#5f3c00"),
-                44: QColor("#102b5c"),
-                45: QColor("#4b1c5e"),
-                46: QColor("#0b3b42"),
-                47: QColor("#ced4da"),
-            }
-            new_fmt.setBackground(bg_map.get(code, QColor("#000000")))
-        # 1: bold 等可以视需要加，这里先忽略
-    return new_fmt
-
+    finished = Signal()
 
-class ShellReader(QObject):
-    data_ready = Signal(str)
-    closed = Signal()
+    _KEYS, _PASTE, _PASTE_END = range(3)
 
-    def __init__(self, ssh_client):
+    def __init__(self, channel):
         super().__init__()
-        self.ssh_client = ssh_client
+        self.channel = channel
         self._running = True
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._queue: deque[tuple[int, bytes]] = deque()
+        # set while the thread holds data taken off the queue
+        self._busy = False
+        self._last_send = 0.0
+
+    def write(self, data: str):
+        if not data:
+            return
+        raw = data.encode("utf-8")
+        with self._lock:
+            if not self._queue and not self._busy and time.monotonic() - self._last_send >= FRAME_INTERVAL:
+                try:
+                    sent = self.channel.send(raw) if self.channel.send_ready() else 0
+                except socket.timeout:
+                    sent = 0
+                except Exception as e:
+                    print("Shell write error:", e)
+                    return
+                self._last_send = time.monotonic()
+                raw = raw[sent:]
+                if not raw:
+                    return
+            self._queue.append((self._KEYS, raw))
+        self._wake.set()
+
+    def paste(self, text: str, bracketed: bool = False):
+        data = text.encode("utf-8")
+        with self._lock:
+            if bracketed:
+                self._queue.append((self._KEYS, BRACKETED_PASTE_START.encode()))
+            for i in range(0, len(data), SEND_CHUNK):
+                self._queue.append((self._PASTE, data[i:i + SEND_CHUNK]))
+            if bracketed:
+                self._queue.append((self._PASTE_END, BRACKETED_PASTE_END.encode()))
+        self._wake.set()
+
+    def cancel_paste(self):
+        """Drop the part of any paste not sent yet; a started bracketed paste is still closed."""
+        with self._lock:
+            self._queue = deque(item for item in self._queue if item[0] != self._PASTE)
 
     def stop(self):
         self._running = False
+        self._wake.set()
 
     def run(self):
+        chan = self.channel
         while self._running:
-            try:
-                chunk = self.ssh_client.shell_recv()
-                if chunk:
-                    self.data_ready.emit(chunk)
-            except Exception:
+            with self._lock:
+                if not self._queue:
+                    self._wake.clear()
+            if not self._wake.wait(IDLE_TIMEOUT):
+                if chan.closed:
+                    break
+                continue
+            delay = self._last_send + FRAME_INTERVAL - time.monotonic()
+            if delay > 0 and not self._pasting():
+                # gather the rest of this frame's keystrokes
+                time.sleep(delay)
+            data = self._take()
+            sent = not data or self._send_all(chan, data)
+            with self._lock:
+                self._busy = False
+                self._last_send = time.monotonic()
+            if not sent:
                 break
-            QThread.msleep(5)
-        self.closed.emit()
-
+        self.finished.emit()
+
+    def _pasting(self) -> bool:
+        with self._lock:
+            return any(kind != self._KEYS for kind, _ in self._queue)
+
+    def _take(self) -> bytes:
+        parts, size = [], 0
+        with self._lock:
+            while self._queue:
+                data = self._queue[0][1]
+                if parts and size + len(data) > SEND_CHUNK:
+                    break
+                self._queue.popleft()
+                parts.append(data)
+                size += len(data)
+            self._busy = bool(parts)
+        return b"".join(parts)
+
+    def _send_all(self, chan, data: bytes) -> bool:
+        pos = 0
+        while pos < len(data):
+            if not self._running or chan.closed:
+                return False
+            if not chan.send_ready():
+                # the remote side has not opened the window yet
+                time.sleep(WINDOW_WAIT)
+                continue
+            try:
+                pos += chan.send(data[pos:pos + SEND_CHUNK])
+            except socket.timeout:
+                continue
+            except Exception as e:
+                print("Shell write error:", e)
+                return False
+        return True
+
+
+class ServerTerminalView(QAbstractScrollArea):
+    """Interactive SSH terminal: an xterm-compatible screen painted cell by cell.
+
+    Output goes through ``TerminalScreen``; only the rows it reports as
+    changed are repainted, so a full-screen program redrawing a few cells
+    costs a few cells, and the widget never accumulates a document. Lines
+    that scroll off the top are kept in a ``Scrollback`` of
+    ``scrollback_lines`` lines, reachable with the scroll bar and searchable
+    with Ctrl+Shift+F. Each view opens its own shell channel, so several
+    can share one connection. With ``set_recording(True)`` each shell session is
+    also written to the session log (see ``SessionRecorder``).
+    """
+    title_changed = Signal(str)
 
-class ServerTerminalView(QTextEdit):
-    """Interactive SSH terminal with basic ANSI color rendering."""
-    def __init__(self, ssh_client=None):
+    def __init__(self, ssh_client=None, scrollback_lines: int = SCROLLBACK_LINES):
         super().__init__()
+        # the viewport's events pass through eventFilter from here on
+        self._find_edit: QLineEdit | None = None
         self.ssh_client = ssh_client
-        self.setReadOnly(True)
-        self.setAcceptRichText(False)
-        self.setUndoRedoEnabled(False)
+        self.screen = TerminalScreen(120, 32, history_lines=scrollback_lines, reply=self._send)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setAttribute(Qt.WA_InputMethodEnabled, True)
+        self.viewport().setCursor(Qt.IBeamCursor)
+        self.viewport().setAttribute(Qt.WA_OpaquePaintEvent, True)
+        self.verticalScrollBar().valueChanged.connect(lambda _: self.viewport().update())
+
+        self.channel = None
+        self.writer: ShellWriter | None = None
+        self.writer_thread: QThread | None = None
+        self.reader_thread: QThread | None = None
+        self.reader: ShellReader | None = None
+        self._reader_generation = 0
+        self._connected = False
+        # session logging; the catalog is opened on first use
+        self.recording = False
+        self.recorder: SessionRecorder | None = None
+        self.session_catalog: SessionCatalog | None = None
+        # (cols, rows) the screen keeps regardless of the widget size, for replay
+        self._fixed_size = None
+        # selection as ((line, col), (line, col)) in scrollback+screen line numbers
+        self._selection = None
+        self._selecting = False
+        self._cursor_row = 0
+        # last search hit as (line, col), where "find again" continues from
+        self._match = None
 
         # 可调字号：用 _font_size + _apply_font_style 管理
         self._font_size = 11
-        self._base_style = (
-            "QTextEdit { background-color: #000000; color: #f8f9fa; "
-            "font-family: Consolas, 'Cascadia Mono', 'DejaVu Sans Mono', monospace; "
-        )
         self._apply_font_style()
 
-        self.reader_thread: QThread | None = None
-        self.reader: ShellReader | None = None
-        self._connected = False
-        self._current_format = QTextCharFormat()
-        self._append_text("Disconnected\n")
-    
+        self._append_text("Disconnected\r\n")
+
     def _apply_font_style(self):
-        """根据当前字号刷新样式和 QFont（覆盖全局 QSS 的 font-size）。"""
-        style = self._base_style + f"font-size: {self._font_size}pt; }}"
-        self.setStyleSheet(style)
-        font = self.font()
+        """根据当前字号刷新等宽字体和单元格尺寸。"""
+        font = QFont()
+        font.setFamilies(["Consolas", "Cascadia Mono", "DejaVu Sans Mono", "monospace"])
+        font.setStyleHint(QFont.Monospace)
+        font.setFixedPitch(True)
         font.setPointSize(self._font_size)
+        self._fonts = {}
+        for bold in (False, True):
+            for italic in (False, True):
+                variant = QFont(font)
+                variant.setBold(bold)
+                variant.setItalic(italic)
+                self._fonts[bold, italic] = variant
         self.setFont(font)
+        metrics = QFontMetricsF(font)
+        self._cell_w = max(metrics.horizontalAdvance("M"), 1.0)
+        self._cell_h = max(int(metrics.height() + 0.5), 1)
+        self._ascent = metrics.ascent()
+        self._fit_screen()
+        self.viewport().update()
+
+    @property
+    def font_size(self) -> int:
+        return self._font_size
 
     def adjust_font_size(self, delta: int):
         """根据增量调整字号，限制在 8–32pt 区间。"""
@@ -129,171 +389,484 @@ class ServerTerminalView(QTextEdit):
             return
         self._font_size = new_size
         self._apply_font_style()
+
     def set_connected(self, connected: bool, banner: str):
         if connected:
             self.start_shell()
         else:
-            self._connected = False
-            self._stop_reader()
-            self._append_text("\nDisconnected\n")
+            self.close_shell()
+            self._append_text("\r\nDisconnected\r\n")
+
+    def close_shell(self):
+        """Stop reading and writing and close this view's shell channel."""
+        self._connected = False
+        self._stop_io()
 
     def start_shell(self):
+        self._stop_io()
         try:
-            self.ssh_client.open_shell()
+            channel = self.ssh_client.open_shell_channel(width=self.screen.cols, height=self.screen.rows)
         except Exception as e:
-            self._append_text(f"Shell error: {e}\n")
+            self._append_text(f"Shell error: {e}\r\n")
             return
+        self.channel = channel
 
         self.clear()
         self._connected = True
-        self._current_format = QTextCharFormat()
 
-        self.reader_thread = QThread()
-        self.reader = ShellReader(self.ssh_client)
+        self._reader_generation += 1
+        self.reader_thread = QThread(self)
+        self.reader = ShellReader(channel, self._reader_generation)
+        if self.recording:
+            self.reader.recorder = self._start_recorder()
         self.reader.moveToThread(self.reader_thread)
         self.reader_thread.started.connect(self.reader.run)
-        self.reader.data_ready.connect(self._append_text)
+        self.reader.data_ready.connect(self._on_output)
         self.reader.closed.connect(self._on_remote_closed)
+        self.reader.finished.connect(self.reader_thread.quit)
+        self.reader.finished.connect(self.reader.deleteLater)
         self.reader_thread.start()
 
-    def _stop_reader(self):
-        if self.reader:
-            self.reader.stop()
-        if self.reader_thread:
-            self.reader_thread.quit()
-            self.reader_thread.wait(200)
+        self.writer_thread = QThread(self)
+        self.writer = ShellWriter(channel)
+        self.writer.moveToThread(self.writer_thread)
+        self.writer_thread.started.connect(self.writer.run)
+        self.writer.finished.connect(self.writer_thread.quit)
+        self.writer.finished.connect(self.writer.deleteLater)
+        self.writer_thread.start()
+
+    def _stop_io(self):
+        for worker, thread in ((self.reader, self.reader_thread), (self.writer, self.writer_thread)):
+            if worker:
+                worker.stop()
+            if thread:
+                thread.quit()
+                thread.wait(500)
         self.reader = None
         self.reader_thread = None
-
-    def _on_remote_closed(self):
-        self._append_text("\n[remote shell closed]\n")
-        self._stop_reader()
-
-    
-    
-    def _append_text(self, text: str):
-        """Append text with basic ANSI color support and strip unsupported CSI codes.
-
-        - 保留普通文本和颜色（SGR）
-        - 处理退格字符（\b, DEL，以及 ^?/^H 文本形式），避免出现删除符号乱码
-        - 处理清屏 CSI（ESC[2J / ESC[H），用于 top/htop 等全屏程序
-        """
-        if not text:
+        self.writer = None
+        self.writer_thread = None
+        if self.channel is not None:
+            self.ssh_client.close_shell_channel(self.channel)
+            self.channel = None
+        self._stop_recorder()
+
+    # ---- session recording ----
+    def set_recording(self, enabled: bool):
+        """Record shell sessions to the session log, starting with the current one."""
+        self.recording = enabled
+        if not enabled:
+            if self.reader is not None:
+                self.reader.recorder = None
+            self._stop_recorder()
+        elif self.reader is not None and self.recorder is None:
+            self.reader.recorder = self._start_recorder()
+
+    def _start_recorder(self) -> SessionRecorder | None:
+        host, user = "", ""
+        address = getattr(self.ssh_client, "address", None)
+        if address:
+            host, _port, user = address
+        try:
+            if self.session_catalog is None:
+                self.session_catalog = SessionCatalog()
+            self.recorder = SessionRecorder(self.session_catalog, host, user, self.screen.cols, self.screen.rows)
+        except Exception as e:
+            print("session log error:", e)
+            self.recorder = None
+        return self.recorder
+
+    def _stop_recorder(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    def set_fixed_size(self, cols: int | None, rows: int | None = None):
+        """Keep the screen at ``cols`` x ``rows`` whatever the widget size; None follows the widget again."""
+        self._fixed_size = (max(cols, 1), max(rows, 1)) if cols else None
+        self._fit_screen()
+
+    def _on_output(self, generation: int, text: str):
+        # batches from a reader that has since been stopped or replaced are dropped
+        reader = self.reader
+        if reader is None or generation != self._reader_generation:
             return
+        self._append_text(text)
+        reader.ack()
 
-        def _normalize_backspace(s: str) -> str:
-            s = s.replace("^?", "\b").replace("^H", "\b")
-            buf = []
-            for ch in s:
-                if ch in ("\b", "\x7f"):
-                    if buf:
-                        buf.pop()
-                        continue
-                buf.append(ch)
-            return "".join(buf)
-
-        # 在 _append_text 里面：
-        text = OSC_PATTERN.sub("", text)
-        text = _normalize_backspace(text)
-        text = text.replace("\x07", "")
-        text = text.replace("\x1b(B", "")
-        text = text.replace("\n", "")
-        text = text.replace("\r", "\n")
-
-        cursor = self.textCursor()
-        cursor.movePosition(QTextCursor.End)
-
-        pos = 0
-        while pos < len(text):
-            m = CSI_PATTERN.search(text, pos)
-            if not m:
-                chunk = text[pos:]
-                if chunk:
-                    cursor.insertText(chunk, self._current_format)
-                break
-
-            if m.start() > pos:
-                chunk = text[pos:m.start()]
-                if chunk:
-                    cursor.insertText(chunk, self._current_format)
+    def _on_remote_closed(self, generation: int):
+        if self.reader is None or generation != self._reader_generation:
+            return
+        self._append_text("\r\n[remote shell closed]\r\n")
+        self._stop_io()
 
-            params = m.group(1) or ""
-            final = m.group(2)
+    def clear(self):
+        self.screen.reset()
+        self._selection = None
+        self._sync_scrollbar(follow=True)
+        self.viewport().update()
 
-            if final == "m":
-                # SGR 颜色 / 重置
-                self._current_format = apply_sgr_to_format(self._current_format, params)
-            elif final == "J":
-                # 清屏：仅对 ESC[2J 进行整屏清除，避免干扰普通 prompt
-                if params == "2":
-                    self.clear()
-                    cursor = self.textCursor()
-                    cursor.movePosition(QTextCursor.End)
+    # ---- output ----
+    def feed(self, text: str):
+        """Show ``text`` as if the shell had written it; used to replay recorded sessions."""
+        self._append_text(text)
 
-            # 其它 CSI（光标移动等）暂时忽略
+    def _append_text(self, text: str):
+        """Feed remote output to the screen and repaint the rows it changed."""
+        if not text:
+            return
+        dropped_before = self.screen.history.dropped
+        title = self.screen.title
+        self.screen.feed(text)
+        self._refresh(self.screen.history.dropped - dropped_before)
+        if self.screen.title != title:
+            self.title_changed.emit(self.screen.title)
+
+    def _refresh(self, dropped: int = 0):
+        screen = self.screen
+        bar = self.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum()
+        dirty = screen.take_dirty()
+        if self._selection is not None and dirty:
+            # the selected cells may have changed under it
+            self._selection = None
+            self.viewport().update()
+        if self._match is not None:
+            self._match = (self._match[0] - dropped, self._match[1]) if self._match[0] >= dropped else None
+        self._sync_scrollbar(follow=at_bottom, dropped=dropped)
+        if not at_bottom:
+            if dirty or dropped:
+                self.viewport().update()
+            return
+        dirty.add(self._cursor_row)
+        dirty.add(screen.y)
+        self._cursor_row = screen.y
+        width = self.viewport().width()
+        for y in dirty:
+            self.viewport().update(0, y * self._cell_h, width, self._cell_h)
+
+    def _sync_scrollbar(self, follow: bool, dropped: int = 0):
+        bar = self.verticalScrollBar()
+        history = len(self.screen.history)
+        bar.setPageStep(self.screen.rows)
+        bar.setSingleStep(3)
+        if bar.maximum() != history or (dropped and not follow):
+            value = bar.value()
+            bar.blockSignals(True)
+            bar.setRange(0, history)
+            # keep looking at the same lines while scrolled back, even as
+            # the oldest ones are dropped
+            bar.setValue(history if follow else value - dropped)
+            bar.blockSignals(False)
+            self.viewport().update()
+        elif follow and bar.value() != history:
+            bar.setValue(history)
+
+    def set_scrollback_lines(self, lines: int):
+        """Change how many lines are kept for scrolling back."""
+        history = self.screen.history
+        dropped_before = history.dropped
+        history.set_max_lines(lines)
+        self._selection = None
+        self._refresh(history.dropped - dropped_before)
+        self.viewport().update()
+
+    def _fit_screen(self):
+        if not hasattr(self, "_cell_h"):
+            return
+        if self._fixed_size is not None:
+            cols, rows = self._fixed_size
+        else:
+            cols = max(int(self.viewport().width() / self._cell_w), 20)
+            rows = max(self.viewport().height() // self._cell_h, 5)
+        if (cols, rows) == (self.screen.cols, self.screen.rows):
+            return
+        self.screen.resize(cols, rows)
+        self.screen.take_dirty()
+        self._selection = None
+        self._sync_scrollbar(follow=True)
+        if self._connected and self.channel is not None:
+            try:
+                self.channel.resize_pty(width=cols, height=rows)
+            except Exception:
+                pass
+        if self.recorder is not None:
+            self.recorder.resize(cols, rows)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._fit_screen()
+        if self._find_edit is not None:
+            self._place_find_bar()
+
+    # ---- painting ----
+    def _line_at(self, number: int):
+        """Line ``number`` counting scrollback first, then the screen."""
+        history = self.screen.history
+        if number < len(history):
+            return history[number]
+        row = number - len(history)
+        return self.screen.lines[row] if 0 <= row < self.screen.rows else None
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        rect = event.rect()
+        painter.fillRect(rect, DEFAULT_BG)
+        first = self.verticalScrollBar().value()
+        cursor_line = len(self.screen.history) + self.screen.y
+        show_cursor = self.screen.cursor_visible and self._connected
+        row_from = max(rect.top() // self._cell_h, 0)
+        row_to = min(rect.bottom() // self._cell_h, self.screen.rows - 1)
+        for row in range(row_from, row_to + 1):
+            number = first + row
+            line = self._line_at(number)
+            if line is None:
+                continue
+            top = row * self._cell_h
+            self._paint_line(painter, line, top)
+            selected = self._selected_columns(number, len(line.chars))
+            if selected is not None:
+                x0, x1 = selected
+                painter.fillRect(
+                    QRect(int(x0 * self._cell_w), top, int((x1 - x0) * self._cell_w) + 1, self._cell_h),
+                    SELECTION_COLOR,
+                )
+            if show_cursor and number == cursor_line:
+                cursor = QRect(int(self.screen.x * self._cell_w), top, int(self._cell_w), self._cell_h)
+                if self.hasFocus():
+                    painter.fillRect(cursor, QColor(248, 249, 250, 150))
+                else:
+                    painter.setPen(DEFAULT_FG)
+                    painter.drawRect(cursor.adjusted(0, 0, -1, -1))
+        painter.end()
+
+    def _paint_line(self, painter: QPainter, line, top: int):
+        cell_w = self._cell_w
+        baseline = top + self._ascent
+        x = 0
+        for text, attr in line.runs():
+            n = len(text)
+            fg, bg = attr_fg(attr), attr_bg(attr)
+            fg_color = DEFAULT_FG if fg == DEFAULT_COLOR else PALETTE[fg]
+            bg_color = DEFAULT_BG if bg == DEFAULT_COLOR else PALETTE[bg]
+            if attr & REVERSE:
+                fg_color, bg_color = bg_color, fg_color
+            left = x * cell_w
+            if bg_color is not DEFAULT_BG:
+                painter.fillRect(QRect(int(left), top, int(n * cell_w + 0.999), self._cell_h), bg_color)
+            if not (attr & INVISIBLE) and text.strip():
+                if attr & DIM:
+                    fg_color = QColor(fg_color)
+                    fg_color.setAlpha(150)
+                painter.setPen(fg_color)
+                painter.setFont(self._fonts[bool(attr & BOLD), bool(attr & ITALIC)])
+                if text.isascii():
+                    painter.drawText(QPointF(left, baseline), text)
+                else:
+                    # one cell at a time keeps wide and fallback-font glyphs on the grid
+                    for i, ch in enumerate(text):
+                        if ch and ch != " ":
+                            painter.drawText(QPointF(left + i * cell_w, baseline), ch)
+                if attr & (UNDERLINE | STRIKE):
+                    y = baseline + 1 if attr & UNDERLINE else top + self._cell_h / 2
+                    painter.drawLine(QPointF(left, y), QPointF(left + n * cell_w, y))
+            x += n
+
+    # ---- search ----
+    def show_find_bar(self):
+        if self._find_edit is None:
+            edit = QLineEdit(self)
+            edit.setPlaceholderText("Find (Enter: older, Shift+Enter: newer)")
+            edit.setClearButtonEnabled(True)
+            edit.setFixedWidth(320)
+            edit.installEventFilter(self)
+            edit.textChanged.connect(self._on_find_text_changed)
+            self._find_edit = edit
+        self._place_find_bar()
+        self._find_edit.show()
+        self._find_edit.raise_()
+        self._find_edit.setFocus()
+        self._find_edit.selectAll()
+
+    def _place_find_bar(self):
+        edit = self._find_edit
+        edit.move(max(self.viewport().width() - edit.width() - 8, 0), 6)
+
+    def eventFilter(self, obj, event):
+        if obj is self._find_edit and event.type() == QEvent.KeyPress:
+            if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+                self.find(obj.text(), backwards=not event.modifiers() & Qt.ShiftModifier)
+                return True
+            if event.key() == Qt.Key_Escape:
+                obj.hide()
+                self._match = None
+                self._selection = None
+                self.viewport().update()
+                self.setFocus()
+                return True
+        return super().eventFilter(obj, event)
+
+    def _on_find_text_changed(self, text: str):
+        # a new search term starts again from the newest line
+        self._match = None
+        self.find(text)
+
+    def find(self, needle: str, backwards: bool = True) -> bool:
+        """Select the next occurrence of ``needle`` in scrollback and screen, case-insensitively."""
+        if not needle:
+            return False
+        total = len(self.screen.history) + self.screen.rows
+        if self._match is not None:
+            start = self._match[0] - 1 if backwards else self._match[0] + 1
+        else:
+            start = total - 1 if backwards else 0
+        hit = self._search(needle, start, backwards)
+        if hit is None and self._match is not None:
+            # wrap around
+            hit = self._search(needle, total - 1 if backwards else 0, backwards)
+        if self._find_edit is not None:
+            self._find_edit.setStyleSheet("" if hit else "QLineEdit { background: #FEE2E2; }")
+        if hit is None:
+            return False
+        number, col = hit
+        self._match = hit
+        self._selection = ((number, col), (number, col + cell_column(needle, len(needle))))
+        bar = self.verticalScrollBar()
+        if not bar.value() <= number < bar.value() + self.screen.rows:
+            bar.setValue(min(max(number - self.screen.rows // 2, 0), bar.maximum()))
+        self.viewport().update()
+        return True
+
+    def _search(self, needle: str, start: int, backwards: bool) -> tuple[int, int] | None:
+        history = self.screen.history
+        base, rows = len(history), self.screen.rows
+        if backwards:
+            screen_rows = range(min(start - base, rows - 1), -1, -1)
+        else:
+            screen_rows = range(max(start - base, 0), rows)
+        needle_lower = needle.lower()
+
+        def on_screen():
+            for row in screen_rows:
+                text = "".join(self.screen.lines[row].chars)
+                pos = text.lower().find(needle_lower)
+                if pos >= 0:
+                    return base + row, cell_column(text, pos)
+            return None
+
+        if backwards:
+            return on_screen() or history.search(needle, min(start, base - 1))
+        return (history.search(needle, start, backwards=False) if start < base else None) or on_screen()
+
+    # ---- selection ----
+    def _cell_at(self, pos) -> tuple[int, int]:
+        row = min(max(int(pos.y() // self._cell_h), 0), self.screen.rows - 1)
+        col = min(max(int(pos.x() / self._cell_w), 0), self.screen.cols)
+        return self.verticalScrollBar().value() + row, col
+
+    def _ordered_selection(self):
+        if self._selection is None:
+            return None
+        start, end = sorted(self._selection)
+        return None if start == end else (start, end)
+
+    def _selected_columns(self, number: int, width: int) -> tuple[int, int] | None:
+        selection = self._ordered_selection()
+        if selection is None:
+            return None
+        (l0, c0), (l1, c1) = selection
+        if not l0 <= number <= l1:
+            return None
+        return (c0 if number == l0 else 0), (c1 if number == l1 else width)
+
+    def selected_text(self) -> str:
+        selection = self._ordered_selection()
+        if selection is None:
+            return ""
+        (l0, c0), (l1, c1) = selection
+        parts = []
+        for number in range(l0, l1 + 1):
+            line = self._line_at(number)
+            if line is None:
+                continue
+            start = c0 if number == l0 else 0
+            end = c1 if number == l1 else len(line.chars)
+            parts.append("".join(line.chars[start:end]))
+            if number != l1 and not line.wrapped:
+                parts[-1] = parts[-1].rstrip() + "\n"
+        return "".join(parts).rstrip(" ")
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            cell = self._cell_at(event.position())
+            self._selection = (cell, cell)
+            self._selecting = True
+            self.viewport().update()
+        super().mousePressEvent(event)
 
-            pos = m.end()
+    def mouseMoveEvent(self, event):
+        if self._selecting and self._selection is not None:
+            self._selection = (self._selection[0], self._cell_at(event.position()))
+            self.viewport().update()
 
-        self.setTextCursor(cursor)
-        self.ensureCursorVisible()
     def mouseReleaseEvent(self, event):
         """Left-button selection -> auto copy to clipboard."""
         super().mouseReleaseEvent(event)
         if event.button() == Qt.LeftButton:
-            cursor = self.textCursor()
-            if cursor.hasSelection():
-                text = cursor.selectedText()
-                if text:
-                    # QTextEdit uses U+2029 for line breaks in selectedText
-                    text = text.replace("\u2029", "\n")
-                    QGuiApplication.clipboard().setText(text)
-
+            self._selecting = False
+            text = self.selected_text()
+            if text:
+                QGuiApplication.clipboard().setText(text)
 
     def mouseDoubleClickEvent(self, event):
         """双击时按自定义规则选择一整块内容：以空格和 '$' 为分隔符，'.', '-', '+' 视为单词一部分。"""
-        cursor = self.cursorForPosition(event.pos())
-        pos = cursor.position()
-        doc = self.toPlainText()
-        n = len(doc)
-        if n == 0:
-            return QTextEdit.mouseDoubleClickEvent(self, event)
-
-        separators = set(" \t\r\n$")
-        left = pos
-        while left > 0 and doc[left - 1] not in separators:
+        number, col = self._cell_at(event.position())
+        line = self._line_at(number)
+        if line is None:
+            return
+        chars = line.chars
+        separators = set(" \t$")
+        col = min(col, len(chars) - 1)
+        if chars[col] in separators:
+            return
+        left = col
+        while left > 0 and chars[left - 1] not in separators:
             left -= 1
-        right = pos
-        while right < n and doc[right] not in separators:
+        right = col
+        while right < len(chars) and chars[right] not in separators:
             right += 1
-
-        new_cursor = self.textCursor()
-        new_cursor.setPosition(left)
-        new_cursor.setPosition(right, QTextCursor.KeepAnchor)
-        self.setTextCursor(new_cursor)
+        self._selection = ((number, left), (number, right))
+        self._selecting = False
+        self.viewport().update()
 
         # 同时复制到剪贴板（与 mouseReleaseEvent 行为一致）
-        text = new_cursor.selectedText()
+        text = self.selected_text()
         if text:
-            text = text.replace("\u2029", "\n")
             QGuiApplication.clipboard().setText(text)
+
     def contextMenuEvent(self, event):
         """Right-click -> paste clipboard content into remote shell."""
-        if self._connected and self.ssh_client is not None and self.ssh_client.channel is not None:
-            text = QGuiApplication.clipboard().text()
-            if text:
-                text = text.replace("\r\n", "\n")
-                try:
-                    self.ssh_client.shell_send(text)
-                except Exception:
-                    pass
+        if self._connected and self.channel is not None:
+            self.paste(QGuiApplication.clipboard().text())
         else:
-            # fall back to default behavior if not connected
             super().contextMenuEvent(event)
 
+    def paste(self, text: str):
+        """Send ``text`` as pasted input, bracketed if the remote program asked for it."""
+        if not text or self.writer is None:
+            return
+        text = text.replace("\r\n", "\n")
+        bracketed = self.screen.bracketed_paste
+        if bracketed:
+            # pasted text must not be able to end the paste early
+            text = text.replace(BRACKETED_PASTE_END, "")
+        self._scroll_to_bottom()
+        self.writer.paste(text, bracketed)
+
     def wheelEvent(self, event):
-        """Ctrl + 滚轮缩放终端字体；不按 Ctrl 时保持原始滚动。"""
+        """Ctrl + 滚轮缩放终端字体；全屏程序（alt screen）里滚轮发送方向键。"""
+        delta = event.angleDelta().y()
         if event.modifiers() & Qt.ControlModifier:
-            delta = event.angleDelta().y()
             if delta == 0:
                 event.accept()
                 return
@@ -303,69 +876,74 @@ class ServerTerminalView(QTextEdit):
             else:
                 self.adjust_font_size(-step)
             event.accept()
+        elif self.screen.alt_screen and self._connected and delta:
+            key = "A" if delta > 0 else "B"
+            prefix = "\x1bO" if self.screen.app_cursor_keys else "\x1b["
+            self._send((prefix + key) * 3)
+            event.accept()
         else:
             super().wheelEvent(event)
 
-   
+    def focusInEvent(self, event):
+        super().focusInEvent(event)
+        self.viewport().update()
+
+    def focusOutEvent(self, event):
+        super().focusOutEvent(event)
+        self.viewport().update()
 
     def focusNextPrevChild(self, next: bool) -> bool:
         """禁止 Tab / Shift+Tab 在控件间切换焦点，由终端自身处理。"""
         return False
 
+    # ---- input ----
+    def _send(self, data: str):
+        if not self._connected or self.writer is None:
+            return
+        self.writer.write(data)
+
+    def _scroll_to_bottom(self):
+        bar = self.verticalScrollBar()
+        bar.setValue(bar.maximum())
+
     def keyPressEvent(self, event: QKeyEvent):
-        if not self._connected or self.ssh_client is None or self.ssh_client.channel is None:
+        if event.key() == Qt.Key_F and event.modifiers() == (Qt.ControlModifier | Qt.ShiftModifier):
+            self.show_find_bar()
+            return
+        if not self._connected or self.channel is None:
             return
 
         key = event.key()
         text = event.text()
+        modifiers = event.modifiers()
+
+        # Shift+PageUp / PageDown（以及普通 shell 里的 PageUp / PageDown）滚动回看
+        if key in (Qt.Key_PageUp, Qt.Key_PageDown) and (
+            modifiers & Qt.ShiftModifier or not self.screen.alt_screen
+        ):
+            bar = self.verticalScrollBar()
+            step = bar.pageStep() if key == Qt.Key_PageDown else -bar.pageStep()
+            bar.setValue(bar.value() + step)
+            return
 
-        try:
-            # 基本控制键
-            if key in (Qt.Key_Return, Qt.Key_Enter):
-                self.ssh_client.shell_send("\r")
-                return
-            if key == Qt.Key_Backspace:
-                self.ssh_client.shell_send("\x7f")
-                return
-            if key == Qt.Key_Tab:
-                self.ssh_client.shell_send("\t")
-                event.accept()
-                return
-
-            # 方向键
-            
-            if key == Qt.Key_Up:
-                self.ssh_client.shell_send("\x1b[A")
-                return
-            if key == Qt.Key_Down:
-                self.ssh_client.shell_send("\x1b[B")
-                return
-            if key == Qt.Key_Right:
-                self.ssh_client.shell_send("\x1b[C")
-                return
-            if key == Qt.Key_Left:
-                self.ssh_client.shell_send("\x1b[D")
-                return
-
-            # Home / End
-            if key == Qt.Key_Home:
-                self.ssh_client.shell_send("\x1b[H")
-                return
-            if key == Qt.Key_End:
-                self.ssh_client.shell_send("\x1b[F")
-                return
-
-            # PageUp / PageDown 交给 QTextEdit 自己处理（滚动）
-            if key in (Qt.Key_PageUp, Qt.Key_PageDown):
-                return QTextEdit.keyPressEvent(self, event)
-
-            # Ctrl+C 中断前台程序
-            if key == Qt.Key_C and (event.modifiers() & Qt.ControlModifier):
-                self.ssh_client.shell_send("\x03")
-                return
-
-            # 其它可见字符
-            if text:
-                self.ssh_client.shell_send(text)
-        except Exception:
-            return
\ No newline at end of file
+        self._scroll_to_bottom()
+        if key in CURSOR_KEYS:
+            prefix = "\x1bO" if self.screen.app_cursor_keys else "\x1b["
+            self._send(prefix + CURSOR_KEYS[key])
+            return
+        if key in KEY_SEQUENCES:
+            self._send(KEY_SEQUENCES[key])
+            event.accept()
+            return
+        # Ctrl+字母等组合键的 text() 已经是对应的控制字符
+        if text:
+            if text == "\x03" and self.writer is not None:
+                # Ctrl+C also abandons whatever is left of a long paste
+                self.writer.cancel_paste()
+            self._send(text)
+
+    def inputMethodEvent(self, event):
+        if event.commitString():
+            self._scroll_to_bottom()
+            self._send(event.commitString())
+        event.accept()
@@ -1,13 +1,18 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout, QLineEdit, QPushButton, QFrame, QSplitter, QProgressBar, QApplication, QStyle
-from PySide6.QtCore import Qt, QTimer, QObject, QThread, Signal, QSize
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout, QLineEdit, QPushButton, QFrame, QSplitter, QProgressBar, QApplication, QStyle, QTabWidget
+from PySide6.QtCore import Qt, QObject, QThread, Signal, QSize
 from PySide6.QtGui import QShortcut, QKeySequence
 import re
+import threading
 from bioflow.core.ssh_client import SSHClient
+from bioflow.core.metrics import MetricsSnapshot, RemoteSampler
+from bioflow.core.timeseries import MetricHistory
 from bioflow.ui.server_terminal_view import ServerTerminalView
 from bioflow.ui.server_files_view import ServerFilesView
 from bioflow.ui.server_jobs_view import ServerJobsView
 from bioflow.ui.server_plugins_view import ServerPluginsView
 from bioflow.ui.splitter import CollapsibleSplitter
+from bioflow.ui.cluster_metrics_view import ClusterMetricsView
+from bioflow.ui.session_log_view import SessionLogViewer
 
 class ConnectWorker(QObject):
     finished = Signal(str, bool, str)
@@ -39,6 +44,34 @@ class ConnectWorker(QObject):
             ok = False
         self.finished.emit(label, ok, banner)
 
+class MetricsWorker(QObject):
+    """Stream resource snapshots from a persistent remote sampler.
+
+    Parsing happens on the worker thread; the GUI only receives typed
+    ``MetricsSnapshot`` objects. If the sampler channel drops, it is
+    reopened after a short pause until ``stop()`` is called.
+    """
+    snapshot_ready = Signal(object)
+    finished = Signal()
+
+    def __init__(self, ssh_client, interval: float):
+        super().__init__()
+        self.sampler = RemoteSampler(ssh_client, interval)
+        self._cancel = threading.Event()
+
+    def stop(self):
+        self._cancel.set()
+
+    def run(self):
+        while not self._cancel.is_set():
+            try:
+                for snap in self.sampler.stream(self._cancel):
+                    self.snapshot_ready.emit(snap)
+            except Exception:
+                pass
+            self._cancel.wait(max(self.sampler.interval, 1.0))
+        self.finished.emit()
+
 class ServerView(QWidget):
     def __init__(self):
         super().__init__()
@@ -57,13 +90,22 @@ class ServerView(QWidget):
         # F11 快捷键切换终端全屏模式
         self.fullscreen_shortcut = QShortcut(QKeySequence(Qt.Key_F11), self)
         self.fullscreen_shortcut.activated.connect(self._toggle_fullscreen)
-
-        # Metrics timer for resource usage
-        self.metrics_timer = QTimer(self)
-        self.metrics_timer.setInterval(5000)
-        self.metrics_timer.timeout.connect(self._update_metrics)
-        self._last_net_rx = None
-        self._last_net_tx = None
+        # Ctrl+Shift+T 新建终端标签页（共用同一个 SSH 连接）
+        self.new_shell_shortcut = QShortcut(QKeySequence("Ctrl+Shift+T"), self)
+        self.new_shell_shortcut.activated.connect(self.add_terminal_tab)
+
+        # Resource monitor: one long-lived sampler channel per connection
+        self.metrics_interval = 1.0
+        self.metrics_thread = None
+        self.metrics_worker = None
+        self.metrics_history = {
+            "cpu": MetricHistory(),
+            "mem": MetricHistory(),
+            "down": MetricHistory(),
+            "up": MetricHistory(),
+        }
+        # the history survives monitor restarts; it belongs to this address
+        self._metrics_address = None
 
     def _build_top_panel(self):
         self.top_panel = top = QWidget()
@@ -203,8 +245,25 @@ class ServerView(QWidget):
         left_layout.setContentsMargins(0, 0, 0, 0)
         left_layout.setSpacing(0)
 
-        self.terminal_tab = ServerTerminalView(self.ssh_client)
-        left_layout.addWidget(self.terminal_tab)
+        # one shell per tab, each on its own channel of the shared connection
+        self.recording_enabled = False
+        self._shell_count = 0
+        self.terminal_tabs = QTabWidget()
+        self.terminal_tabs.setTabsClosable(True)
+        self.terminal_tabs.setMovable(True)
+        self.terminal_tabs.setDocumentMode(True)
+        self.terminal_tabs.tabCloseRequested.connect(self._close_terminal_tab)
+        self.new_shell_btn = QPushButton("+")
+        self.new_shell_btn.setToolTip("New shell (Ctrl+Shift+T)")
+        self.new_shell_btn.setFixedSize(24, 20)
+        self.new_shell_btn.setStyleSheet(
+            "QPushButton { background: transparent; border: none; font-size: 14px; } "
+            "QPushButton:hover { background: rgba(148,163,184,0.25); border-radius: 4px; }"
+        )
+        self.new_shell_btn.clicked.connect(self.add_terminal_tab)
+        self.terminal_tabs.setCornerWidget(self.new_shell_btn, Qt.TopRightCorner)
+        self.add_terminal_tab()
+        left_layout.addWidget(self.terminal_tabs)
 
         # right: remote files
         self.files_view = ServerFilesView(self.ssh_client)
@@ -243,6 +302,53 @@ class ServerView(QWidget):
 
         bar_layout.addWidget(self.monitor_btn)
 
+        # cluster-wide node dashboard (opens in its own window)
+        self.cluster_view = None
+        self.nodes_btn = QPushButton("Nodes")
+        self.nodes_btn.setToolTip("Open multi-node resource dashboard")
+        self.nodes_btn.setFixedHeight(18)
+        self.nodes_btn.setStyleSheet(
+            "QPushButton { background: transparent; border: none; padding: 0 4px; font-size: 11px; } "
+            "QPushButton:hover { background: rgba(148,163,184,0.25); border-radius: 4px; }"
+        )
+        self.nodes_btn.clicked.connect(self._open_cluster_view)
+        bar_layout.addWidget(self.nodes_btn)
+
+        # Slurm job monitor (polls only while its window is open)
+        self.jobs_view = None
+        self.jobs_btn = QPushButton("Jobs")
+        self.jobs_btn.setToolTip("Open Slurm job monitor")
+        self.jobs_btn.setFixedHeight(18)
+        self.jobs_btn.setStyleSheet(
+            "QPushButton { background: transparent; border: none; padding: 0 4px; font-size: 11px; } "
+            "QPushButton:hover { background: rgba(148,163,184,0.25); border-radius: 4px; }"
+        )
+        self.jobs_btn.clicked.connect(self._open_jobs_view)
+        bar_layout.addWidget(self.jobs_btn)
+
+        # terminal session recording (off by default) and the recorded-session browser
+        self.session_log_view = None
+        self.record_btn = QPushButton("Record")
+        self.record_btn.setCheckable(True)
+        self.record_btn.setToolTip("Record terminal sessions to the session log")
+        self.record_btn.setFixedHeight(18)
+        self.record_btn.setStyleSheet(
+            "QPushButton { background: transparent; border: none; padding: 0 4px; font-size: 11px; } "
+            "QPushButton:hover { background: rgba(148,163,184,0.25); border-radius: 4px; } "
+            "QPushButton:checked { color: #EF4444; }"
+        )
+        self.record_btn.toggled.connect(self._toggle_recording)
+        bar_layout.addWidget(self.record_btn)
+        self.sessions_btn = QPushButton("Sessions")
+        self.sessions_btn.setToolTip("Replay and search recorded terminal sessions")
+        self.sessions_btn.setFixedHeight(18)
+        self.sessions_btn.setStyleSheet(
+            "QPushButton { background: transparent; border: none; padding: 0 4px; font-size: 11px; } "
+            "QPushButton:hover { background: rgba(148,163,184,0.25); border-radius: 4px; }"
+        )
+        self.sessions_btn.clicked.connect(self._open_session_logs)
+        bar_layout.addWidget(self.sessions_btn)
+
         self.session_label = QLabel("Server: -")
         self.cpu_label = QLabel("CPU: -")
         self.mem_label = QLabel("Mem: -")
@@ -257,12 +363,55 @@ class ServerView(QWidget):
         layout.addWidget(self.resource_bar)
         self.main_splitter.addWidget(bottom)
     
+    @property
+    def terminal_tab(self) -> ServerTerminalView:
+        """The terminal in the current tab."""
+        return self.terminal_tabs.currentWidget()
+
+    def terminals(self) -> list[ServerTerminalView]:
+        return [self.terminal_tabs.widget(i) for i in range(self.terminal_tabs.count())]
+
+    def add_terminal_tab(self) -> ServerTerminalView:
+        """Open another shell; when connected it costs one channel, not a new login."""
+        current = self.terminal_tabs.currentWidget()
+        view = ServerTerminalView(self.ssh_client)
+        if current is not None:
+            view.adjust_font_size(current.font_size - view.font_size)
+        view.set_recording(self.recording_enabled)
+        self._shell_count += 1
+        name = f"Shell {self._shell_count}"
+        index = self.terminal_tabs.addTab(view, name)
+        self.terminal_tabs.tabBar().setTabData(index, name)
+        view.title_changed.connect(lambda title, v=view: self._on_terminal_title(v, title))
+        if self.ssh_client.client is not None:
+            view.set_connected(True, "")
+        self.terminal_tabs.setCurrentIndex(index)
+        view.setFocus()
+        return view
+
+    def _close_terminal_tab(self, index: int):
+        # keep one terminal around; it is what connect/disconnect report to
+        if self.terminal_tabs.count() <= 1:
+            return
+        view = self.terminal_tabs.widget(index)
+        self.terminal_tabs.removeTab(index)
+        view.close_shell()
+        view.deleteLater()
+
+    def _on_terminal_title(self, view: ServerTerminalView, title: str):
+        index = self.terminal_tabs.indexOf(view)
+        if index >= 0:
+            name = self.terminal_tabs.tabBar().tabData(index)
+            self.terminal_tabs.setTabText(index, title[:40] if title else name)
+            self.terminal_tabs.setTabToolTip(index, title)
+
     def _change_terminal_font(self, delta: int):
         """调整终端字号，delta 为正数放大，为负数缩小。"""
-        if not hasattr(self, "terminal_tab"):
+        if not hasattr(self, "terminal_tabs"):
             return
         # 统一用 ServerTerminalView.adjust_font_size，保证和 Ctrl+滚轮一致
-        self.terminal_tab.adjust_font_size(delta)
+        for view in self.terminals():
+            view.adjust_font_size(delta)
 
     def _toggle_fullscreen(self):
         win = self.window()
@@ -365,16 +514,22 @@ class ServerView(QWidget):
         if ok:
             self.status_label.setText(label)
             self._set_status_led(True)
-            self.terminal_tab.set_connected(True, banner)
+            for view in self.terminals():
+                view.set_connected(True, banner)
             self.files_view.load_root()
             self.session_label.setText(f"Server: {label}")
+            if self.ssh_client.address != self._metrics_address:
+                self._clear_metrics_history()
+                self._metrics_address = self.ssh_client.address
+            self._start_metrics()
             # toggle connect/disconnect icons
             self.connect_btn.setVisible(False)
             self.disconnect_btn.setVisible(True)
         else:
             self.status_label.setText(label)
             self._set_status_led(False)
-            self.terminal_tab.set_connected(False, banner)
+            for view in self.terminals():
+                view.set_connected(False, banner)
             self.files_view.load_root()
             self.session_label.setText("Server: -")
             self.connect_btn.setVisible(True)
@@ -388,14 +543,34 @@ class ServerView(QWidget):
         self.status_led.setStyleSheet(f'background-color: {color}; border-radius: 5px;')
 
     def _start_metrics(self):
-        if not self.monitor_enabled:
+        if not self.monitor_enabled or self.metrics_thread is not None:
             return
-        self._last_net_rx = None
-        self._last_net_tx = None
-        self.metrics_timer.start()
+        self.metrics_thread = QThread()
+        self.metrics_worker = MetricsWorker(self.ssh_client, self.metrics_interval)
+        self.metrics_worker.moveToThread(self.metrics_thread)
+        self.metrics_thread.started.connect(self.metrics_worker.run)
+        self.metrics_worker.snapshot_ready.connect(self._apply_metrics)
+        self.metrics_worker.finished.connect(self.metrics_thread.quit)
+        self.metrics_worker.finished.connect(self.metrics_worker.deleteLater)
+        self.metrics_thread.finished.connect(self._cleanup_metrics_thread)
+        self.metrics_thread.start()
+
+    def _cleanup_metrics_thread(self):
+        if self.metrics_thread is not None:
+            self.metrics_thread.deleteLater()
+        self.metrics_thread = None
+        self.metrics_worker = None
+        # switched back on while the old worker was winding down
+        if self.monitor_enabled and getattr(self.ssh_client, 'client', None):
+            self._start_metrics()
+
+    def _clear_metrics_history(self):
+        for history in self.metrics_history.values():
+            history.clear()
 
     def _stop_metrics(self):
-        self.metrics_timer.stop()
+        if self.metrics_worker is not None:
+            self.metrics_worker.stop()
         self.cpu_label.setText('CPU: -')
         self.mem_label.setText('Mem: -')
         self.net_up_label.setText('Up: -')
@@ -408,80 +583,102 @@ class ServerView(QWidget):
             self._start_metrics()
         else:
             self._stop_metrics()
-    def _update_metrics(self):
-        """Lightweight resource polling using /proc; avoids heavy 'top' calls."""
-        if not getattr(self.ssh_client, 'client', None):
-            return
 
-        # --- CPU: from /proc/loadavg (1-min load) ---
-        try:
-            out_load, _, _ = self.ssh_client.exec("cat /proc/loadavg")
-            parts = out_load.strip().split()
-            load1 = float(parts[0]) if parts else 0.0
-            self.cpu_label.setText(f"CPU(load1): {load1:.2f}")
-        except Exception:
-            self.cpu_label.setText("CPU: -")
+    def _open_cluster_view(self):
+        if self.cluster_view is None:
+            self.cluster_view = ClusterMetricsView(self.ssh_client)
+        self.cluster_view.show()
+        self.cluster_view.raise_()
+        self.cluster_view.activateWindow()
+
+    def _open_jobs_view(self):
+        if self.jobs_view is None:
+            self.jobs_view = ServerJobsView(self.ssh_client)
+        self.jobs_view.show()
+        self.jobs_view.raise_()
+        self.jobs_view.activateWindow()
+
+    def _toggle_recording(self, enabled: bool):
+        self.recording_enabled = enabled
+        for view in self.terminals():
+            view.set_recording(enabled)
+
+    def _open_session_logs(self):
+        viewer = self.session_log_view
+        if viewer is None or viewer.isHidden():
+            # a closed viewer has stopped its search thread and deletes itself; open a new one
+            viewer = self.session_log_view = SessionLogViewer()
+            viewer.setAttribute(Qt.WA_DeleteOnClose)
+            viewer.destroyed.connect(lambda _=None, v=viewer: self._forget_session_logs(v))
+        else:
+            viewer.load_sessions()
+        viewer.show()
+        viewer.raise_()
+        viewer.activateWindow()
 
-        # --- Memory: from /proc/meminfo ---
-        try:
-            out_mem, _, _ = self.ssh_client.exec("grep -E 'MemTotal:|MemAvailable:' /proc/meminfo")
-            mem_total_kb = mem_avail_kb = None
-            for line in out_mem.splitlines():
-                if line.startswith("MemTotal:"):
-                    mem_total_kb = float(line.split()[1])
-                elif line.startswith("MemAvailable:"):
-                    mem_avail_kb = float(line.split()[1])
-            if mem_total_kb and mem_avail_kb is not None:
-                used_kb = mem_total_kb - mem_avail_kb
-                mem_pct = used_kb / mem_total_kb * 100.0
-                self.mem_label.setText(f"Mem: {mem_pct:.0f}%")
-            else:
-                self.mem_label.setText("Mem: -")
-        except Exception:
+    def _forget_session_logs(self, viewer: SessionLogViewer):
+        if self.session_log_view is viewer:
+            self.session_log_view = None
+
+    def _apply_metrics(self, snap: MetricsSnapshot):
+        if not self.monitor_enabled:
+            return
+        if snap.cpu_percent is not None and snap.load1 is not None:
+            self.cpu_label.setText(f"CPU: {snap.cpu_percent:.0f}% (load1 {snap.load1:.2f})")
+        elif snap.cpu_percent is not None:
+            self.cpu_label.setText(f"CPU: {snap.cpu_percent:.0f}%")
+        elif snap.load1 is not None:
+            self.cpu_label.setText(f"CPU(load1): {snap.load1:.2f}")
+        else:
+            self.cpu_label.setText("CPU: -")
+        if snap.mem_percent is not None:
+            self.mem_label.setText(f"Mem: {snap.mem_percent:.0f}%")
+        else:
             self.mem_label.setText("Mem: -")
+        if snap.net_rx_rate is not None and snap.net_tx_rate is not None:
+            self.net_down_label.setText(f"Down: {snap.net_rx_rate / (1024*1024):.2f} MB/s")
+            self.net_up_label.setText(f"Up: {snap.net_tx_rate / (1024*1024):.2f} MB/s")
+
+        mb = 1024 * 1024
+        history = self.metrics_history
+        history["cpu"].append(snap.timestamp, snap.cpu_percent)
+        history["mem"].append(snap.timestamp, snap.mem_percent)
+        history["down"].append(snap.timestamp, None if snap.net_rx_rate is None else snap.net_rx_rate / mb)
+        history["up"].append(snap.timestamp, None if snap.net_tx_rate is None else snap.net_tx_rate / mb)
+        self.cpu_label.setToolTip(self._history_tooltip(history["cpu"], "%"))
+        self.mem_label.setToolTip(self._history_tooltip(history["mem"], "%"))
+        self.net_down_label.setToolTip(self._history_tooltip(history["down"], " MB/s"))
+        self.net_up_label.setToolTip(self._history_tooltip(history["up"], " MB/s"))
+
+    def _history_tooltip(self, history: MetricHistory, unit: str) -> str:
+        lines = []
+        for label, span in (("5 min", 300), ("1 h", 3600), ("24 h", 86400)):
+            summary = history.summary(span)
+            if summary is None:
+                continue
+            mean, peak = summary
+            lines.append(f"{label}: avg {mean:.1f}{unit}, peak {peak:.1f}{unit}")
+        return "\n".join(lines)
 
-        # --- Network: from /proc/net/dev ---
-        try:
-            out_net, _, _ = self.ssh_client.exec("cat /proc/net/dev")
-            rx = tx = None
-            for line in out_net.splitlines()[2:]:  # skip headers
-                line = line.strip()
-                if not line or ':' not in line:
-                    continue
-                iface, data = line.split(':', 1)
-                iface = iface.strip()
-                if iface == 'lo':
-                    continue
-                fields = data.split()
-                if len(fields) >= 9:
-                    rx = int(fields[0])
-                    tx = int(fields[8])
-                    break
-            if rx is not None and tx is not None:
-                if self._last_net_rx is not None and self._last_net_tx is not None:
-                    interval = self.metrics_timer.interval() / 1000.0
-                    delta_rx = max(rx - self._last_net_rx, 0)
-                    delta_tx = max(tx - self._last_net_tx, 0)
-                    down_rate = delta_rx / interval
-                    up_rate = delta_tx / interval
-                    self.net_down_label.setText(f"Down: {down_rate / (1024*1024):.2f} MB/s")
-                    self.net_up_label.setText(f"Up: {up_rate / (1024*1024):.2f} MB/s")
-                self._last_net_rx = rx
-                self._last_net_tx = tx
-        except Exception:
-            self.net_down_label.setText("Down: -")
-            self.net_up_label.setText("Up: -")
     def disconnect_server(self):
-        self.ssh_client.close()
+        if self.cluster_view is not None:
+            self.cluster_view.stop()
+        if self.jobs_view is not None:
+            self.jobs_view.stop()
+        # an explicit disconnect: do not keep the login warm in the pool
+        self.ssh_client.close(keep_warm=False)
         self.status_label.setText('Disconnected')
         self._set_status_led(False)
-        self.terminal_tab.set_connected(False, '')
+        for view in self.terminals():
+            view.set_connected(False, '')
         self.files_view.load_root()
         self.session_label.setText('Server: -')
         # toggle back to connect icon
         self.connect_btn.setVisible(True)
         self.disconnect_btn.setVisible(False)
         self._stop_metrics()
+        self._clear_metrics_history()
+        self._metrics_address = None
         self._stop_progress_bar()
 
     def toggle_files(self):
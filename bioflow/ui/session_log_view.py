@@ -0,0 +1,445 @@
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QComboBox,
+    QSlider,
+    QSplitter,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QAbstractItemView,
+)
+from PySide6.QtCore import Qt, QObject, QThread, QTimer, Signal
+import codecs
+import datetime
+import threading
+import time
+from bioflow.core.session_log import OUTPUT, RESIZE, SEARCH_LIMIT, SessionCatalog, SessionInfo, SessionReader
+from bioflow.ui.server_terminal_view import ServerTerminalView
+
+PLAYBACK_INTERVAL = 30          # ms between playback steps
+SPEEDS = [1, 4, 16, 64]
+# idle stretches longer than this are cut short during playback
+MAX_IDLE = 2.0
+# matches are handed to the GUI in batches of this many
+MATCH_BATCH = 50
+
+
+def _fmt_time(t: float) -> str:
+    return datetime.datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _fmt_duration(seconds: float) -> str:
+    seconds = int(max(seconds, 0))
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}"
+
+
+def _fmt_size(n: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+class SessionSearchWorker(QObject):
+    """Searches the session log on its own thread; a new request cancels the running one."""
+    matches_found = Signal(int, object)     # generation, list[SessionMatch]
+    done = Signal(int, int, str)            # generation, matches, error text ("" if ok)
+    finished = Signal()
+
+    def __init__(self, catalog: SessionCatalog):
+        super().__init__()
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._cancel = threading.Event()
+        self._request: tuple[int, str, str | None] | None = None
+
+    def request(self, generation: int, query: str, host: str | None):
+        with self._lock:
+            self._request = (generation, query, host)
+        self._cancel.set()
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._cancel.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            with self._lock:
+                self._wake.clear()
+                request, self._request = self._request, None
+                self._cancel.clear()
+            if request is None:
+                continue
+            generation, query, host = request
+            batch = []
+
+            def on_match(match):
+                batch.append(match)
+                if len(batch) >= MATCH_BATCH:
+                    self.matches_found.emit(generation, batch[:])
+                    batch.clear()
+
+            try:
+                found = self.catalog.search(query, host, cancel_event=self._cancel, on_match=on_match)
+                error = ""
+            except Exception as e:
+                found, error = [], str(e) or type(e).__name__
+            if batch:
+                self.matches_found.emit(generation, batch)
+            if not self._cancel.is_set():
+                self.done.emit(generation, len(found), error)
+        self.catalog.close()
+        self.finished.emit()
+
+
+class SessionLogViewer(QWidget):
+    """Browse, replay and search recorded terminal sessions.
+
+    A session is replayed into a read-only terminal at its recorded size.
+    Seeking only decodes the chunks just before the target time, so the
+    scrubber stays responsive on sessions of any length; searching skips
+    every chunk whose trigram filter rules the query out.
+    """
+
+    def __init__(self, catalog: SessionCatalog | None = None, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog or SessionCatalog()
+        self.reader: SessionReader | None = None
+        self._records = None
+        self._next = None
+        self._decoder = None
+        self._clock = 0.0
+        self._last_tick = 0.0
+        self._query = ""
+        self._search_generation = 0
+        self._search_started = 0.0
+        self._closed = False
+        self.setWindowTitle("Terminal sessions")
+        self.resize(1200, 720)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(6)
+
+        row = QHBoxLayout()
+        self.host_combo = QComboBox()
+        self.host_combo.setMinimumWidth(160)
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Search recorded output…")
+        self.query_edit.setClearButtonEnabled(True)
+        self.refresh_btn = QPushButton("Refresh")
+        row.addWidget(self.host_combo)
+        row.addWidget(self.query_edit, 1)
+        row.addWidget(self.refresh_btn)
+        layout.addLayout(row)
+
+        splitter = QSplitter(Qt.Horizontal)
+        lists = QSplitter(Qt.Vertical)
+        self.sessions_tree = QTreeWidget()
+        self.sessions_tree.setHeaderLabels(["Started", "Host", "User", "Duration", "Size"])
+        self.sessions_tree.setRootIsDecorated(False)
+        self.sessions_tree.setUniformRowHeights(True)
+        self.sessions_tree.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.sessions_tree.header().resizeSection(0, 150)
+        self.results_tree = QTreeWidget()
+        self.results_tree.setHeaderLabels(["Time", "Host", "Line"])
+        self.results_tree.setRootIsDecorated(False)
+        self.results_tree.setUniformRowHeights(True)
+        self.results_tree.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.results_tree.header().resizeSection(0, 150)
+        lists.addWidget(self.sessions_tree)
+        lists.addWidget(self.results_tree)
+        splitter.addWidget(lists)
+
+        replay = QWidget()
+        replay_layout = QVBoxLayout(replay)
+        replay_layout.setContentsMargins(0, 0, 0, 0)
+        replay_layout.setSpacing(4)
+        self.view = ServerTerminalView(None)
+        replay_layout.addWidget(self.view, 1)
+        controls = QHBoxLayout()
+        self.play_btn = QPushButton("Play")
+        self.play_btn.setCheckable(True)
+        self.speed_combo = QComboBox()
+        self.speed_combo.addItems([f"{speed}x" for speed in SPEEDS])
+        self.slider = QSlider(Qt.Horizontal)
+        self.time_label = QLabel("-")
+        self.time_label.setStyleSheet("font-size: 11px;")
+        controls.addWidget(self.play_btn)
+        controls.addWidget(self.speed_combo)
+        controls.addWidget(self.slider, 1)
+        controls.addWidget(self.time_label)
+        replay_layout.addLayout(controls)
+        splitter.addWidget(replay)
+        splitter.setSizes([420, 780])
+        layout.addWidget(splitter, 1)
+
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #6B7280; font-size: 11px;")
+        layout.addWidget(self.status_label)
+
+        self.worker = SessionSearchWorker(self.catalog)
+        # not parented to the viewer: a closed viewer lives on until the search has stopped
+        self.worker_thread = QThread()
+        self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.matches_found.connect(self._on_matches)
+        self.worker.done.connect(self._on_search_done)
+        self.worker.finished.connect(self.worker_thread.quit)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker_thread.finished.connect(self._on_thread_finished)
+        self.worker_thread.start()
+
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(250)
+        self.query_timer.timeout.connect(self.run_query)
+        # seeking rebuilds the screen, so slider moves are coalesced
+        self.seek_timer = QTimer(self)
+        self.seek_timer.setSingleShot(True)
+        self.seek_timer.setInterval(60)
+        self.seek_timer.timeout.connect(self._seek_to_slider)
+        self.play_timer = QTimer(self)
+        self.play_timer.setInterval(PLAYBACK_INTERVAL)
+        self.play_timer.timeout.connect(self._tick)
+
+        self.query_edit.textChanged.connect(self.query_timer.start)
+        self.query_edit.returnPressed.connect(self.run_query)
+        self.host_combo.currentIndexChanged.connect(self._on_host_changed)
+        self.refresh_btn.clicked.connect(self.load_sessions)
+        self.sessions_tree.itemClicked.connect(lambda item, _col: self.open_session(item.data(0, Qt.UserRole)))
+        self.results_tree.itemClicked.connect(self._on_result_clicked)
+        self.slider.valueChanged.connect(self.seek_timer.start)
+        self.play_btn.toggled.connect(self._set_playing)
+
+        self.load_sessions()
+
+    # ---- sessions ----
+    def _host(self) -> str | None:
+        return self.host_combo.currentData()
+
+    def load_sessions(self):
+        host = self._host()
+        try:
+            hosts = self.catalog.hosts()
+            sessions = self.catalog.sessions(host)
+        except Exception as e:
+            print("session log error:", e)
+            self.status_label.setText(f"Cannot read session log: {e}")
+            return
+        self.host_combo.blockSignals(True)
+        self.host_combo.clear()
+        self.host_combo.addItem("All hosts", None)
+        for name in hosts:
+            self.host_combo.addItem(name or "-", name)
+        self.host_combo.setCurrentIndex(max(self.host_combo.findData(host), 0))
+        self.host_combo.blockSignals(False)
+
+        self.sessions_tree.clear()
+        items = []
+        for info in sessions:
+            ended = info.ended or info.started
+            item = QTreeWidgetItem([
+                _fmt_time(info.started), info.host, info.user,
+                _fmt_duration(ended - info.started), _fmt_size(info.bytes),
+            ])
+            item.setData(0, Qt.UserRole, info)
+            items.append(item)
+        self.sessions_tree.addTopLevelItems(items)
+        self.status_label.setText(f"{len(sessions):,} sessions")
+
+    def _on_host_changed(self, _index: int):
+        self.load_sessions()
+        if self.query_edit.text().strip():
+            self.run_query()
+
+    def open_session(self, info: SessionInfo | None):
+        if info is None:
+            return
+        if self.reader is not None and self.reader.session.id == info.id:
+            return
+        self._set_playing(False)
+        self._close_reader()
+        try:
+            self.reader = SessionReader(self.catalog, info)
+        except Exception as e:
+            print("session log error:", e)
+            self.status_label.setText(f"Cannot open session: {e}")
+            return
+        self.slider.blockSignals(True)
+        # tenths of a second since the session started
+        self.slider.setRange(0, int((self.reader.ended - self.reader.started) * 10) + 1)
+        self.slider.setValue(0)
+        self.slider.blockSignals(False)
+        self.seek(self.reader.started)
+
+    def _seek_to_slider(self):
+        if self.reader is not None:
+            self.seek(self.reader.started + self.slider.value() / 10)
+
+    def _close_reader(self):
+        if self.reader is not None:
+            self.reader.close()
+        self.reader = None
+        self._records = None
+        self._next = None
+
+    # ---- replay ----
+    def seek(self, t: float):
+        """Show the session's screen as it was at ``t``."""
+        reader = self.reader
+        if reader is None or not reader.chunks:
+            return
+        first = reader.replay_start(t)
+        chunk = reader.chunks[first]
+        self.view.clear()
+        self.view.set_fixed_size(chunk.cols, chunk.rows)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._records = reader.records(first)
+        self._next = None
+        self._clock = t
+        try:
+            self._advance(t)
+        except Exception as e:
+            print("session log error:", e)
+            self._records = None
+        self._show_position()
+
+    def _advance(self, until: float):
+        """Feed every record up to ``until`` to the replay terminal."""
+        if self._records is None:
+            return
+        texts = []
+        while True:
+            record = self._next
+            if record is None:
+                record = next(self._records, None)
+                if record is None:
+                    self._records = None
+                    break
+            if record[0] > until:
+                self._next = record
+                break
+            self._next = None
+            t, kind, payload = record
+            if kind == OUTPUT:
+                texts.append(self._decoder.decode(payload))
+            elif kind == RESIZE:
+                self.view.feed("".join(texts))
+                texts = []
+                cols, rows = payload.split(b",")
+                self.view.set_fixed_size(int(cols), int(rows))
+        self.view.feed("".join(texts))
+
+    def _set_playing(self, playing: bool):
+        if self.play_btn.isChecked() != playing:
+            self.play_btn.setChecked(playing)
+            return
+        self.play_btn.setText("Pause" if playing else "Play")
+        if playing and self.reader is not None:
+            if self._records is None:
+                # at the end: start over
+                self.seek(self.reader.started)
+            self._last_tick = time.monotonic()
+            self.play_timer.start()
+        else:
+            self.play_timer.stop()
+
+    def _tick(self):
+        now = time.monotonic()
+        speed = SPEEDS[self.speed_combo.currentIndex()]
+        self._clock += (now - self._last_tick) * speed
+        self._last_tick = now
+        if self._next is not None and self._next[0] - self._clock > MAX_IDLE:
+            self._clock = self._next[0] - MAX_IDLE
+        try:
+            self._advance(self._clock)
+        except Exception as e:
+            print("session log error:", e)
+            self._records = None
+        self._show_position()
+        if self._records is None:
+            self._set_playing(False)
+
+    def _show_position(self):
+        if self.reader is None:
+            self.time_label.setText("-")
+            return
+        self.slider.blockSignals(True)
+        self.slider.setValue(int((self._clock - self.reader.started) * 10))
+        self.slider.blockSignals(False)
+        elapsed = min(self._clock, self.reader.ended) - self.reader.started
+        total = self.reader.ended - self.reader.started
+        self.time_label.setText(f"{_fmt_duration(elapsed)} / {_fmt_duration(total)}")
+
+    # ---- search ----
+    def run_query(self):
+        self.query_timer.stop()
+        self._query = self.query_edit.text().strip()
+        self._search_generation += 1
+        self.results_tree.clear()
+        if not self._query:
+            self.status_label.setText("")
+            return
+        self.status_label.setText(f"Searching for {self._query!r}…")
+        self._search_started = time.perf_counter()
+        self.worker.request(self._search_generation, self._query, self._host())
+
+    def _on_matches(self, generation: int, matches):
+        if generation != self._search_generation:
+            return
+        items = []
+        for match in matches:
+            item = QTreeWidgetItem([_fmt_time(match.time), match.session.host, match.line])
+            item.setData(0, Qt.UserRole, match)
+            items.append(item)
+        self.results_tree.addTopLevelItems(items)
+
+    def _on_search_done(self, generation: int, count: int, error: str):
+        if generation != self._search_generation:
+            return
+        if error:
+            print("session log error:", error)
+            self.status_label.setText(f"Search failed: {error}")
+            return
+        elapsed = (time.perf_counter() - self._search_started) * 1000
+        more = "+" if count >= SEARCH_LIMIT else ""
+        self.status_label.setText(f"{count:,}{more} matches in {elapsed:.0f} ms")
+
+    def _on_result_clicked(self, item: QTreeWidgetItem, _column: int):
+        match = item.data(0, Qt.UserRole)
+        if match is None:
+            return
+        self._set_playing(False)
+        self.open_session(match.session)
+        self.seek(match.time)
+        self.view.find(self._query)
+
+    def closeEvent(self, event):
+        self._set_playing(False)
+        self._close_reader()
+        # the search worker is done for good; the viewer is deleted once its thread has stopped
+        self.worker.stop()
+        if self.worker_thread is not None:
+            self._closed = True
+            event.ignore()
+            self.hide()
+            return
+        super().closeEvent(event)
+
+    def _on_thread_finished(self):
+        self.worker_thread.deleteLater()
+        self.worker_thread = None
+        if self._closed:
+            self.deleteLater()